@@ -0,0 +1,66 @@
+"""
+Benchmark uzupełniania średnią / modą w grupach dla 1, 2 i 4 kolumn grupujących.
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python benchmarks/bench_group_fill.py --rows 1000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from logic.methods import fillna_group_mean, fillna_group_mode  # noqa: E402
+
+
+def make_frame(n_rows, seed=0):
+    """Tworzy syntetyczną ramkę z 4 kolumnami grupującymi i ~20% braków w celach."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "region": rng.choice(["north", "south", "east", "west"], n_rows),
+        "sex": rng.choice(["female", "male"], n_rows),
+        "age_band": rng.integers(0, 12, n_rows),
+        "segment": rng.choice([f"s{i}" for i in range(50)], n_rows),
+        "income": np.round(rng.normal(5000, 1200, n_rows), 2),
+        "category": rng.choice(["a", "b", "c", "d", "e"], n_rows).astype(object),
+    })
+    df.loc[rng.random(n_rows) < 0.2, "income"] = np.nan
+    df.loc[rng.random(n_rows) < 0.2, "category"] = None
+    return df
+
+
+def best_time(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark imputacji w grupach (wiersze/s).")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Liczba wierszy danych syntetycznych.")
+    parser.add_argument("--repeat", type=int, default=3, help="Liczba powtórzeń (raportowany jest najlepszy czas).")
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    all_groups = ["region", "sex", "age_band", "segment"]
+    print(f"Wiersze: {args.rows}")
+    print(f"{'metoda':<12}{'kolumny':>8}{'czas [s]':>12}{'wiersze/s':>16}")
+    for n_cols in (1, 2, 4):
+        group_cols = all_groups[:n_cols]
+        for name, func in (
+            ("group_mean", lambda: fillna_group_mean(df, "income", group_cols)),
+            ("group_mode", lambda: fillna_group_mode(df, "category", group_cols)),
+        ):
+            elapsed = best_time(func, args.repeat)
+            print(f"{name:<12}{n_cols:>8}{elapsed:>12.3f}{args.rows / elapsed:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
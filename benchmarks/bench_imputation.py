@@ -0,0 +1,209 @@
+"""
+Benchmark jakości i kosztu wszystkich metod imputacji.
+
+Do kompletnych danych (syntetycznych albo z pliku --input) wprowadzane są braki MCAR, MAR i MNAR
+o kilku odsetkach, po czym każda metoda z logic.batch.METHODS uzupełnia kolumnę docelową.
+Dla każdego przebiegu zapisywane są: MAE (metody liczbowe) lub accuracy (tekstowe),
+czas, szczytowe zużycie pamięci (tracemalloc) i liczba wierszy. Wynik trafia do raportu JSON,
+który można porównać z raportem poprzedniej wersji (--baseline).
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python benchmarks/bench_imputation.py --sizes 10000 100000 --output wyniki.json
+    python benchmarks/bench_imputation.py --baseline wyniki.json --output nowe.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from logic.batch import METHODS, ImputationContext  # noqa: E402
+from logic.evaluation import MECHANISMS, accuracy, filled_ratio, inject_missing, mae  # noqa: E402
+from logic.file_loader import load_file  # noqa: E402
+
+GROUP_COLS = ["region", "sex"]
+
+# Metoda -> (rodzaj kolumny docelowej, parametry)
+BENCH_METHODS = {
+    "mean": ("numeric", {}),
+    "median": ("numeric", {}),
+    "value": ("numeric", {}),
+    "group_mean": ("numeric", {"group_cols": GROUP_COLS}),
+    "regression": ("numeric", {}),
+    "regression_patterns": ("numeric", {}),
+    "mice": ("numeric", {}),
+    "knn": ("numeric", {}),
+    "unknown": ("categorical", {}),
+    "mode": ("categorical", {}),
+    "group_mode": ("categorical", {"group_cols": GROUP_COLS}),
+    "knn_cat": ("categorical", {}),
+    "logreg_cat": ("categorical", {}),
+}
+
+
+def make_frame(n_rows, seed=0):
+    """Kompletne dane syntetyczne z zależnościami, które metody modelowe mogą wykorzystać."""
+    rng = np.random.default_rng(seed)
+    region = rng.choice(["north", "south", "east", "west"], n_rows)
+    sex = rng.choice(["female", "male"], n_rows)
+    x1 = rng.normal(0, 1, n_rows)
+    x2 = 0.6 * x1 + rng.normal(0, 0.8, n_rows)
+    region_effect = pd.Series(region).map({"north": 400, "south": -300, "east": 150, "west": -250}).to_numpy()
+    income = np.round(5000 + 500 * x1 + 300 * x2 + region_effect + rng.normal(0, 200, n_rows), 2)
+    # Segment zależy od regionu i płci - do oceny metod kategorycznych
+    segment = np.where(rng.random(n_rows) < 0.7, np.char.add(np.char.add(region, "-"), sex), rng.choice(["other", "mixed"], n_rows))
+    return pd.DataFrame({
+        "region": region,
+        "sex": sex,
+        "x1": np.round(x1, 3),
+        "x2": np.round(x2, 3),
+        "income": income,
+        "segment": segment.astype(object),
+    })
+
+
+def measure(func, track_memory):
+    """Wywołuje func, zwraca (wynik, czas [s], szczyt pamięci [MB] lub None)."""
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    peak = None
+    if track_memory:
+        # Osobny przebieg pod tracemalloc, żeby śledzenie alokacji nie zawyżało czasu
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def _rounded(value, digits=4):
+    """Wartość zaokrąglona albo None, gdy miara nie istnieje (NaN, np. brak ocenianych komórek) - JSON nie zna NaN."""
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+
+def run(frames, methods, mechanisms, rates, targets, driver, track_memory, seed=0):
+    results = []
+    for rows, df in frames:
+        for mechanism in mechanisms:
+            for rate in rates:
+                for kind in ("numeric", "categorical"):
+                    column = targets[kind]
+                    damaged, mask = inject_missing(df, column, rate, mechanism, driver, seed)
+                    for method in methods:
+                        method_kind, params = BENCH_METHODS[method]
+                        if method_kind != kind:
+                            continue
+                        func = lambda: METHODS[method](damaged, column, ImputationContext(), **params)
+                        imputed, seconds, peak = measure(func, track_memory)
+                        entry = {
+                            "method": method, "column": column, "mechanism": mechanism, "rate": rate, "rows": rows,
+                            "seconds": round(seconds, 4),
+                            "peak_mb": None if peak is None else round(peak, 2),
+                            "filled": _rounded(filled_ratio(imputed, mask)),
+                            "mae": None, "accuracy": None,
+                        }
+                        if kind == "numeric":
+                            entry["mae"] = _rounded(mae(df[column], imputed, mask))
+                        else:
+                            entry["accuracy"] = _rounded(accuracy(df[column], imputed, mask))
+                        results.append(entry)
+                        score = entry["mae"] if kind == "numeric" else entry["accuracy"]
+                        print(
+                            f"{method:<20}{mechanism:>6}{rate:>6.2f}{rows:>10}{seconds:>10.3f}"
+                            f"{'' if peak is None else f'{peak:>10.1f}':>10}"
+                            f"{'-' if score is None else score:>12}"
+                        )
+    return results
+
+
+def _version():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, time_tolerance, quality_tolerance, min_seconds=0.05):
+    """Zwraca listę opisów regresji czasu lub jakości względem raportu bazowego."""
+    key = lambda r: (r["method"], r["column"], r["mechanism"], r["rate"], r["rows"])
+    base = {key(r): r for r in baseline["results"]}
+    problems = []
+    for r in results:
+        b = base.get(key(r))
+        if b is None:
+            continue
+        label = f"{r['method']} {r['mechanism']} {r['rate']} ({r['rows']} wierszy)"
+        if r["seconds"] > b["seconds"] * (1 + time_tolerance) and r["seconds"] - b["seconds"] > min_seconds:
+            problems.append(f"{label}: czas {b['seconds']} s -> {r['seconds']} s")
+        if r["mae"] is not None and b["mae"] is not None and r["mae"] > b["mae"] * (1 + quality_tolerance):
+            problems.append(f"{label}: MAE {b['mae']} -> {r['mae']}")
+        if r["accuracy"] is not None and b["accuracy"] is not None and r["accuracy"] < b["accuracy"] - quality_tolerance:
+            problems.append(f"{label}: accuracy {b['accuracy']} -> {r['accuracy']}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark jakości i kosztu metod imputacji.")
+    parser.add_argument("--input", help="Kompletny plik danych (domyślnie dane syntetyczne).")
+    parser.add_argument("--numeric-target", default="income", help="Kolumna liczbowa do uszkadzania.")
+    parser.add_argument("--categorical-target", default="segment", help="Kolumna tekstowa do uszkadzania.")
+    parser.add_argument("--driver", default="x1", help="Kolumna sterująca brakami MAR.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000], help="Liczby wierszy (z --input: próbki pliku).")
+    parser.add_argument("--rates", type=float, nargs="+", default=[0.1, 0.3], help="Odsetki braków.")
+    parser.add_argument("--mechanisms", nargs="+", choices=MECHANISMS, default=list(MECHANISMS))
+    parser.add_argument("--methods", nargs="+", choices=list(BENCH_METHODS), default=list(BENCH_METHODS))
+    parser.add_argument("--no-memory", action="store_true", help="Pomiń pomiar pamięci (krótszy przebieg).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_report.json", help="Plik raportu JSON.")
+    parser.add_argument("--baseline", help="Raport JSON poprzedniej wersji do porównania.")
+    parser.add_argument("--time-tolerance", type=float, default=0.2, help="Dopuszczalny względny wzrost czasu.")
+    parser.add_argument("--quality-tolerance", type=float, default=0.02, help="Dopuszczalne pogorszenie MAE (względne) / accuracy (bezwzględne).")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        source = load_file(args.input).dropna()
+        frames = [(min(n, len(source)), source.sample(n=min(n, len(source)), random_state=args.seed).reset_index(drop=True)) for n in args.sizes]
+    else:
+        frames = [(n, make_frame(n, args.seed)) for n in args.sizes]
+    targets = {"numeric": args.numeric_target, "categorical": args.categorical_target}
+
+    print(f"{'metoda':<20}{'mech.':>6}{'braki':>6}{'wiersze':>10}{'czas [s]':>10}{'pamięć MB':>10}{'MAE/acc':>12}")
+    results = run(frames, args.methods, args.mechanisms, args.rates, targets, args.driver, not args.no_memory, args.seed)
+    report = {
+        "meta": {
+            "version": _version(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "input": args.input or "synthetic",
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, allow_nan=False)
+    print(f"Raport zapisano do: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare(results, baseline, args.time_tolerance, args.quality_tolerance)
+        for problem in problems:
+            print(f"REGRESJA  {problem}")
+        if problems:
+            return 1
+        print("Brak regresji względem raportu bazowego.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
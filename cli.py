@@ -0,0 +1,210 @@
+"""
+Wsadowe uzupełnianie braków bez interfejsu graficznego.
+
+Przykład:
+    python cli.py impute --plan plan.json --output-dir wyniki --workers 8 dane/*.csv
+
+Dopasowanie planu raz na zbiorze referencyjnym i stosowanie go do kolejnych plików:
+    python cli.py fit --plan plan.json --output model.joblib referencja.csv
+    python cli.py apply --model model.joblib --output-dir wyniki dane/*.csv
+
+Porównanie wielu plików uzupełnionych z plikiem wzorcowym (MAE, RMSE, accuracy w jednej tabeli):
+    python cli.py evaluate --source wzorzec.csv --missing z_brakami.csv --output porownanie.csv wyniki/*.csv
+
+Plan (JSON lub YAML) opisuje metodę dla każdej kolumny, np.:
+    {"wiek": "mean", "dochod": {"method": "group_mean", "group_cols": ["region"]}}
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from logic.batch import load_plan, process_file
+from logic.evaluation import OVERALL, evaluate_files, write_report
+from logic.file_loader import load_file
+from logic.imputers import apply_file, fit_plan, save_imputers
+from logic.streaming import STREAMABLE_METHODS
+
+
+def _expand_inputs(patterns):
+    """Rozwija wzorce plików (przydatne w powłokach, które same tego nie robią, np. cmd.exe)."""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        paths.extend(matches)
+    return paths
+
+
+def _output_path(input_path, output_dir, suffix, fmt):
+    stem, ext = os.path.splitext(os.path.basename(input_path))
+    ext = f".{fmt}" if fmt else ext
+    return os.path.join(output_dir, f"{stem}{suffix}{ext}")
+
+
+def _output_conflicts(jobs):
+    """
+    Konflikty ścieżek wyjściowych: kilka plików wejściowych o tej samej nazwie zapisywanych do jednego pliku
+    oraz wyniki, które nadpisałyby plik wejściowy (np. --output-dir w katalogu danych bez --suffix).
+    """
+    inputs = {os.path.realpath(src): src for src in jobs}
+    targets = {}
+    for src, dst in jobs.items():
+        targets.setdefault(os.path.realpath(dst), []).append(src)
+    errors = []
+    for dst, sources in targets.items():
+        if len(sources) > 1:
+            errors.append(f"Pliki {', '.join(sources)} zapisałyby wynik do tego samego pliku {dst}.")
+        if dst in inputs:
+            errors.append(f"Wynik dla {sources[0]} nadpisałby plik wejściowy {inputs[dst]}.")
+    return errors
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"wymagana liczba >= 1, podano {value}")
+    return number
+
+
+def run_impute(args):
+    steps = load_plan(args.plan)
+    if args.stream_memory_mb:
+        unsupported = sorted({method for _, method, _ in steps if method not in STREAMABLE_METHODS})
+        if unsupported:
+            print(f"Metody niedostępne w trybie strumieniowym: {', '.join(unsupported)}", file=sys.stderr)
+            return 2
+    inputs = _expand_inputs(args.inputs)
+    if not inputs:
+        print("Nie znaleziono plików wejściowych.", file=sys.stderr)
+        return 2
+    jobs = {path: _output_path(path, args.output_dir, args.suffix, args.format) for path in inputs}
+    return _run_files(jobs, args.workers, lambda pool, src, dst: pool.submit(
+        process_file, src, steps, dst, args.stream_memory_mb, args.compression
+    ))
+
+
+def _run_files(jobs, workers, submit):
+    """Przetwarza pliki (wejście -> wyjście) w puli procesów i wypisuje podsumowanie każdego z nich."""
+    conflicts = _output_conflicts(jobs)
+    if conflicts:
+        for message in conflicts:
+            print(message, file=sys.stderr)
+        print("Użyj innego --output-dir lub --suffix.", file=sys.stderr)
+        return 2
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [submit(pool, src, dst) for src, dst in jobs.items()]
+        for future in as_completed(futures):
+            summary = future.result()
+            if summary["error"]:
+                failed += 1
+                print(f"BŁĄD  {summary['input']}: {summary['error']}", file=sys.stderr)
+            else:
+                print(
+                    f"OK    {summary['input']} -> {summary['output']} "
+                    f"(braki: {summary['missing_before']} -> {summary['missing_after']}, "
+                    f"usunięte wiersze: {summary['rows_removed']}, {summary['seconds']} s)"
+                )
+    print(f"Przetworzono plików: {len(jobs)}, błędy: {failed}")
+    return 1 if failed else 0
+
+
+def run_fit(args):
+    steps = load_plan(args.plan)
+    start = time.perf_counter()
+    imputers = fit_plan(load_file(args.reference), steps)
+    save_imputers(imputers, args.output)
+    print(f"Dopasowano kroków: {len(imputers)} na '{args.reference}' ({time.perf_counter() - start:.2f} s) -> {args.output}")
+    return 0
+
+
+def run_apply(args):
+    inputs = _expand_inputs(args.inputs)
+    if not inputs:
+        print("Nie znaleziono plików wejściowych.", file=sys.stderr)
+        return 2
+    jobs = {path: _output_path(path, args.output_dir, args.suffix, args.format) for path in inputs}
+    return _run_files(jobs, args.workers, lambda pool, src, dst: pool.submit(apply_file, args.model, src, dst, args.compression))
+
+
+def run_evaluate(args):
+    inputs = _expand_inputs(args.inputs)
+    if not inputs:
+        print("Nie znaleziono plików wejściowych.", file=sys.stderr)
+        return 2
+    start = time.perf_counter()
+    table = evaluate_files(args.source, inputs, args.missing, args.workers)
+    write_report(table, args.output)
+    failed = table["error"].notna()
+    for row in table[failed].itertuples():
+        print(f"BŁĄD  {row.file}: {row.error}", file=sys.stderr)
+    overall = table[table["column"] == OVERALL]
+    for row in overall.itertuples():
+        print(f"OK    {row.file} (MAE: {row.mae:.4f}, RMSE: {row.rmse:.4f}, accuracy: {row.accuracy:.4f}, n: {row.n})")
+    print(f"Porównano plików: {len(inputs)}, błędy: {int(failed.sum())} ({time.perf_counter() - start:.2f} s) -> {args.output}")
+    return 1 if failed.any() else 0
+
+
+def _add_output_arguments(parser):
+    parser.add_argument("--output-dir", required=True, help="Katalog na pliki wynikowe.")
+    parser.add_argument("--suffix", default="", help="Przyrostek dodawany do nazw plików wynikowych.")
+    parser.add_argument(
+        "--format", choices=["csv", "xlsx", "parquet", "feather"], default=None,
+        help="Format wyjściowy (domyślnie jak plik wejściowy).",
+    )
+    parser.add_argument(
+        "--compression", default=None,
+        help="Kompresja zapisu Parquet/Feather, np. snappy, zstd, lz4, uncompressed (domyślnie snappy / lz4).",
+    )
+    parser.add_argument("--workers", type=_positive_int, default=os.cpu_count(), help="Liczba procesów roboczych (domyślnie liczba rdzeni).")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Uzupełnianie braków w danych bez GUI.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    impute = sub.add_parser("impute", help="Uzupełnij braki w plikach według planu imputacji.")
+    impute.add_argument("inputs", nargs="+", help="Pliki wejściowe CSV/XLSX/Parquet/Feather (dozwolone wzorce, np. dane/*.csv).")
+    impute.add_argument("--plan", required=True, help="Plan imputacji: plik JSON lub YAML (kolumna -> metoda -> parametry).")
+    _add_output_arguments(impute)
+    impute.add_argument(
+        "--stream-memory-mb", type=int, default=None,
+        help="Przetwarzaj pliki CSV fragmentami w podanym budżecie pamięci (MB); tylko proste metody i zapis do CSV.",
+    )
+    impute.set_defaults(func=run_impute)
+
+    fit = sub.add_parser("fit", help="Dopasuj plan imputacji na zbiorze referencyjnym i zapisz go do pliku.")
+    fit.add_argument("reference", help="Plik referencyjny CSV/XLSX/Parquet/Feather.")
+    fit.add_argument("--plan", required=True, help="Plan imputacji: plik JSON lub YAML (kolumna -> metoda -> parametry).")
+    fit.add_argument("--output", required=True, help="Plik z dopasowanymi imputerami (joblib).")
+    fit.set_defaults(func=run_fit)
+
+    apply = sub.add_parser("apply", help="Uzupełnij braki w plikach planem dopasowanym wcześniej (fit).")
+    apply.add_argument("inputs", nargs="+", help="Pliki wejściowe CSV/XLSX/Parquet/Feather (dozwolone wzorce, np. dane/*.csv).")
+    apply.add_argument("--model", required=True, help="Plik z dopasowanymi imputerami (wynik polecenia fit).")
+    _add_output_arguments(apply)
+    apply.set_defaults(func=run_apply)
+
+    evaluate = sub.add_parser("evaluate", help="Porównaj pliki uzupełnione z plikiem wzorcowym (MAE, RMSE, accuracy).")
+    evaluate.add_argument("inputs", nargs="+", help="Pliki uzupełnione CSV/XLSX/Parquet/Feather (dozwolone wzorce, np. wyniki/*.csv).")
+    evaluate.add_argument("--source", required=True, help="Plik wzorcowy z prawdziwymi wartościami.")
+    evaluate.add_argument(
+        "--missing", default=None,
+        help="Plik z brakami, z którego powstały pliki uzupełnione; oceniane są tylko jego puste komórki "
+             "(domyślnie wszystkie komórki z wartością we wzorcu).",
+    )
+    evaluate.add_argument("--output", required=True, help="Tabela porównania: plik .csv albo .json.")
+    evaluate.add_argument("--workers", type=_positive_int, default=4, help="Liczba wątków wczytujących pliki (domyślnie 4).")
+    evaluate.set_defaults(func=run_evaluate)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
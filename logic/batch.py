@@ -0,0 +1,182 @@
+import json
+import os
+import time
+
+import pandas as pd
+
+from logic.cleaning import remove_rows_with_missing
+from logic.encoding import CategoricalEncoding
+from logic.exporter import save_dataframe
+from logic.file_loader import load_file
+from logic.streaming import stream_impute
+from logic.methods import (
+    DecimalPlacesCache,
+    fillna_group_mean,
+    fillna_group_mode,
+    fillna_knn_categorical,
+    fillna_knn_numeric,
+    fillna_logreg_categorical,
+    fillna_mean,
+    fillna_median,
+    fillna_mice,
+    fillna_mode,
+    fillna_regression,
+    fillna_regression_columns,
+    fillna_unknown,
+    fillna_value,
+)
+
+# Metody imputacji dostępne w planie: nazwa -> funkcja(df, kolumna, kontekst, **parametry) zwracająca kolumnę.
+# Nazwy są takie same jak w oknie "Uzupełnij dane".
+METHODS = {
+    "mean": lambda df, col, ctx: fillna_mean(df[col], decimals=ctx.decimals(df, col)),
+    "median": lambda df, col, ctx: fillna_median(df[col], decimals=ctx.decimals(df, col)),
+    "value": lambda df, col, ctx, value=0: fillna_value(df[col], value, decimals=ctx.decimals(df, col)),
+    "group_mean": lambda df, col, ctx, group_cols: fillna_group_mean(df, col, group_cols, decimals=ctx.decimals(df, col)),
+    "regression": lambda df, col, ctx: fillna_regression(df, col, decimals=ctx.decimals(df, col)),
+    "regression_patterns": lambda df, col, ctx: fillna_regression_columns(df, [col], {col: ctx.decimals(df, col)})[col],
+    "mice": lambda df, col, ctx: fillna_mice(df, col, decimals=ctx.decimals(df, col)),
+    "knn": lambda df, col, ctx, n_neighbors=5, max_memory_mb=256: fillna_knn_numeric(
+        df, col, n_neighbors, decimals=ctx.decimals(df, col), max_memory_mb=max_memory_mb
+    ),
+    "unknown": lambda df, col, ctx: fillna_unknown(df[col]),
+    "mode": lambda df, col, ctx: fillna_mode(df[col]),
+    "group_mode": lambda df, col, ctx, group_cols: fillna_group_mode(df, col, group_cols),
+    "knn_cat": lambda df, col, ctx, n_neighbors=5: fillna_knn_categorical(df, col, n_neighbors, encoding=ctx.encoding),
+    "logreg_cat": lambda df, col, ctx: fillna_logreg_categorical(df, col, encoding=ctx.encoding),
+}
+
+ROW_METHODS = {"remove_rows"}
+
+
+class ImputationContext:
+    """Dane podręczne współdzielone przez kolejne kroki planu na jednej ramce danych."""
+
+    def __init__(self):
+        self.decimals_cache = DecimalPlacesCache()
+        self.encoding = CategoricalEncoding()
+
+    def decimals(self, df, column):
+        if not pd.api.types.is_numeric_dtype(df[column]):
+            return None
+        return self.decimals_cache.get(df, column)
+
+    def column_changed(self, column):
+        self.decimals_cache.invalidate([column])
+        self.encoding.invalidate([column])
+
+    def rows_removed(self, keep_mask, df):
+        self.decimals_cache.invalidate()
+        self.encoding.drop_rows(keep_mask, df)
+
+
+def load_plan(path):
+    """Wczytuje plan imputacji z pliku JSON lub YAML (YAML wymaga pakietu PyYAML)."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if str(path).lower().endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError as e:
+            raise ImportError("Plan w formacie YAML wymaga pakietu PyYAML (pip install pyyaml).") from e
+        plan = yaml.safe_load(text)
+    else:
+        plan = json.loads(text)
+    return normalize_plan(plan)
+
+
+def normalize_plan(plan):
+    """
+    Sprowadza plan do listy kroków (kolumna, metoda, parametry). Obsługiwane zapisy:
+      {"wiek": "mean"}
+      {"wiek": {"method": "group_mean", "group_cols": ["region"]}}
+      {"wiek": {"group_mean": {"group_cols": ["region"]}}}
+      [{"column": "wiek", "method": "mean"}, ...]
+    """
+    if isinstance(plan, dict):
+        items = list(plan.items())
+    elif isinstance(plan, list):
+        items = []
+        for entry in plan:
+            entry = dict(entry)
+            if "column" not in entry:
+                raise ValueError(f"Krok planu bez klucza 'column': {entry}")
+            items.append((entry.pop("column"), entry))
+    else:
+        raise ValueError("Plan musi być słownikiem (kolumna -> metoda) lub listą kroków.")
+
+    steps = []
+    for column, spec in items:
+        if isinstance(spec, str):
+            method, params = spec, {}
+        elif isinstance(spec, dict) and "method" in spec:
+            params = dict(spec)
+            method = params.pop("method")
+            params = params.pop("params", params)
+        elif isinstance(spec, dict) and len(spec) == 1:
+            method, params = next(iter(spec.items()))
+            params = params or {}
+        else:
+            raise ValueError(f"Nieprawidłowy opis metody dla kolumny '{column}': {spec}")
+        if method not in METHODS and method not in ROW_METHODS:
+            raise ValueError(f"Nieznana metoda '{method}' dla kolumny '{column}'.")
+        steps.append((column, method, dict(params)))
+    return steps
+
+
+def apply_step(df, column, method, params=None, ctx=None):
+    """Wykonuje jeden krok planu i zwraca (zmodyfikowaną) ramkę danych."""
+    if column not in df.columns:
+        raise KeyError(f"Brak kolumny '{column}' w danych.")
+    ctx = ctx or ImputationContext()
+    params = params or {}
+    if method == "remove_rows":
+        keep_mask = df[column].notna().to_numpy()
+        df = remove_rows_with_missing(df, columns=[column])
+        ctx.rows_removed(keep_mask, df)
+        return df
+    df[column] = METHODS[method](df, column, ctx, **params)
+    ctx.column_changed(column)
+    return df
+
+
+def apply_plan(df, steps):
+    """Wykonuje kolejno wszystkie kroki planu na ramce danych."""
+    ctx = ImputationContext()
+    for column, method, params in steps:
+        df = apply_step(df, column, method, params, ctx)
+    return df
+
+
+def process_file(input_path, steps, output_path, stream_memory_mb=None, compression=None):
+    """
+    Wczytuje plik, wykonuje plan i zapisuje wynik. Przeznaczone do uruchamiania w puli procesów,
+    dlatego błędy są zwracane w podsumowaniu zamiast zgłaszane.
+    Gdy podano stream_memory_mb, pliki CSV są przetwarzane fragmentami (logic.streaming).
+    compression dotyczy zapisu do Parquet/Feather.
+    """
+    start = time.perf_counter()
+    summary = {"input": str(input_path), "output": str(output_path)}
+    try:
+        if stream_memory_mb and str(input_path).endswith(".csv"):
+            os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+            summary.update(stream_impute(str(input_path), steps, str(output_path), stream_memory_mb), error=None)
+            summary["seconds"] = round(time.perf_counter() - start, 3)
+            return summary
+        df = load_file(str(input_path))
+        missing_before = int(df.isna().sum().sum())
+        rows_before = len(df)
+        df = apply_plan(df, steps)
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        save_dataframe(df, str(output_path), compression)
+        summary.update(
+            rows=rows_before,
+            rows_removed=rows_before - len(df),
+            missing_before=missing_before,
+            missing_after=int(df.isna().sum().sum()),
+            error=None,
+        )
+    except Exception as e:
+        summary["error"] = f"{type(e).__name__}: {e}"
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    return summary
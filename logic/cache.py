@@ -0,0 +1,146 @@
+"""
+Podręczna kopia wczytanych plików CSV/Excel w formacie Arrow IPC (Feather bez kompresji).
+
+Przy ponownym otwarciu tego samego pliku dane są czytane z kopii przez mapowanie pamięci,
+zamiast ponownie parsować arkusz. Mapowanie oszczędza tylko odczyt z dysku: to_pandas() i tak
+tworzy w pamięci pełną kopię danych, więc ponowne otwarcie zajmuje tyle RAM co pierwsze, a jego czas
+rośnie z rozmiarem pliku (w jednym pomiarze: kilkadziesiąt ms zamiast ok. 10 s parsowania). Kopia jest ważna, dopóki zgadzają się ścieżka, rozmiar,
+czas modyfikacji i skrót próbek zawartości pliku źródłowego. Łączny rozmiar katalogu jest
+ograniczony - po przekroczeniu limitu usuwane są najdawniej używane kopie.
+"""
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "uzupelnianie-brakow")
+
+
+def content_hash(file_path, block_size=256 * 1024):
+    """Skrót próbek pliku (początek, środek, koniec) - tani test, czy zawartość się nie zmieniła."""
+    size = os.path.getsize(file_path)
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(file_path, "rb") as f:
+        for offset in sorted({0, max(0, size // 2 - block_size // 2), max(0, size - block_size)}):
+            f.seek(offset)
+            digest.update(f.read(block_size))
+    return digest.hexdigest()
+
+
+class FileCache:
+    """Kopie wczytanych ramek danych w katalogu cache_dir, ograniczone do max_size_mb (LRU)."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size_mb=2048):
+        self.cache_dir = cache_dir
+        self.max_size_mb = max_size_mb
+
+    def _paths(self, file_path, variant):
+        name = hashlib.blake2b(f"{os.path.abspath(file_path)}|{variant}".encode(), digest_size=16).hexdigest()
+        base = os.path.join(self.cache_dir, name)
+        return base + ".arrow", base + ".json"
+
+    def _source_info(self, file_path):
+        stat = os.stat(file_path)
+        return {"source": os.path.abspath(file_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def load(self, file_path, parse, variant="", columns=None):
+        """
+        Zwraca ramkę danych pliku z kopii, jeśli jest aktualna; w przeciwnym razie wywołuje parse(),
+        zapisuje wynik i go zwraca. variant odróżnia kopie tego samego pliku wczytanego z innymi ustawieniami.
+        """
+        data_path, meta_path = self._paths(file_path, variant)
+        info = self._source_info(file_path)
+        meta = self._read_meta(meta_path)
+        if meta is not None and os.path.exists(data_path) and all(meta.get(k) == v for k, v in info.items()):
+            if meta.get("hash") == content_hash(file_path):
+                try:
+                    df = self._read(data_path, columns)
+                except Exception:
+                    df = None
+                if df is not None:
+                    meta["last_used"] = time.time()
+                    self._write_meta(meta_path, meta)
+                    return df
+
+        df = parse()
+        try:
+            self.store(file_path, df, variant, info)
+        except Exception:
+            # Niektórych ramek nie da się zapisać w Arrow (np. kolumny z mieszanymi typami) - wtedy bez kopii
+            self._remove(data_path, meta_path)
+        return df if columns is None else df[list(columns)]
+
+    def store(self, file_path, df, variant="", info=None):
+        """Zapisuje kopię ramki danych i usuwa najdawniej używane kopie ponad limit rozmiaru."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data_path, meta_path = self._paths(file_path, variant)
+        info = info or self._source_info(file_path)
+        tmp_path = f"{data_path}.{os.getpid()}.tmp"
+        # Bez kompresji, żeby plik dało się odczytać przez mapowanie pamięci
+        df.reset_index(drop=True).to_feather(tmp_path, compression="uncompressed")
+        os.replace(tmp_path, data_path)
+        meta = dict(info, hash=content_hash(file_path), variant=variant, last_used=time.time(), bytes=os.path.getsize(data_path))
+        self._write_meta(meta_path, meta)
+        self.evict()
+
+    def evict(self):
+        """Usuwa najdawniej używane kopie, dopóki łączny rozmiar przekracza max_size_mb."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            meta_path = os.path.join(self.cache_dir, name)
+            meta = self._read_meta(meta_path) or {}
+            entries.append((meta.get("last_used", 0), meta.get("bytes", 0), meta_path[:-5] + ".arrow", meta_path))
+        total = sum(size for _, size, _, _ in entries)
+        limit = self.max_size_mb * 1024 ** 2
+        for _, size, data_path, meta_path in sorted(entries):
+            if total <= limit:
+                break
+            self._remove(data_path, meta_path)
+            total -= size
+
+    def clear(self):
+        """Usuwa wszystkie kopie."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith((".arrow", ".json", ".tmp")):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    @staticmethod
+    def _read(data_path, columns):
+        from pyarrow import feather
+        table = feather.read_table(data_path, columns=None if columns is None else list(columns), memory_map=True)
+        # Kopia danych w pamięci - ramka nie korzysta dalej ze zmapowanych stron pliku
+        df = table.to_pandas()
+        # Arrow zwraca braki w kolumnach tekstowych jako None - parser CSV/Excel daje NaN
+        for col in df.columns:
+            if df[col].dtype == object and df[col].isna().any():
+                df[col] = df[col].where(df[col].notna(), np.nan)
+        return df
+
+    @staticmethod
+    def _read_meta(meta_path):
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_meta(meta_path, meta):
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    @staticmethod
+    def _remove(*paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
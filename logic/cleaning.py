@@ -1,16 +1,36 @@
 import pandas as pd
 
-def clean_column(series):
-    # Usuń spacje z początku i końca
-    series = series.astype(str).str.strip()
+# Wartości tekstowe traktowane jako brak danych (porównywane po obcięciu spacji)
+NULL_TOKENS = frozenset({"", "nan", "NaN", "NAN", "null", "NULL", "Null", "None", "none", "<NA>", "NA", "N/A", "n/a", "#N/A"})
 
-    # Zamień znane puste i błędne wartości na NaN
-    series = series.replace(
-        to_replace=[r'^\s*$', 'nan', 'NaN', 'null', 'None', '<NA>'],
-        value=pd.NA,
-        regex=True
-    )
-    return series
+def _strip_text(series):
+    """Obcięte wartości tekstowe (NaN dla nietekstowych) albo None, gdy kolumna nie zawiera tekstu."""
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return None
+    try:
+        return series.str.strip()
+    except AttributeError:
+        # Kolumna typu object bez wartości tekstowych (np. same wartości logiczne)
+        return None
+
+def null_token_mask(series, null_tokens=NULL_TOKENS):
+    """Maska wartości tekstowych, które po obcięciu spacji należą do null_tokens (wyszukiwanie w zbiorze, bez wyrażeń regularnych)."""
+    stripped = _strip_text(series)
+    if stripped is None:
+        return pd.Series(False, index=series.index)
+    return stripped.isin(null_tokens)
+
+def clean_column(series, null_tokens=NULL_TOKENS):
+    """
+    Obcina spacje w wartościach tekstowych i zamienia znane puste i błędne wartości na braki.
+    Kolumny liczbowe zwracane są bez zmian - nie są zamieniane na tekst.
+    """
+    stripped = _strip_text(series)
+    if stripped is None:
+        return series
+    # Wartości nietekstowe (np. liczby w kolumnie mieszanej) zostają bez zmian
+    stripped = stripped.where(stripped.notna(), series)
+    return stripped.mask(stripped.isin(null_tokens))
 
 def remove_rows_with_missing(df, columns=None):
     if columns is not None:
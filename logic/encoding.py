@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+
+class CategoricalEncoding:
+    """
+    Zakodowana liczbowo macierz kolumn kategorycznych (object/string/category) ramki danych.
+    Kody odpowiadają LabelEncoder (posortowane wartości tekstowe), brak = NaN.
+    Macierz budowana jest raz, a po zmianach przekodowywane są tylko unieważnione kolumny.
+    """
+
+    def __init__(self):
+        self.columns = []
+        self.categories = {}
+        self.matrix = None
+        self._index = None
+        self._stale = set()
+
+    def get(self, df):
+        """Zwraca (macierz, lista kolumn) aktualną dla podanej ramki danych."""
+        columns = list(df.select_dtypes(include=["object", "string", "category"]).columns)
+        if self.matrix is None or columns != self.columns or not self._same_rows(df):
+            self._build(df, columns)
+        elif self._stale:
+            for column in list(self._stale):
+                self._encode_column(df, column)
+            self._stale.clear()
+        return self.matrix, self.columns
+
+    def invalidate(self, columns=None):
+        """Oznacza kolumny do ponownego zakodowania (wszystkie, gdy columns=None)."""
+        if columns is None:
+            self.matrix = None
+            self._stale.clear()
+            return
+        self._stale.update(c for c in columns if c in self.categories)
+
+    def drop_rows(self, keep_mask, df):
+        """Usuwa z macierzy wiersze odrzucone z ramki danych (keep_mask względem poprzedniej ramki)."""
+        if self.matrix is None:
+            return
+        self.matrix = np.asfortranarray(self.matrix[np.asarray(keep_mask, dtype=bool)])
+        self._index = df.index
+
+    def transform(self, df):
+        """
+        Koduje inną ramkę danych kategoriami zapamiętanymi przy ostatnim get() (te same kolumny i kody).
+        Wartości nieznane w zapamiętanych kategoriach są traktowane jak braki.
+        """
+        matrix = np.full((len(df), len(self.columns)), np.nan, order="F")
+        for j, column in enumerate(self.columns):
+            values = df[column]
+            notnull = values.notna().to_numpy()
+            codes = self.categories[column].get_indexer(values[notnull].astype(str)).astype(float)
+            codes[codes < 0] = np.nan
+            matrix[notnull, j] = codes
+        return matrix
+
+    def decode(self, column, codes):
+        """Zamienia kody liczbowe z powrotem na wartości kolumny."""
+        return self.categories[column].take(np.asarray(codes, dtype=np.int64)).to_numpy()
+
+    def _same_rows(self, df):
+        if df.index is self._index:
+            return True
+        return len(df.index) == len(self._index) and df.index.equals(self._index)
+
+    def _build(self, df, columns):
+        self.columns = columns
+        self.categories = {}
+        self.matrix = np.full((len(df), len(columns)), np.nan, order="F")
+        self._index = df.index
+        self._stale.clear()
+        for column in columns:
+            self._encode_column(df, column)
+
+    def _encode_column(self, df, column):
+        j = self.columns.index(column)
+        values = df[column]
+        notnull = values.notna().to_numpy()
+        codes, uniques = pd.factorize(values[notnull].astype(str), sort=True)
+        self.matrix[:, j] = np.nan
+        self.matrix[notnull, j] = codes
+        self.categories[column] = pd.Index(uniques)
@@ -0,0 +1,205 @@
+"""
+Ocena jakości imputacji: wprowadzanie sztucznych braków do kompletnych danych
+(MCAR, MAR, MNAR) oraz miary MAE i accuracy liczone tylko w uzupełnionych komórkach.
+
+Porównanie wielu plików uzupełnionych z jednym plikiem wzorcowym: wzorzec (i opcjonalnie plik
+z brakami wyznaczający oceniane komórki) wczytywany jest raz, pliki uzupełnione równolegle,
+a MAE, RMSE i accuracy liczone są dla wszystkich kolumn naraz na macierzach.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from logic.file_loader import load_file
+
+MECHANISMS = ("MCAR", "MAR", "MNAR")
+
+
+def _rank_weights(values):
+    """Wagi losowania rosnące z rangą wartości (braki w danych pomocniczych dostają wagę środkową)."""
+    ranks = pd.Series(values).rank(method="average", pct=True).fillna(0.5).to_numpy()
+    return ranks / ranks.sum()
+
+
+def missing_mask(df, column, rate, mechanism="MCAR", driver=None, seed=0):
+    """
+    Zwraca maskę wierszy, w których kolumna column ma zostać usunięta (dokładnie round(rate * n) wierszy).
+    - MCAR: wiersze losowane jednostajnie,
+    - MAR: prawdopodobieństwo rośnie z wartością innej, obserwowanej kolumny driver,
+    - MNAR: prawdopodobieństwo rośnie z usuwaną wartością (dla tekstu - z częstością kategorii).
+    """
+    rng = np.random.default_rng(seed)
+    n = len(df)
+    k = int(round(rate * n))
+    if mechanism == "MCAR":
+        weights = None
+    elif mechanism == "MAR":
+        if driver is None:
+            raise ValueError("Mechanizm MAR wymaga kolumny pomocniczej (driver).")
+        weights = _rank_weights(_as_ranked(df[driver]))
+    elif mechanism == "MNAR":
+        weights = _rank_weights(_as_ranked(df[column]))
+    else:
+        raise ValueError(f"Nieznany mechanizm braków: {mechanism}")
+    mask = np.zeros(n, dtype=bool)
+    mask[rng.choice(n, size=k, replace=False, p=weights)] = True
+    return mask
+
+
+def _as_ranked(series):
+    """Wartości do rangowania: liczby bez zmian, tekst zamieniony na liczność kategorii."""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy()
+    return series.map(series.value_counts()).to_numpy()
+
+
+def inject_missing(df, column, rate, mechanism="MCAR", driver=None, seed=0):
+    """Kopia ramki z brakami wprowadzonymi w kolumnie column oraz maska usuniętych wierszy."""
+    mask = missing_mask(df, column, rate, mechanism, driver, seed)
+    damaged = df.copy()
+    damaged.loc[mask, column] = np.nan
+    return damaged, mask
+
+
+def mae(true, imputed, mask):
+    """Średni błąd bezwzględny w komórkach maski, które zostały uzupełnione (NaN, gdy żadna)."""
+    true = np.asarray(true, dtype=float)[mask]
+    imputed = np.asarray(pd.to_numeric(pd.Series(imputed), errors="coerce"), dtype=float)[mask]
+    filled = ~np.isnan(imputed)
+    if not filled.any():
+        return float("nan")
+    return float(np.abs(true[filled] - imputed[filled]).mean())
+
+
+def accuracy(true, imputed, mask):
+    """Odsetek trafionych wartości w komórkach maski, które zostały uzupełnione (NaN, gdy żadna)."""
+    true = pd.Series(true).to_numpy(dtype=object)[mask]
+    imputed = pd.Series(imputed).to_numpy(dtype=object)[mask]
+    filled = ~pd.isna(imputed)
+    if not filled.any():
+        return float("nan")
+    return float((true[filled] == imputed[filled]).mean())
+
+
+def filled_ratio(imputed, mask):
+    """Jaka część usuniętych komórek została uzupełniona."""
+    if not mask.any():
+        return 1.0
+    return float(pd.Series(imputed).notna().to_numpy()[mask].mean())
+
+
+REPORT_COLUMNS = ["file", "column", "kind", "n", "unfilled", "mae", "rmse", "accuracy"]
+OVERALL = "(średnia)"
+
+
+class Reference:
+    """Dane wzorcowe wczytane raz: kolumny liczbowe jako macierz, tekstowe jako macierz napisów, maska ocenianych komórek."""
+
+    def __init__(self, truth, missing=None):
+        self.columns = list(truth.columns)
+        self.shape = truth.shape
+        if missing is not None:
+            self.check(missing, "z brakami")
+        self.numeric = list(truth.select_dtypes(include="number").columns)
+        self.text = [c for c in self.columns if c not in set(self.numeric)]
+        self.numeric_values = truth[self.numeric].to_numpy(dtype=float)
+        self.text_values, text_known = _text_matrix(truth[self.text])
+        # Oceniane komórki: braki w pliku z brakami (jeśli podano), w przeciwnym razie wszystkie znane wartości
+        if missing is None:
+            self.numeric_mask = ~np.isnan(self.numeric_values)
+            self.text_mask = text_known
+        else:
+            self.numeric_mask = missing[self.numeric].isna().to_numpy() & ~np.isnan(self.numeric_values)
+            self.text_mask = missing[self.text].isna().to_numpy() & text_known
+
+    @classmethod
+    def from_files(cls, source_path, missing_path=None):
+        missing = load_file(missing_path) if missing_path else None
+        return cls(load_file(source_path), missing)
+
+    def check(self, other, label):
+        """Wymaga tych samych wymiarów i kolumn (w tej samej kolejności) co wzorzec."""
+        if self.shape != other.shape:
+            raise ValueError(f"Różne wymiary plików: wzorzec={self.shape}, plik {label}={other.shape}")
+        if self.columns != list(other.columns):
+            raise ValueError(f"Kolumny pliku {label} różnią się od wzorca (inna kolejność lub nazwy).")
+
+
+def _text_matrix(frame):
+    """Wartości jako macierz napisów bez spacji na brzegach oraz maska znanych wartości."""
+    known = frame.notna().to_numpy()
+    values = np.char.strip(frame.astype(object).where(frame.notna(), "").to_numpy(dtype=str))
+    return values, known
+
+
+def evaluate_frame(reference, imputed, label=""):
+    """
+    Miary dla wszystkich kolumn jednej uzupełnionej ramki: MAE i RMSE dla liczbowych, accuracy dla tekstowych,
+    liczba ocenionych komórek (n) i komórek, które nadal są puste (unfilled). Ostatni wiersz to średnia po kolumnach.
+    """
+    reference.check(imputed, label)
+    numeric = imputed[reference.numeric].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    filled = ~np.isnan(numeric)
+    valid = reference.numeric_mask & filled
+    errors = np.where(valid, numeric - np.where(valid, reference.numeric_values, 0.0), 0.0)
+    n_num = valid.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mae_values = np.abs(errors).sum(axis=0) / n_num
+        rmse_values = np.sqrt((errors ** 2).sum(axis=0) / n_num)
+
+    text, text_known = _text_matrix(imputed[reference.text])
+    valid_text = reference.text_mask & text_known
+    n_text = valid_text.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        accuracy_values = ((text == reference.text_values) & valid_text).sum(axis=0) / n_text
+
+    table = pd.concat([
+        pd.DataFrame({
+            "column": reference.numeric, "kind": "numeric", "n": n_num,
+            "unfilled": (reference.numeric_mask & ~filled).sum(axis=0),
+            "mae": mae_values, "rmse": rmse_values, "accuracy": np.nan,
+        }),
+        pd.DataFrame({
+            "column": reference.text, "kind": "text", "n": n_text,
+            "unfilled": (reference.text_mask & ~text_known).sum(axis=0),
+            "mae": np.nan, "rmse": np.nan, "accuracy": accuracy_values,
+        }),
+    ], ignore_index=True)
+    table = table.set_index("column").loc[reference.columns].reset_index()
+    overall = {
+        "column": OVERALL, "kind": "", "n": int(table["n"].sum()), "unfilled": int(table["unfilled"].sum()),
+        "mae": table["mae"].mean(), "rmse": table["rmse"].mean(), "accuracy": table["accuracy"].mean(),
+    }
+    table = pd.concat([table, pd.DataFrame([overall])], ignore_index=True)
+    table.insert(0, "file", label)
+    return table[REPORT_COLUMNS]
+
+
+def evaluate_files(source_path, imputed_paths, missing_path=None, max_workers=4):
+    """
+    Porównuje wiele plików uzupełnionych z jednym wzorcem i zwraca jedną tabelę (kolumna file wskazuje plik).
+    Błąd wczytania lub niezgodne wymiary jednego pliku trafiają do kolumny error (pustej dla pozostałych) zamiast przerywać całość.
+    """
+    reference = Reference.from_files(source_path, missing_path)
+
+    def one(path):
+        try:
+            return evaluate_frame(reference, load_file(path), str(path))
+        except Exception as e:
+            return pd.DataFrame([{"file": str(path), "error": f"{type(e).__name__}: {e}"}])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        tables = list(pool.map(one, imputed_paths))
+    table = pd.concat(tables, ignore_index=True).reindex(columns=REPORT_COLUMNS + ["error"])
+    return table.astype({"n": "Int64", "unfilled": "Int64"})
+
+
+def write_report(table, path):
+    """Zapisuje tabelę porównania do CSV albo JSON (według rozszerzenia)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if str(path).lower().endswith(".json"):
+        table.to_json(path, orient="records", indent=2, force_ascii=False)
+    else:
+        table.to_csv(path, index=False)
@@ -1,19 +1,30 @@
-import pandas as pd
-from tkinter import filedialog, messagebox
+from logic.file_loader import file_format
+from logic.perf import instrumented
 
-def export_dataframe(df):
-    """Eksportuje DataFrame do pliku CSV lub Excel z oknem dialogowym zapisu."""
-    if df is None or df.empty:
-        messagebox.showwarning("Brak danych", "Najpierw wczytaj plik.")
-        return
-    file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv"), ("Excel files", "*.xlsx")])
-    if not file_path:
-        return
-    try:
-        if file_path.endswith(".csv"):
-            df.to_csv(file_path, index=False)
-        else:
-            df.to_excel(file_path, index=False)
-        messagebox.showinfo("Sukces", "Dane zostały wyeksportowane.")
-    except Exception as e:
-        messagebox.showerror("Błąd", f"Nie udało się wyeksportować danych:\n{e}")
+# Typy plików dla okien dialogowych zapisu
+SAVE_FILE_TYPES = [
+    ("CSV files", "*.csv"),
+    ("Excel files", "*.xlsx"),
+    ("Parquet files", "*.parquet"),
+    ("Feather/Arrow files", "*.feather"),
+]
+
+# Domyślna kompresja formatów kolumnowych (None = domyślna biblioteki pyarrow)
+DEFAULT_COMPRESSION = {"parquet": "snappy", "feather": "lz4"}
+
+@instrumented()
+def save_dataframe(df, file_path, compression=None):
+    """
+    Zapisuje DataFrame do pliku CSV, Excel, Parquet lub Feather (format według rozszerzenia), bez okien dialogowych.
+    compression dotyczy formatów kolumnowych (np. 'snappy', 'zstd', 'lz4', 'uncompressed').
+    """
+    fmt = file_format(file_path)
+    if fmt == "csv":
+        df.to_csv(file_path, index=False)
+    elif fmt == "parquet":
+        df.to_parquet(file_path, index=False, compression=compression or DEFAULT_COMPRESSION["parquet"])
+    elif fmt == "feather":
+        # Feather wymaga domyślnego indeksu (po usunięciu wierszy indeks ma luki)
+        df.reset_index(drop=True).to_feather(file_path, compression=compression or DEFAULT_COMPRESSION["feather"])
+    else:
+        df.to_excel(file_path, index=False)
@@ -1,16 +1,208 @@
+import itertools
+
+import numpy as np
 import pandas as pd
+from logic.cleaning import NULL_TOKENS, null_token_mask
+from logic.perf import instrumented
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+FEATHER_EXTENSIONS = (".feather", ".arrow", ".ipc")
+# Wersja parsowania CSV/Excel - zmiana unieważnia kopie w FileCache wczytane starszym sposobem
+PARSER_VERSION = 2
 
-def detect_csv_separator(file_path):
+# Typy plików dla okien dialogowych wczytywania
+OPEN_FILE_TYPES = [
+    ("Obsługiwane pliki", "*.csv *.xlsx *.xls *.parquet *.pq *.feather *.arrow"),
+    ("CSV files", "*.csv"),
+    ("Excel files", "*.xlsx;*.xls"),
+    ("Parquet files", "*.parquet;*.pq"),
+    ("Feather/Arrow files", "*.feather;*.arrow"),
+]
+
+def detect_csv_separator(file_path, sample_lines=20):
+    # Separator musi występować tyle samo razy w każdej z kilku pierwszych linii - przecinki dziesiętne
+    # (np. eksport z polskiego Excela: "0,5;000,25;70,1") nie mają stałej liczby w wierszu.
+    # Gdy żaden albo oba separatory są stałe, rozstrzyga nagłówek.
     with open(file_path, 'r', encoding='utf-8') as f:
-        first_line = f.readline()
-        if first_line.count(';') > first_line.count(','):
-            return ';'
-        else:
-            return ','
+        lines = [line for line in itertools.islice(f, sample_lines) if line.strip()]
+    if not lines:
+        return ','
+    consistent = [sep for sep in (';', ',') if lines[0].count(sep) > 0 and len({line.count(sep) for line in lines}) == 1]
+    if len(consistent) == 1:
+        return consistent[0]
+    if lines[0].count(';') > lines[0].count(','):
+        return ';'
+    return ','
+
+def csv_read_options(sep):
+    """Opcje read_csv dla separatora: przy ';' przecinek dziesiętny (polski format Excela)."""
+    return {"sep": sep, "decimal": "," if sep == ";" else "."}
+
+def to_numeric(column, decimal="."):
+    """pd.to_numeric z separatorem dziesiętnym pliku (np. '1,5' przy decimal=','). Błąd, gdy wartość nie jest liczbą."""
+    if decimal != "." and pd.api.types.is_object_dtype(column):
+        texts = column.map(lambda value: value.replace(decimal, ".") if isinstance(value, str) else value)
+        return pd.to_numeric(texts)
+    return pd.to_numeric(column)
+
+def normalize_null_tokens(df, null_tokens=NULL_TOKENS, convert_numeric=True, decimal="."):
+    """
+    Zamienia w kolumnach tekstowych wartości z null_tokens (także otoczone spacjami) na braki.
+    Kolumny, które po tej zamianie zawierają same liczby (z separatorem dziesiętnym decimal),
+    są zamieniane na liczbowe (convert_numeric=True).
+    """
+    for col in df.columns:
+        mask = null_token_mask(df[col], null_tokens)
+        if not mask.any():
+            continue
+        column = df[col].mask(mask)
+        if convert_numeric:
+            try:
+                column = to_numeric(column, decimal)
+            except (ValueError, TypeError):
+                pass
+        df[col] = column
+    return df
+
+def _compact_string_dtype():
+    """Zwarty typ tekstowy oparty na pyarrow albo None, gdy pyarrow nie jest zainstalowany."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    return pd.StringDtype("pyarrow")
 
-def load_file(file_path):
-    if file_path.endswith(".csv"):
-        sep = detect_csv_separator(file_path)
-        return pd.read_csv(file_path, sep=sep)
+def memory_usage_mb(df):
+    """Rzeczywista zajętość pamięci ramki danych w MB (z zawartością tekstów)."""
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+def optimize_dtypes(df, category_ratio=0.5):
+    """
+    Zmniejsza zajętość pamięci ramki danych:
+    - liczby całkowite są zawężane do najmniejszego pasującego typu,
+    - float64 -> float32 tylko wtedy, gdy wszystkie wartości dają się zapisać bez straty,
+    - kolumny tekstowe o małej liczbie różnych wartości (poniżej category_ratio wierszy) -> category,
+    - pozostałe kolumny tekstowe -> zwarty typ tekstowy (gdy dostępny jest pyarrow).
+    """
+    string_dtype = _compact_string_dtype()
+    for col in df.columns:
+        column = df[col]
+        if pd.api.types.is_bool_dtype(column):
+            continue
+        if pd.api.types.is_integer_dtype(column) and not isinstance(column.dtype, pd.api.extensions.ExtensionDtype):
+            df[col] = pd.to_numeric(column, downcast="integer")
+        elif column.dtype == np.float64:
+            narrowed = column.astype(np.float32)
+            values = column.to_numpy()
+            if np.array_equal(narrowed.to_numpy(dtype=np.float64), values, equal_nan=True):
+                df[col] = narrowed
+        elif pd.api.types.is_object_dtype(column):
+            # Tylko kolumny czysto tekstowe - kolumny mieszane (np. liczby i teksty) zostają bez zmian
+            if pd.api.types.infer_dtype(column, skipna=True) not in ("string", "empty"):
+                continue
+            if column.nunique(dropna=True) < category_ratio * max(1, len(column)):
+                df[col] = column.astype("category")
+            elif string_dtype is not None:
+                df[col] = column.astype(string_dtype)
+    return df
+
+def file_format(file_path):
+    """Format pliku według rozszerzenia: 'csv', 'parquet', 'feather' lub 'excel'."""
+    name = str(file_path).lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith(PARQUET_EXTENSIONS):
+        return "parquet"
+    if name.endswith(FEATHER_EXTENSIONS):
+        return "feather"
+    return "excel"
+
+def _read_text_file(file_path, fmt, null_tokens, columns=None):
+    # Tokeny braków są rozpoznawane już przy parsowaniu; druga, wektorowa runda łapie tokeny otoczone spacjami
+    if fmt == "csv":
+        options = csv_read_options(detect_csv_separator(file_path))
+        df = pd.read_csv(file_path, na_values=null_tokens, usecols=columns, **options)
+        return normalize_null_tokens(df, null_tokens, decimal=options["decimal"])
+    df = pd.read_excel(file_path, na_values=null_tokens, usecols=columns)
+    return normalize_null_tokens(df, null_tokens)
+
+@instrumented()
+def load_file(file_path, null_tokens=NULL_TOKENS, optimize=False, columns=None, cache=None):
+    """
+    Wczytuje CSV, Excel, Parquet lub Feather/Arrow IPC. columns ogranicza wczytywane kolumny
+    (w formatach kolumnowych pozostałe kolumny nie są w ogóle odczytywane z dysku).
+    cache (logic.cache.FileCache) pozwala przy ponownym otwarciu CSV/Excel pominąć parsowanie.
+    """
+    fmt = file_format(file_path)
+    if fmt == "parquet":
+        # Formaty kolumnowe przechowują typy i braki, więc nie wymagają normalizacji tokenów
+        df = pd.read_parquet(file_path, columns=columns)
+    elif fmt == "feather":
+        df = pd.read_feather(file_path, columns=columns)
+    elif cache is not None:
+        # Kopia zawiera cały plik; tokeny braków wyróżniają wariant kopii
+        variant = "|".join([f"v{PARSER_VERSION}", *sorted(null_tokens)])
+        df = cache.load(file_path, lambda: _read_text_file(file_path, fmt, null_tokens), variant, columns)
     else:
-        return pd.read_excel(file_path)
+        df = _read_text_file(file_path, fmt, null_tokens, columns)
+    if fmt in ("parquet", "feather"):
+        # Metadane pandas nie zapisują wariantu typu string - przywróć zwarty wariant pyarrow
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.StringDtype) and df[col].dtype.storage == "python":
+                df[col] = df[col].astype(pd.StringDtype("pyarrow"))
+    if optimize:
+        df = optimize_dtypes(df)
+    return df
+
+def infer_csv_dtypes(file_path, sep, sample_rows=10_000, float_columns=()):
+    """
+    Ustala typy kolumn CSV na podstawie próbki pierwszych wierszy, z tą samą zamianą tokenów braków
+    i kolumn liczbowych co load_file. Kolumny z float_columns są zawsze wczytywane jako float64
+    (np. kolumny uzupełniane średnią) - jeśli nie są liczbowe, zgłaszany jest błąd.
+    Zwraca (słownik typów do read_csv, kolumny liczbowe dopiero po usunięciu tokenów braków, próbka).
+    """
+    options = csv_read_options(sep)
+    raw = pd.read_csv(file_path, nrows=sample_rows, na_values=NULL_TOKENS, **options)
+    raw_numeric = {col for col in raw.columns if pd.api.types.is_numeric_dtype(raw[col])}
+    sample = normalize_null_tokens(raw, decimal=options["decimal"])
+    dtypes, converted = {}, []
+    for col in sample.columns:
+        numeric = pd.api.types.is_numeric_dtype(sample[col]) and not pd.api.types.is_bool_dtype(sample[col])
+        if col in float_columns and not numeric:
+            raise ValueError(f"Kolumna '{col}' nie jest liczbowa (w próbce {sample_rows} wierszy) - metoda liczbowa nie może jej uzupełnić.")
+        if numeric and col not in raw_numeric:
+            # Liczby z tokenami braków (np. ' NA ') - czytane jako tekst i zamieniane w każdym fragmencie
+            dtypes[col] = "object"
+            converted.append(col)
+        elif pd.api.types.is_integer_dtype(sample[col]) and col not in float_columns:
+            # Nullable Int64, bo dalsze fragmenty pliku mogą zawierać braki
+            dtypes[col] = "Int64"
+        elif numeric:
+            dtypes[col] = "float64"
+        else:
+            dtypes[col] = "object"
+    return dtypes, converted, sample
+
+def iter_csv_chunks(file_path, memory_budget_mb=256, sample_rows=10_000, float_columns=()):
+    """
+    Wczytuje CSV fragmentami o rozmiarze dobranym do budżetu pamięci, ze stałymi typami kolumn.
+    Liczba wierszy we fragmencie wynika z rozmiaru wiersza w próbce (z zapasem na kopie robocze).
+    """
+    sep = detect_csv_separator(file_path)
+    decimal = csv_read_options(sep)["decimal"]
+    dtypes, converted, sample = infer_csv_dtypes(file_path, sep, sample_rows, float_columns)
+    bytes_per_row = sample.memory_usage(deep=True, index=False).sum() / max(1, len(sample))
+    chunksize = max(1_000, int(memory_budget_mb * 1024 ** 2 / max(1.0, bytes_per_row * 3)))
+    with pd.read_csv(file_path, dtype=dtypes, chunksize=chunksize, na_values=NULL_TOKENS, **csv_read_options(sep)) as reader:
+        try:
+            for chunk in reader:
+                # Typy są stałe: tekst nie jest zamieniany na liczby, poza kolumnami liczbowymi z próbki
+                chunk = normalize_null_tokens(chunk, convert_numeric=False)
+                for col in converted:
+                    chunk[col] = to_numeric(chunk[col], decimal).astype("float64")
+                yield chunk
+        except (ValueError, TypeError) as e:
+            raise ValueError(
+                f"Typy kolumn ustalone z próbki {sample_rows} wierszy nie pasują do dalszej części pliku: {e}. "
+                "Zwiększ rozmiar próbki."
+            ) from e
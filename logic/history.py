@@ -0,0 +1,180 @@
+"""
+Historia zmian danych (cofnij / ponów) bez kopii całej ramki.
+
+Krok uzupełnienia zapamiętuje tylko pozycje zmienionych komórek z wartościami przed i po zmianie,
+krok usunięcia wierszy - maskę zachowanych wierszy i same usunięte wiersze. Łączny rozmiar
+historii jest ograniczony; po przekroczeniu limitu usuwane są najstarsze kroki.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _changed_positions(old, new):
+    """Pozycje, w których wartości serii się różnią (dwa braki liczą się jako równe)."""
+    if old.dtype != new.dtype or isinstance(old.dtype, pd.CategoricalDtype):
+        # Kategorie o różnych zbiorach wartości (i różne typy) porównywane jako obiekty
+        old, new = old.astype(object), new.astype(object)
+    same = old.eq(new).fillna(False).to_numpy(dtype=bool)
+    same |= old.isna().to_numpy() & new.isna().to_numpy()
+    return np.flatnonzero(~same)
+
+
+class ColumnChange:
+    """Zmienione komórki jednej kolumny: pozycje, wartości przed i po oraz typy kolumny przed i po."""
+
+    def __init__(self, column, positions, old_values, new_values, old_dtype, new_dtype):
+        self.column = column
+        self.positions = positions
+        self.old_values = old_values
+        self.new_values = new_values
+        self.old_dtype = old_dtype
+        self.new_dtype = new_dtype
+
+    @classmethod
+    def between(cls, column, old, new):
+        """Zmiana z serii old na new (ten sam indeks) albo None, gdy nic się nie zmieniło."""
+        new = new if isinstance(new, pd.Series) else pd.Series(new, index=old.index)
+        positions = _changed_positions(old, new)
+        if len(positions) == 0 and old.dtype == new.dtype:
+            return None
+        return cls(column, positions, old.iloc[positions].to_numpy(), new.iloc[positions].to_numpy(), old.dtype, new.dtype)
+
+    @property
+    def nbytes(self):
+        size = self.positions.nbytes
+        for values in (self.old_values, self.new_values):
+            size += values.nbytes
+            if values.dtype == object:
+                size += sum(len(v) for v in values if isinstance(v, str))
+        return size
+
+    def _set_values(self, df, values):
+        if len(self.positions):
+            df.iloc[self.positions, df.columns.get_loc(self.column)] = values
+
+    def _cast(self, df, dtype):
+        # Przejście po całej kolumnie tylko wtedy, gdy krok zmienił typ (np. dodał kategorie)
+        if df[self.column].dtype != dtype:
+            df[self.column] = df[self.column].astype(dtype)
+
+    def undo(self, df):
+        self._set_values(df, self.old_values)
+        self._cast(df, self.old_dtype)
+
+    def redo(self, df):
+        self._cast(df, self.new_dtype)
+        self._set_values(df, self.new_values)
+
+
+class CellChanges:
+    """Krok historii: uzupełnienie jednej lub kilku kolumn."""
+
+    def __init__(self, changes, label=""):
+        self.changes = [c for c in changes if c is not None]
+        self.label = label
+
+    @property
+    def columns(self):
+        return [c.column for c in self.changes]
+
+    @property
+    def nbytes(self):
+        return sum(c.nbytes for c in self.changes)
+
+    def undo(self, df):
+        for change in reversed(self.changes):
+            change.undo(df)
+        return df
+
+    def redo(self, df):
+        for change in self.changes:
+            change.redo(df)
+        return df
+
+
+class RowRemoval:
+    """Krok historii: usunięcie wierszy. Przechowuje maskę zachowanych wierszy i usunięte wiersze."""
+
+    columns = None  # dotyczy wszystkich kolumn
+
+    def __init__(self, keep_mask, removed, label=""):
+        self.keep_mask = np.asarray(keep_mask, dtype=bool)
+        self.removed = removed
+        self.label = label
+
+    @classmethod
+    def between(cls, old_df, keep_mask, label=""):
+        return cls(keep_mask, old_df[~np.asarray(keep_mask, dtype=bool)], label)
+
+    @property
+    def nbytes(self):
+        return self.keep_mask.nbytes + int(self.removed.memory_usage(index=True, deep=True).sum())
+
+    def undo(self, df):
+        """Wstawia usunięte wiersze z powrotem na ich pierwotne pozycje."""
+        order = np.concatenate((np.flatnonzero(self.keep_mask), np.flatnonzero(~self.keep_mask)))
+        restored = pd.concat([df, self.removed])
+        return restored.take(np.argsort(order, kind="stable"))
+
+    def redo(self, df):
+        return df[self.keep_mask]
+
+
+class History:
+    """Stosy kroków do cofnięcia i ponowienia, razem nie większe niż max_mb."""
+
+    def __init__(self, max_mb=256):
+        self.max_mb = max_mb
+        self.undo_steps = []
+        self.redo_steps = []
+
+    @property
+    def nbytes(self):
+        return sum(step.nbytes for step in self.undo_steps + self.redo_steps)
+
+    def record(self, step):
+        """Dodaje krok (czyści stos ponowień). Zwraca False, gdy krok sam przekracza limit i nie został zapisany."""
+        if isinstance(step, CellChanges) and not step.changes:
+            return True
+        self.redo_steps.clear()
+        if step.nbytes > self.max_mb * 1024 ** 2:
+            # Zmiana za duża do zapamiętania - starsze kroki nie pasowałyby już do danych
+            self.undo_steps.clear()
+            return False
+        self.undo_steps.append(step)
+        self._evict()
+        return True
+
+    def _evict(self):
+        limit = self.max_mb * 1024 ** 2
+        total = self.nbytes
+        while total > limit and len(self.undo_steps) > 1:
+            total -= self.undo_steps.pop(0).nbytes
+
+    def can_undo(self):
+        return bool(self.undo_steps)
+
+    def can_redo(self):
+        return bool(self.redo_steps)
+
+    def undo(self, df):
+        """Cofa ostatni krok. Zwraca (ramka danych, krok) albo (df, None), gdy nie ma czego cofać."""
+        if not self.undo_steps:
+            return df, None
+        step = self.undo_steps.pop()
+        df = step.undo(df)
+        self.redo_steps.append(step)
+        return df, step
+
+    def redo(self, df):
+        """Ponawia ostatnio cofnięty krok. Zwraca (ramka danych, krok) albo (df, None)."""
+        if not self.redo_steps:
+            return df, None
+        step = self.redo_steps.pop()
+        df = step.redo(df)
+        self.undo_steps.append(step)
+        return df, step
+
+    def clear(self):
+        self.undo_steps.clear()
+        self.redo_steps.clear()
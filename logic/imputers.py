@@ -0,0 +1,469 @@
+"""
+Imputery z osobnym uczeniem (fit) i uzupełnianiem (transform) dla metod z logic.methods.
+
+fit zapamiętuje to, czego metoda uczy się z danych (statystyki, tabele grup, kodowanie kategorii,
+modele), a transform uzupełnia nową ramkę danych samymi wyszukaniami lub predykcjami.
+Plan dopasowany na zbiorze referencyjnym zapisywany jest na dysk (joblib) i stosowany
+do kolejnych plików bez ponownego uczenia. Wywołane na tej samej ramce fit i transform dają
+ten sam wynik co odpowiadająca im funkcja fillna_*.
+"""
+import functools
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.experimental import enable_iterative_imputer  # noqa
+from sklearn.impute import IterativeImputer
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.neighbors import KNeighborsClassifier
+
+from logic.encoding import CategoricalEncoding
+from logic.exporter import save_dataframe
+from logic.file_loader import load_file
+from logic.methods import (
+    _allow_values,
+    _detect_decimal_places,
+    _group_codes,
+    _group_mode,
+    column_mode,
+    fillna_unknown,
+    fillna_value,
+    fit_knn_numeric,
+    fit_regression_patterns,
+    predict_knn_numeric,
+    predict_regression_patterns,
+)
+
+FORMAT_VERSION = 1
+
+
+def _group_keys(df, group_cols):
+    """Indeks (lub MultiIndex) z wartości kolumn grupujących wierszy ramki."""
+    if len(group_cols) == 1:
+        return pd.Index(df[group_cols[0]])
+    return pd.MultiIndex.from_frame(df[group_cols])
+
+
+class Imputer:
+    """Krok planu: fit(df) uczy się na ramce referencyjnej, transform(df) zwraca uzupełnioną kolumnę."""
+
+    method = None
+
+    def __init__(self, column):
+        self.column = column
+        self.fitted = False
+
+    def fit(self, df):
+        if self.column not in df.columns:
+            raise KeyError(f"Brak kolumny '{self.column}' w danych.")
+        self._fit(df)
+        self.fitted = True
+        return self
+
+    def transform(self, df):
+        if not self.fitted:
+            raise RuntimeError(f"Imputer '{self.method}' dla kolumny '{self.column}' nie został dopasowany (fit).")
+        if self.column not in df.columns:
+            raise KeyError(f"Brak kolumny '{self.column}' w danych.")
+        return self._transform(df)
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    def apply(self, df):
+        """Uzupełnia kolumnę w ramce danych i zwraca ramkę (jak logic.batch.apply_step)."""
+        df[self.column] = self.transform(df)
+        return df
+
+    def _fit(self, df):
+        pass
+
+    def _transform(self, df):
+        return df[self.column]
+
+
+class _NumericImputer(Imputer):
+    """Wspólna część metod numerycznych: liczba miejsc po przecinku z danych referencyjnych."""
+
+    def _fit(self, df):
+        series = df[self.column]
+        self.numeric = pd.api.types.is_numeric_dtype(series)
+        self.decimals = _detect_decimal_places(series) if self.numeric else None
+
+
+class MeanImputer(_NumericImputer):
+    method = "mean"
+
+    def _fit(self, df):
+        super()._fit(df)
+        self.value = round(df[self.column].mean(), self.decimals) if self.numeric else None
+
+    def _transform(self, df):
+        if not self.numeric:
+            return df[self.column]
+        return fillna_value(df[self.column], self.value, self.decimals)
+
+
+class MedianImputer(MeanImputer):
+    method = "median"
+
+    def _fit(self, df):
+        _NumericImputer._fit(self, df)
+        self.value = round(df[self.column].median(), self.decimals) if self.numeric else None
+
+
+class ValueImputer(_NumericImputer):
+    method = "value"
+
+    def __init__(self, column, value=0):
+        super().__init__(column)
+        self.value = value
+
+    def _transform(self, df):
+        return fillna_value(df[self.column], self.value, self.decimals)
+
+
+class UnknownImputer(Imputer):
+    method = "unknown"
+
+    def _transform(self, df):
+        return fillna_unknown(df[self.column])
+
+
+class ModeImputer(Imputer):
+    method = "mode"
+
+    def _fit(self, df):
+        self.value = column_mode(df[self.column])
+
+    def _transform(self, df):
+        if self.value is None:
+            return df[self.column]
+        return _allow_values(df[self.column], [self.value]).fillna(self.value)
+
+
+class _GroupImputer(Imputer):
+    """Tabela wartości według kluczy grup (wartości kolumn grupujących) i wartość dla pozostałych wierszy."""
+
+    def __init__(self, column, group_cols):
+        super().__init__(column)
+        self.group_cols = [group_cols] if isinstance(group_cols, str) else list(group_cols)
+
+    def _usable_groups(self, df):
+        return [c for c in self.group_cols if c in df.columns and c != self.column]
+
+    def _table(self, df, values_by_code):
+        """Zamienia serię indeksowaną numerem grupy na serię indeksowaną kluczem grupy."""
+        keys = df.groupby(self.used_cols, sort=False, observed=True).size().index
+        return pd.Series(values_by_code.to_numpy(), index=keys[values_by_code.index.to_numpy()])
+
+    def _lookup(self, df, mask):
+        keys = _group_keys(df.loc[mask], self.used_cols)
+        return self.table.reindex(keys).to_numpy()
+
+
+class GroupMeanImputer(_GroupImputer, _NumericImputer):
+    method = "group_mean"
+
+    def _fit(self, df):
+        _NumericImputer._fit(self, df)
+        self.used_cols = self._usable_groups(df)
+        self.table = None
+        target = df[self.column]
+        if not self.numeric or not self.used_cols or target.notna().sum() == 0:
+            return
+        codes = _group_codes(df, self.used_cols)
+        in_group = codes >= 0
+        grouped = target[in_group].groupby(codes[in_group]).mean().round(self.decimals)
+        self.table = self._table(df, grouped)
+        self.overall = round(target.mean(), self.decimals)
+
+    def _transform(self, df):
+        if self.table is None:
+            return df[self.column]
+        filled = df[self.column].copy()
+        mask = filled.isna().to_numpy() & df[self.used_cols].notna().all(axis=1).to_numpy()
+        if mask.any():
+            filled.loc[mask] = self._lookup(df, mask)
+        return filled.fillna(self.overall).round(self.decimals)
+
+
+class GroupModeImputer(_GroupImputer):
+    method = "group_mode"
+
+    def _fit(self, df):
+        self.used_cols = self._usable_groups(df)
+        self.table = None
+        target = df[self.column]
+        if not self.used_cols or target.notna().sum() == 0:
+            return
+        codes = _group_codes(df, self.used_cols)
+        base_mask = (codes >= 0) & target.notna().to_numpy()
+        self.table = self._table(df, _group_mode(codes[base_mask], target[base_mask]))
+        self.global_mode = column_mode(target)
+
+    def _transform(self, df):
+        if self.table is None:
+            return df[self.column]
+        filled = df[self.column].copy()
+        mask = filled.isna().to_numpy() & df[self.used_cols].notna().all(axis=1).to_numpy()
+        if mask.any():
+            values = self._lookup(df, mask)
+            filled = _allow_values(filled, values)
+            filled.loc[mask] = values
+        if self.global_mode is not None:
+            filled = _allow_values(filled, [self.global_mode]).fillna(self.global_mode)
+        return filled
+
+
+class RegressionImputer(_NumericImputer):
+    """Regresja liniowa na pozostałych kolumnach liczbowych (wiersze z kompletem predyktorów)."""
+
+    method = "regression"
+
+    def _fit(self, df):
+        super()._fit(df)
+        self.predictors = list(df.select_dtypes(include=[np.number]).columns.drop(self.column, errors='ignore'))
+        self.model = None
+        if not self.numeric or not self.predictors:
+            return
+        train = df[self.column].notnull() & df[self.predictors].notnull().all(axis=1)
+        if train.any():
+            self.model = LinearRegression().fit(df.loc[train, self.predictors], df.loc[train, self.column])
+
+    def _transform(self, df):
+        if self.model is None:
+            return df[self.column]
+        nulls = df[self.column].isnull() & df[self.predictors].notnull().all(axis=1)
+        filled = df[self.column].copy()
+        if nulls.any():
+            filled.loc[nulls] = np.round(self.model.predict(df.loc[nulls, self.predictors]), self.decimals)
+        return filled
+
+
+class RegressionPatternsImputer(_NumericImputer):
+    """Regresja na kolumnach obserwowanych w wierszu - model wspólny dla wszystkich wzorców braków."""
+
+    method = "regression_patterns"
+
+    def _fit(self, df):
+        super()._fit(df)
+        self.model = fit_regression_patterns(df) if self.numeric else None
+
+    def _transform(self, df):
+        if self.model is None or self.column not in self.model["columns"]:
+            return df[self.column]
+        filled = predict_regression_patterns(self.model, df, [self.column], {self.column: self.decimals})
+        return filled[self.column]
+
+
+class MiceImputer(_NumericImputer):
+    """MICE (IterativeImputer) dopasowany na kolumnach liczbowych danych referencyjnych."""
+
+    method = "mice"
+
+    def _fit(self, df):
+        super()._fit(df)
+        self.columns = list(df.select_dtypes(include=[np.number]).columns)
+        self.model = None
+        if self.numeric and len(self.columns) >= 2:
+            self.model = IterativeImputer(max_iter=10, random_state=0).fit(df[self.columns])
+
+    def _transform(self, df):
+        if self.model is None:
+            return df[self.column]
+        filled = df[self.column].copy()
+        mask = filled.isnull().to_numpy()
+        if mask.any():
+            imputed = self.model.transform(df.loc[mask, self.columns])
+            filled.loc[mask] = np.round(imputed[:, self.columns.index(self.column)], self.decimals)
+        return filled
+
+
+class KnnImputer(_NumericImputer):
+    """KNN dla kolumny liczbowej: indeks sąsiadów zbudowany na danych referencyjnych."""
+
+    method = "knn"
+
+    def __init__(self, column, n_neighbors=5, max_memory_mb=256):
+        super().__init__(column)
+        self.n_neighbors = n_neighbors
+        self.max_memory_mb = max_memory_mb
+
+    def _fit(self, df):
+        super()._fit(df)
+        self.features = list(df.select_dtypes(include=[np.number]).columns.drop(self.column, errors='ignore'))
+        self.model = None
+        if self.numeric and self.features:
+            self.model = fit_knn_numeric(
+                df[self.features].to_numpy(dtype=float), df[self.column].to_numpy(dtype=float), self.n_neighbors
+            )
+
+    def _transform(self, df):
+        if self.model is None:
+            return df[self.column]
+        features = df[self.features].to_numpy(dtype=float)
+        positions = np.flatnonzero(~np.isnan(features).any(axis=1) & df[self.column].isna().to_numpy())
+        filled = df[self.column].copy()
+        if len(positions):
+            predicted = predict_knn_numeric(self.model, features[positions], self.max_memory_mb)
+            filled.iloc[positions] = np.round(predicted, self.decimals)
+        return filled
+
+
+class _ClassifierImputer(Imputer):
+    """
+    Klasyfikator (klasa classifier, parametry z konstruktora) na zakodowanych kolumnach kategorycznych;
+    kodowanie zapamiętane z danych referencyjnych.
+    """
+
+    classifier = None
+
+    def __init__(self, column, **classifier_params):
+        super().__init__(column)
+        self.classifier_params = classifier_params
+
+    def _fit(self, df):
+        encoding = CategoricalEncoding()
+        matrix, columns = encoding.get(df)
+        self.model = None
+        if self.column not in columns or len(columns) < 2:
+            return
+        j = columns.index(self.column)
+        self.features = [k for k in range(len(columns)) if k != j]
+        y = matrix[:, j]
+        train = ~np.isnan(y) & ~np.isnan(matrix[:, self.features]).any(axis=1)
+        if not train.any():
+            return
+        self.model = self.classifier(**self.classifier_params).fit(matrix[np.ix_(train, self.features)], y[train])
+        encoding.matrix = None  # do zapisu potrzebne są tylko kategorie, nie zakodowane dane
+        self.encoding = encoding
+
+    def _transform(self, df):
+        if self.model is None:
+            return df[self.column]
+        matrix = self.encoding.transform(df)
+        positions = np.flatnonzero(df[self.column].isna().to_numpy() & ~np.isnan(matrix[:, self.features]).any(axis=1))
+        if len(positions) == 0:
+            return df[self.column]
+        predicted = self.encoding.decode(self.column, self.model.predict(matrix[np.ix_(positions, self.features)]).astype(int))
+        filled = _allow_values(df[self.column].copy(), predicted)
+        filled.iloc[positions] = predicted
+        return filled
+
+
+class KnnCategoricalImputer(_ClassifierImputer):
+    method = "knn_cat"
+    classifier = KNeighborsClassifier
+
+    def __init__(self, column, n_neighbors=5):
+        super().__init__(column, n_neighbors=n_neighbors)
+        self.n_neighbors = n_neighbors
+
+
+class LogRegCategoricalImputer(_ClassifierImputer):
+    method = "logreg_cat"
+    classifier = LogisticRegression
+
+    def __init__(self, column):
+        super().__init__(column, max_iter=200)
+
+
+class RemoveRowsImputer(Imputer):
+    """Usunięcie wierszy z brakami w kolumnie - nie uczy się niczego."""
+
+    method = "remove_rows"
+
+    def apply(self, df):
+        if not self.fitted:
+            raise RuntimeError(f"Imputer '{self.method}' dla kolumny '{self.column}' nie został dopasowany (fit).")
+        if self.column not in df.columns:
+            raise KeyError(f"Brak kolumny '{self.column}' w danych.")
+        return df.dropna(subset=[self.column])
+
+
+# Metoda planu -> klasa imputera (nazwy jak w logic.batch.METHODS)
+IMPUTERS = {
+    cls.method: cls
+    for cls in (
+        MeanImputer, MedianImputer, ValueImputer, UnknownImputer, ModeImputer, GroupMeanImputer, GroupModeImputer,
+        RegressionImputer, RegressionPatternsImputer, MiceImputer, KnnImputer, KnnCategoricalImputer,
+        LogRegCategoricalImputer, RemoveRowsImputer,
+    )
+}
+
+
+def make_imputer(column, method, params=None):
+    if method not in IMPUTERS:
+        raise ValueError(f"Nieznana metoda '{method}' dla kolumny '{column}'.")
+    return IMPUTERS[method](column, **(params or {}))
+
+
+def fit_plan(df, steps):
+    """
+    Dopasowuje imputery dla kroków planu (logic.batch.normalize_plan) na ramce referencyjnej.
+    Kroki uczą się po kolei na danych uzupełnionych przez wcześniejsze kroki, jak przy apply_plan.
+    Zwraca listę imputerów.
+    """
+    df = df.copy()
+    imputers = []
+    for column, method, params in steps:
+        imputer = make_imputer(column, method, params).fit(df)
+        df = imputer.apply(df)
+        imputers.append(imputer)
+    return imputers
+
+
+def transform_plan(df, imputers):
+    """Stosuje dopasowane imputery po kolei i zwraca uzupełnioną ramkę danych."""
+    for imputer in imputers:
+        df = imputer.apply(df)
+    return df
+
+
+def save_imputers(imputers, path, compress=3):
+    """Zapisuje dopasowane imputery (joblib) razem z wersją formatu."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    joblib.dump({"version": FORMAT_VERSION, "imputers": imputers}, path, compress=compress)
+
+
+def load_imputers(path):
+    data = joblib.load(path)
+    if not isinstance(data, dict) or data.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Plik '{path}' nie zawiera imputerów w obsługiwanym formacie.")
+    return data["imputers"]
+
+
+@functools.lru_cache(maxsize=4)
+def _cached_imputers(path, mtime_ns):
+    return load_imputers(path)
+
+
+def apply_file(model_path, input_path, output_path, compression=None):
+    """
+    Wczytuje plik, uzupełnia go zapisanymi imputerami i zapisuje wynik. Przeznaczone do puli procesów
+    (imputery wczytywane raz na proces), dlatego błędy są zwracane w podsumowaniu jak w process_file.
+    """
+    start = time.perf_counter()
+    summary = {"input": str(input_path), "output": str(output_path)}
+    try:
+        imputers = _cached_imputers(os.path.abspath(model_path), os.stat(model_path).st_mtime_ns)
+        df = load_file(str(input_path))
+        missing_before = int(df.isna().sum().sum())
+        rows_before = len(df)
+        df = transform_plan(df, imputers)
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        save_dataframe(df, str(output_path), compression)
+        summary.update(
+            rows=rows_before,
+            rows_removed=rows_before - len(df),
+            missing_before=missing_before,
+            missing_after=int(df.isna().sum().sum()),
+            error=None,
+        )
+    except Exception as e:
+        summary["error"] = f"{type(e).__name__}: {e}"
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    return summary
@@ -0,0 +1,230 @@
+"""
+Test MCAR Little'a (Little, 1988), bez zewnętrznych pakietów poza scipy.
+
+Kolumny tekstowe i kategoryczne o niewielkiej liczbie wartości są kodowane zmiennymi wskaźnikowymi
+(jak pd.get_dummies w dawnym skrypcie), przy czym brak w kolumnie daje brak we wszystkich jej wskaźnikach -
+braki w kategoriach też są więc testowane. Kolumny stałe, puste i tekstowe o zbyt wielu wartościach są pomijane
+i zwracane w wyniku.
+
+Wiersze są grupowane według wzorca braków. Dla każdego wzorca raz liczone są statystyki
+dostateczne (suma wartości i suma iloczynów), więc iteracje EM nie przechodzą już po wierszach.
+Średnia i kowariancja są szacowane algorytmem EM jeden raz, a statystyka d² jest liczona
+dla wszystkich wzorców o tej samej liczbie obserwowanych kolumn jednym wsadowym solve.
+"""
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2
+
+from logic.perf import instrumented
+
+
+# Kolumny tekstowe o większej liczbie różnych wartości (np. identyfikatory) są pomijane
+MAX_CATEGORIES = 20
+
+
+def _encode(series, max_categories):
+    """Kolumna jako ramka wartości float (liczbowa) lub wskaźników kategorii; None, gdy kolumna jest pomijana."""
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        block = series.astype(float).to_frame()
+    else:
+        if not 2 <= series.nunique(dropna=True) <= max_categories:
+            return None
+        block = pd.get_dummies(series.astype(str).where(series.notna()), prefix=str(series.name), drop_first=True, dtype=float)
+        block[series.isna().to_numpy()] = np.nan
+    std = block.std()
+    block = block.loc[:, std.notna() & (std > 0)]
+    return block if block.shape[1] else None
+
+
+def _prepare(df, columns=None, max_categories=MAX_CATEGORIES):
+    """
+    Kolumny (bez stałych i pustych) ustandaryzowane - test nie zależy od skali kolumn.
+    Zwraca (macierz, użyte kolumny, pominięte kolumny).
+    """
+    data = df[columns] if columns is not None else df
+    blocks, used, excluded = [], [], []
+    for col in data.columns:
+        block = _encode(data[col], max_categories)
+        if block is None:
+            excluded.append(col)
+        else:
+            blocks.append(block)
+            used.append(col)
+    if not blocks:
+        return np.empty((len(data), 0)), used, excluded
+    values = pd.concat(blocks, axis=1).to_numpy()
+    values = (values - np.nanmean(values, axis=0)) / np.nanstd(values, axis=0, ddof=1)
+    return values, used, excluded
+
+
+def _patterns(values):
+    """Grupuje wiersze według wzorca braków. Zwraca (wzorce obserwowane, numer wzorca wiersza, liczności)."""
+    observed = ~np.isnan(values)
+    # Wzorzec jako liczba (bity kolumn) - np.unique na jednym wymiarze zamiast porównywania całych wierszy
+    packed = np.packbits(observed, axis=1)
+    if packed.shape[1] <= 8:
+        keys = np.zeros(len(packed), dtype=np.uint64)
+        for byte in range(packed.shape[1]):
+            keys = (keys << np.uint64(8)) | packed[:, byte].astype(np.uint64)
+    else:
+        keys = np.ascontiguousarray(packed).view(np.dtype((np.void, packed.shape[1]))).ravel()
+    _, first, inverse, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+    return observed[first], inverse.ravel(), counts
+
+def _sufficient_stats(values, inverse, n_patterns):
+    """Dla każdego wzorca: suma wierszy i suma iloczynów zewnętrznych (braki jako 0)."""
+    filled = np.nan_to_num(values)
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.searchsorted(inverse[order], np.arange(n_patterns + 1))
+    p = values.shape[1]
+    sums = np.zeros((n_patterns, p))
+    products = np.zeros((n_patterns, p, p))
+    for j in range(n_patterns):
+        block = filled[order[bounds[j]:bounds[j + 1]]]
+        sums[j] = block.sum(axis=0)
+        products[j] = block.T @ block
+    return sums, products
+
+
+def _solve(a, b):
+    """Wsadowe rozwiązanie a x = b; dla macierzy osobliwych (kolumny współliniowe) pseudoodwrotność."""
+    try:
+        return np.linalg.solve(a, b)
+    except np.linalg.LinAlgError:
+        return np.linalg.pinv(a) @ b
+
+
+def _groups(patterns):
+    """Wzorce pogrupowane według liczby obserwowanych kolumn: (numery wzorców, indeksy obs., indeksy brak.)."""
+    n_observed = patterns.sum(axis=1)
+    groups = []
+    for k in np.unique(n_observed):
+        if k == 0:
+            continue  # wiersze bez żadnej wartości nie wnoszą informacji
+        ids = np.flatnonzero(n_observed == k)
+        obs = np.nonzero(patterns[ids])[1].reshape(len(ids), k)
+        mis = np.nonzero(~patterns[ids])[1].reshape(len(ids), patterns.shape[1] - k)
+        groups.append((ids, obs, mis))
+    return groups
+
+
+def em_estimate(values, max_iter=500, tol=1e-6):
+    """
+    Estymator największej wiarygodności średniej i kowariancji (EM) dla danych z brakami.
+    Zwraca (średnia, kowariancja, liczba iteracji).
+    """
+    patterns, inverse, counts = _patterns(values)
+    sums, products = _sufficient_stats(values, inverse, len(patterns))
+    return _em(values, patterns, counts, sums, products, max_iter, tol)
+
+
+def _em(values, patterns, counts, sums, products, max_iter, tol):
+    groups = _groups(patterns)
+    n = counts[patterns.any(axis=1)].sum()
+    p = values.shape[1]
+    mu = np.nanmean(values, axis=0)
+    sigma = np.diag(np.nanvar(values, axis=0))
+    for iteration in range(1, max_iter + 1):
+        total = np.zeros(p)
+        total_products = np.zeros((p, p))
+        for ids, obs, mis in groups:
+            c = counts[ids].astype(float)
+            a = np.take_along_axis(sums[ids], obs, axis=1)
+            q = products[ids[:, None, None], obs[:, :, None], obs[:, None, :]]
+            np.add.at(total, obs, a)
+            np.add.at(total_products, (obs[:, :, None], obs[:, None, :]), q)
+            if mis.shape[1] == 0:
+                continue
+            s_oo = sigma[obs[:, :, None], obs[:, None, :]]
+            s_mo = sigma[mis[:, :, None], obs[:, None, :]]
+            s_mm = sigma[mis[:, :, None], mis[:, None, :]]
+            # Regresja brakujących kolumn na obserwowane: B = S_mo S_oo^-1
+            b = _solve(s_oo, s_mo.transpose(0, 2, 1)).transpose(0, 2, 1)
+            cond_cov = s_mm - b @ s_mo.transpose(0, 2, 1)
+            d = mu[mis] - np.einsum("jmk,jk->jm", b, mu[obs])
+            ba = np.einsum("jmk,jk->jm", b, a)
+            sum_m = c[:, None] * d + ba
+            bq = b @ q
+            prod_mo = d[:, :, None] * a[:, None, :] + bq
+            prod_mm = (
+                c[:, None, None] * d[:, :, None] * d[:, None, :]
+                + d[:, :, None] * ba[:, None, :]
+                + ba[:, :, None] * d[:, None, :]
+                + bq @ b.transpose(0, 2, 1)
+                + c[:, None, None] * cond_cov
+            )
+            np.add.at(total, mis, sum_m)
+            np.add.at(total_products, (mis[:, :, None], obs[:, None, :]), prod_mo)
+            np.add.at(total_products, (obs[:, :, None], mis[:, None, :]), prod_mo.transpose(0, 2, 1))
+            np.add.at(total_products, (mis[:, :, None], mis[:, None, :]), prod_mm)
+        new_mu = total / n
+        new_sigma = total_products / n - np.outer(new_mu, new_mu)
+        change = max(np.abs(new_mu - mu).max(), np.abs(new_sigma - sigma).max())
+        mu, sigma = new_mu, new_sigma
+        if change < tol:
+            break
+    return mu, sigma, iteration
+
+
+@instrumented()
+def little_mcar_test(df, columns=None, estimator="em", max_iter=500, tol=1e-6):
+    """
+    Test MCAR Little'a dla wszystkich kolumn (lub podanych columns); kategorie jako zmienne wskaźnikowe.
+    estimator="em" - średnia i kowariancja z EM (jak w pracy Little'a),
+    estimator="pairwise" - średnie i kowariancje parami (jak w pyampute MCARTest).
+    Zwraca słownik: statistic, df, p_value, n_patterns, columns, excluded (pominięte kolumny), iterations.
+    """
+    values, used, excluded = _prepare(df, columns)
+    result = {
+        "statistic": float("nan"), "df": 0, "p_value": float("nan"), "n_patterns": 0,
+        "columns": used, "excluded": excluded, "iterations": 0,
+    }
+    if values.shape[1] == 0 or not np.isnan(values).any():
+        return result
+    if estimator not in ("em", "pairwise"):
+        raise ValueError(f"Nieznany estymator: {estimator}")
+    # Wzorce i statystyki dostateczne liczone raz - dla EM i dla statystyki d²
+    patterns, inverse, counts = _patterns(values)
+    sums, products = _sufficient_stats(values, inverse, len(patterns))
+    if estimator == "em":
+        mu, sigma, result["iterations"] = _em(values, patterns, counts, sums, products, max_iter, tol)
+    else:
+        frame = pd.DataFrame(values)
+        mu, sigma = frame.mean().to_numpy(), frame.cov().to_numpy()
+
+    d2 = 0.0
+    for ids, obs, _ in _groups(patterns):
+        c = counts[ids].astype(float)
+        diff = np.take_along_axis(sums[ids], obs, axis=1) / c[:, None] - mu[obs]
+        s_oo = sigma[obs[:, :, None], obs[:, None, :]]
+        d2 += float((c * np.einsum("jk,jk->j", diff, _solve(s_oo, diff[:, :, None])[:, :, 0])).sum())
+    dof = int(patterns.sum()) - values.shape[1]
+    result.update(
+        statistic=d2,
+        df=dof,
+        p_value=float(chi2.sf(d2, dof)) if dof > 0 else float("nan"),
+        n_patterns=len(patterns),
+    )
+    return result
+
+
+def describe_mcar_result(result, alpha=0.05):
+    """Opis wyniku testu po polsku (wartość p i interpretacja), do wyświetlenia w oknie."""
+    p_value = result["p_value"]
+    excluded = result.get("excluded") or []
+    skipped = (
+        f"\nPominięte kolumny (stałe, puste lub tekstowe o ponad {MAX_CATEGORIES} wartościach, ich braki nie są testowane): "
+        f"{', '.join(map(str, excluded))}"
+        if excluded else ""
+    )
+    if np.isnan(p_value):
+        return f"Test nie mógł zostać obliczony (brak braków lub kolumn do testu) - nie można ocenić MCAR.{skipped}"
+    p_text = "p < 0.0001" if p_value < 1e-4 else f"p = {p_value:.4f}"
+    if p_value < alpha:
+        interpretation = "Odrzucono hipotezę MCAR (braki nie są całkowicie losowe) - lepiej wybrać metody modelowe (regresja, MICE, KNN)."
+    else:
+        interpretation = "Brak podstaw do odrzucenia hipotezy MCAR (braki mogą być całkowicie losowe) - proste metody (średnia, mediana, moda) nie obciążą średnich."
+    return (
+        f"Test MCAR Little'a: d² = {result['statistic']:.2f}, df = {result['df']}, {p_text}\n"
+        f"Kolumny: {len(result['columns'])}, wzorce braków: {result['n_patterns']}{skipped}\n\n{interpretation}"
+    )
@@ -2,47 +2,150 @@ import pandas as pd
 import numpy as np
 from sklearn.linear_model import LinearRegression, LogisticRegression
 from sklearn.experimental import enable_iterative_imputer  # noqa
-from sklearn.impute import IterativeImputer, KNNImputer
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.preprocessing import LabelEncoder
+from sklearn.impute import IterativeImputer
+from sklearn.neighbors import KNeighborsClassifier, NearestNeighbors
+from logic.encoding import CategoricalEncoding
+from logic.perf import instrumented
+
+def _decimal_places(values):
+    """
+    Zwraca wektor liczby miejsc po przecinku dla każdej wartości (tak jak w zapisie str(float)).
+    Liczby całkowite liczą się jako 1 miejsce ("5.0"), wartości nieskończone i bardzo duże jako 0.
+    """
+    arr = np.asarray(values, dtype=float)
+    counts = np.zeros(arr.shape, dtype=np.int64)
+    finite = np.isfinite(arr) & (np.abs(arr) < 1e16)
+    x = arr[finite]
+    found = np.full(x.shape, 17, dtype=np.int64)
+    pending = np.arange(x.size)
+    # Najmniejsze d, dla którego zaokrąglenie do d miejsc nie zmienia wartości
+    for d in range(1, 18):
+        scale = 10.0 ** d
+        candidates = x[pending]
+        hit = np.rint(candidates * scale) / scale == candidates
+        found[pending[hit]] = d
+        pending = pending[~hit]
+        if pending.size == 0:
+            break
+    counts[finite] = found
+    return counts
 
 def _detect_decimal_places(series):
     """Zwraca średnią liczbę miejsc po przecinku w niepustych wartościach serii."""
-    floats = series.dropna().astype(float)
-    if floats.empty:
+    floats = series.dropna().to_numpy(dtype=float)
+    if floats.size == 0:
         return 4  # domyślnie 4, jeśli brak danych
-    decimal_counts = floats.apply(lambda x: len(str(x).split('.')[-1]) if '.' in str(x) else 0)
-    avg_decimals = int(round(decimal_counts.mean()))
+    avg_decimals = int(round(_decimal_places(floats).mean()))
     return max(0, avg_decimals)
 
-def fillna_mean(series):
+def _resolve_decimals(series, decimals):
+    """Zwraca podaną liczbę miejsc po przecinku albo wylicza ją z serii."""
+    if decimals is None:
+        return _detect_decimal_places(series)
+    return decimals
+
+class DecimalPlacesCache:
+    """Pamięć podręczna liczby miejsc po przecinku dla kolumn, ważna do czasu zmiany kolumny."""
+
+    def __init__(self):
+        self._values = {}
+
+    def get(self, df, column):
+        if column not in self._values:
+            self._values[column] = _detect_decimal_places(df[column])
+        return self._values[column]
+
+    def invalidate(self, columns=None):
+        """Usuwa wpisy dla podanych kolumn (lub wszystkie, gdy columns=None)."""
+        if columns is None:
+            self._values.clear()
+            return
+        for column in columns:
+            self._values.pop(column, None)
+
+@instrumented()
+def fillna_mean(series, decimals=None):
     """Uzupełnia braki średnią, zaokrąglając do średniej liczby miejsc po przecinku w kolumnie."""
     if pd.api.types.is_numeric_dtype(series):
-        decimals = _detect_decimal_places(series)
+        decimals = _resolve_decimals(series, decimals)
         mean_val = round(series.mean(), decimals)
         return series.fillna(mean_val).round(decimals)
     return series
 
-def fillna_median(series):
+@instrumented()
+def fillna_median(series, decimals=None):
     """Uzupełnia braki medianą, zaokrąglając do średniej liczby miejsc po przecinku w kolumnie."""
     if pd.api.types.is_numeric_dtype(series):
-        decimals = _detect_decimal_places(series)
+        decimals = _resolve_decimals(series, decimals)
         median_val = round(series.median(), decimals)
         return series.fillna(median_val).round(decimals)
     return series
 
-def fillna_value(series, value):
+@instrumented()
+def fillna_value(series, value, decimals=None):
     """Uzupełnia braki podaną wartością (zaokrągla jeśli liczba)."""
     if pd.api.types.is_numeric_dtype(series):
-        decimals = _detect_decimal_places(series)
+        decimals = _resolve_decimals(series, decimals)
         try:
             value = round(float(value), decimals)
         except Exception:
             value = 0
         return series.fillna(value).round(decimals)
-    return series.fillna(value)
+    return _allow_values(series, [value]).fillna(value)
+
+def is_text_dtype(dtype):
+    """Czy typ kolumny jest tekstowy/kategoryczny (object, string lub category)."""
+    return (
+        pd.api.types.is_object_dtype(dtype)
+        or pd.api.types.is_string_dtype(dtype)
+        or isinstance(dtype, pd.CategoricalDtype)
+    )
+
+def _allow_values(series, values):
+    """Dla kolumny typu category dodaje brakujące kategorie, żeby można było wpisać nowe wartości."""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    new_values = pd.Index(pd.unique(pd.Series(values, dtype=object).dropna()))
+    new_values = new_values.difference(series.cat.categories)
+    if len(new_values) == 0:
+        return series
+    return series.cat.add_categories(new_values)
+
+def _group_codes(df, group_cols):
+    """Zwraca numer grupy dla każdego wiersza (-1, gdy w kolumnach grupujących jest brak)."""
+    codes = df.groupby(group_cols, sort=False, observed=True).ngroup()
+    return codes.fillna(-1).to_numpy(dtype=np.int64)
+
+def _group_mode(codes, values):
+    """
+    Wyznacza modę w każdej grupie w jednym przebiegu: zlicza pary (grupa, wartość)
+    i wybiera najliczniejszą wartość. Przy remisie wygrywa najmniejsza wartość (jak w Series.mode()).
+    Zwraca serię z modą indeksowaną numerem grupy.
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    value_codes, uniques = pd.factorize(values, sort=True)
+    if len(uniques) == 0:
+        return pd.Series(dtype=object)
+    n_values = len(uniques)
+    pairs, counts = np.unique(codes * n_values + value_codes, return_counts=True)
+    groups = pairs // n_values
+    value_idx = pairs % n_values
+    # Kolejność: grupa rosnąco, liczność malejąco, wartość rosnąco
+    order = np.lexsort((value_idx, -counts, groups))
+    groups = groups[order]
+    first = np.ones(groups.size, dtype=bool)
+    first[1:] = groups[1:] != groups[:-1]
+    return pd.Series(uniques.take(value_idx[order][first]), index=groups[first])
 
-def fillna_group_mean(df, target_col, group_cols):
+def column_mode(series):
+    """Zwraca najczęstszą wartość serii (lub None, gdy seria nie ma wartości)."""
+    values = series.dropna()
+    if values.empty:
+        return None
+    return _group_mode(np.zeros(len(values), dtype=np.int64), values).iloc[0]
+
+@instrumented()
+def fillna_group_mean(df, target_col, group_cols, decimals=None):
     """Uzupełnia braki w kolumnie numerycznej średnią wyliczoną w grupach wskazanych kolumn (jednej lub wielu)."""
     # Normalizuj listę kolumn grupujących
     if isinstance(group_cols, str):
@@ -52,29 +155,25 @@ def fillna_group_mean(df, target_col, group_cols):
         return df[target_col]
     if not pd.api.types.is_numeric_dtype(df[target_col]):
         return df[target_col]
-    decimals = _detect_decimal_places(df[target_col])
-    base = df[df[target_col].notna()]
-    if base.empty:
-        return df[target_col]
-    grouped = base.groupby(group_cols)[target_col].mean().round(decimals)
-    filled = df[target_col].copy()
-    mask = filled.isna()
-
-    # Buduj klucze zgodnie z liczbą kolumn grupujących
-    if len(group_cols) == 1:
-        key_series = df[group_cols[0]]
-        filled.loc[mask] = key_series[mask].map(grouped)
-    else:
-        key_series = df[group_cols].apply(lambda row: tuple(row.values), axis=1)
-        key_map = grouped
-        filled.loc[mask] = key_series[mask].map(key_map)
+    decimals = _resolve_decimals(df[target_col], decimals)
+    target = df[target_col]
+    if target.notna().sum() == 0:
+        return target
+    # Numery grup zamiast krotek budowanych wiersz po wierszu
+    codes = _group_codes(df, group_cols)
+    in_group = codes >= 0
+    grouped = target[in_group].groupby(codes[in_group]).mean().round(decimals)
+    filled = target.copy()
+    mask = filled.isna().to_numpy() & in_group
+    filled.loc[mask] = grouped.reindex(codes[mask]).to_numpy()
 
     if filled.isna().any():
         overall = round(df[target_col].mean(), decimals)
         filled = filled.fillna(overall)
     return filled.round(decimals)
 
-def fillna_regression(df, target_col):
+@instrumented()
+def fillna_regression(df, target_col, decimals=None):
     """
     Uzupełnia braki w kolumnie target_col na podstawie regresji liniowej z pozostałych kolumn numerycznych.
     """
@@ -93,116 +192,313 @@ def fillna_regression(df, target_col):
     model = LinearRegression()
     model.fit(X_train, y_train)
     y_pred = model.predict(X_pred)
-    decimals = _detect_decimal_places(df[target_col])
+    decimals = _resolve_decimals(df[target_col], decimals)
     filled = df[target_col].copy()
     filled.loc[nulls] = np.round(y_pred, decimals)
     return filled
 
-def fillna_mice(df, target_col):
+def _missing_patterns(missing):
+    """Unikalne wzorce braków (wiersze maski) i numer wzorca każdego wiersza."""
+    packed = np.packbits(missing, axis=1)
+    keys = np.ascontiguousarray(packed).view(np.dtype((np.void, packed.shape[1]))).ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    return missing[first], inverse.ravel()
+
+def _regression_moments(values):
+    """
+    Średnie i kowariancje kolumn do modeli regresji: z kompletnych wierszy (jak w fillna_regression),
+    a gdy jest ich mniej niż kolumn - z par wierszy, w których obie kolumny są obserwowane.
+    """
+    missing = np.isnan(values)
+    complete = ~missing.any(axis=1)
+    if complete.sum() > values.shape[1]:
+        data = values[complete]
+        mean = data.mean(axis=0)
+        centered = data - mean
+        return mean, centered.T @ centered / len(data)
+    observed = (~missing).astype(float)
+    mean = np.nanmean(values, axis=0)
+    centered = np.where(missing, 0.0, values - mean)
+    counts = observed.T @ observed
+    sums = centered.T @ observed
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = (centered.T @ centered - sums * sums.T / counts) / counts
+    return mean, np.nan_to_num(cov)
+
+def _precision_matrix(cov, eps=1e-10):
+    """Odwrotność kowariancji z rozkładu własnego; bardzo małe wartości własne (kolumny współliniowe) są podnoszone."""
+    eigvals, eigvecs = np.linalg.eigh(cov)
+    eigvals = np.maximum(eigvals, eps * max(eigvals.max(), 1.0))
+    return (eigvecs / eigvals) @ eigvecs.T
+
+def fit_regression_patterns(df):
+    """
+    Model regresji dla wszystkich wzorców braków: kolumny liczbowe, ich standaryzacja, średnie
+    i odwrotność kowariancji (słownik). None, gdy są mniej niż dwie kolumny liczbowe z wartościami.
+    """
+    num_cols = [c for c in df.select_dtypes(include=[np.number]).columns if df[c].notna().any()]
+    if len(num_cols) < 2:
+        return None
+    values = df[num_cols].to_numpy(dtype=float)
+    # Standaryzacja nie zmienia predykcji, a poprawia uwarunkowanie kowariancji
+    center = np.nanmean(values, axis=0)
+    scale = np.nanstd(values, axis=0)
+    scale[scale == 0] = 1.0
+    mean, cov = _regression_moments((values - center) / scale)
+    return {"columns": num_cols, "center": center, "scale": scale, "mean": mean, "precision": _precision_matrix(cov)}
+
+def predict_regression_patterns(model, df, target_cols, decimals=None, max_memory_mb=256):
+    """
+    Uzupełnia braki w kolumnach target_cols ramki df modelem z fit_regression_patterns.
+    decimals to opcjonalny słownik: kolumna -> liczba miejsc po przecinku.
+    Zwraca ramkę z kolumnami target_cols (kolumny spoza modelu są pomijane).
+    """
+    num_cols = model["columns"]
+    target_cols = [c for c in target_cols if c in num_cols]
+    result = df[target_cols].copy()
+    if not target_cols:
+        return result
+    center, scale, mean, precision = model["center"], model["scale"], model["mean"], model["precision"]
+    values = (df[num_cols].to_numpy(dtype=float) - center) / scale
+
+    n_cols = len(num_cols)
+    target_idx = np.array([num_cols.index(c) for c in target_cols])
+    target_pos = np.full(n_cols, -1)
+    target_pos[target_idx] = np.arange(len(target_idx))
+    missing = np.isnan(values)
+    rows = np.flatnonzero(missing[:, target_idx].any(axis=1))
+    predicted = np.full((len(df), len(target_idx)), np.nan)
+    if len(rows):
+        patterns, inverse = _missing_patterns(missing[rows])
+        n_missing = patterns.sum(axis=1)
+        # Wiersze posortowane według liczby braków i wzorca - każdy wzorzec to ciągły blok
+        order = np.lexsort((inverse, n_missing[inverse]))
+        rows, inverse = rows[order], inverse[order]
+        budget = max(1, int(max_memory_mb * 1024 ** 2 / 8))
+        for k in np.unique(n_missing):
+            in_group = n_missing[inverse] == k
+            group_rows, group_patterns = rows[in_group], inverse[in_group]
+            ids = np.unique(group_patterns)
+            mis = np.nonzero(patterns[ids])[1].reshape(len(ids), k)
+            # Model wzorca: E[x_M | x_O] = mu_M - (P_MM)^-1 P_MO (x_O - mu_O), P - odwrotność kowariancji.
+            # (P_MM)^-1 liczone raz na wzorzec, wsadowo dla wszystkich wzorców o k brakach.
+            solved = np.linalg.inv(precision[mis[:, :, None], mis[:, None, :]])
+            local = np.searchsorted(ids, group_patterns)
+            chunk_rows = max(1, budget // (k * k + 2 * n_cols))
+            for start in range(0, len(group_rows), chunk_rows):
+                chunk = group_rows[start:start + chunk_rows]
+                pattern = local[start:start + chunk_rows]
+                centered = np.where(missing[chunk], 0.0, values[chunk] - mean)
+                rhs = np.take_along_axis(centered @ precision, mis[pattern], axis=1)
+                estimate = mean[mis[pattern]] - np.einsum("rij,rj->ri", solved[pattern], rhs)
+                pos = target_pos[mis[pattern]]
+                keep = pos >= 0
+                predicted[np.broadcast_to(chunk[:, None], pos.shape)[keep], pos[keep]] = estimate[keep]
+
+    decimals = decimals or {}
+    for j, col in enumerate(target_cols):
+        mask = df[col].isnull().to_numpy()
+        col_decimals = _resolve_decimals(df[col], decimals.get(col))
+        values_j = predicted[mask, j] * scale[target_idx[j]] + center[target_idx[j]]
+        result.loc[mask, col] = np.round(values_j, col_decimals)
+    return result
+
+@instrumented()
+def fillna_regression_columns(df, target_cols=None, decimals=None, max_memory_mb=256):
+    """
+    Uzupełnia braki w wielu kolumnach numerycznych naraz regresją liniową na kolumnach obserwowanych
+    w danym wierszu - także w wierszach, w których brakuje kilku wartości.
+    Kowariancja kolumn liczona jest i odwracana raz dla wszystkich kolumn docelowych; model dla wzorca
+    braków wymaga już tylko odwrócenia bloku o rozmiarze liczby brakujących kolumn, raz na wzorzec.
+    target_cols domyślnie obejmuje wszystkie kolumny numeryczne z brakami.
+    decimals to opcjonalny słownik: kolumna -> liczba miejsc po przecinku.
+    Zwraca ramkę z kolumnami target_cols (nienumeryczne są pomijane).
+    """
+    num_cols = [c for c in df.select_dtypes(include=[np.number]).columns if df[c].notna().any()]
+    if target_cols is None:
+        target_cols = [c for c in num_cols if df[c].isna().any()]
+    target_cols = [c for c in target_cols if c in num_cols]
+    model = fit_regression_patterns(df) if target_cols else None
+    if model is None:
+        return df[target_cols].copy()
+    return predict_regression_patterns(model, df, target_cols, decimals, max_memory_mb)
+
+@instrumented()
+def fillna_mice(df, target_col, decimals=None):
     """
     Uzupełnia braki w kolumnie target_col za pomocą MICE (IterativeImputer).
     """
     if target_col not in df.columns:
         return df[target_col]
-    num_cols = df.select_dtypes(include=[np.number]).columns
-    if len(num_cols) < 2:
+    decimals = None if decimals is None else {target_col: decimals}
+    filled = fillna_mice_columns(df, [target_col], decimals)
+    if target_col not in filled.columns:
         return df[target_col]
+    return filled[target_col]
+
+@instrumented()
+def fillna_mice_columns(df, target_cols, decimals=None):
+    """
+    Uzupełnia braki w wielu kolumnach numerycznych jednym dopasowaniem MICE (IterativeImputer).
+    decimals to opcjonalny słownik: kolumna -> liczba miejsc po przecinku.
+    Zwraca ramkę z kolumnami target_cols (nienumeryczne są pomijane).
+    """
+    num_cols = df.select_dtypes(include=[np.number]).columns
+    target_cols = [c for c in target_cols if c in num_cols]
+    result = df[target_cols].copy()
+    if len(num_cols) < 2 or not target_cols:
+        return result
     imputer = IterativeImputer(max_iter=10, random_state=0)
     imputed = imputer.fit_transform(df[num_cols])
     imputed_df = pd.DataFrame(imputed, columns=num_cols, index=df.index)
-    decimals = _detect_decimal_places(df[target_col])
+    decimals = decimals or {}
+    for col in target_cols:
+        col_decimals = _resolve_decimals(df[col], decimals.get(col))
+        mask = df[col].isnull()
+        result.loc[mask, col] = np.round(imputed_df.loc[mask, col], col_decimals)
+    return result
+
+def fit_knn_numeric(features, target, n_neighbors=5, n_jobs=-1):
+    """
+    Indeks sąsiadów (KD-drzewo lub ball tree) na kompletnych wierszach ustandaryzowanych cech
+    i znanych wartościach celu (słownik). None, gdy nie ma wierszy treningowych.
+    """
+    train_rows = ~np.isnan(features).any(axis=1) & ~np.isnan(target)
+    if not train_rows.any():
+        return None
+    X_train = features[train_rows]
+    mean = X_train.mean(axis=0)
+    std = X_train.std(axis=0)
+    std[std == 0] = 1.0
+    X_train = (X_train - mean) / std
+    y_train = target[train_rows]
+    k = min(n_neighbors, len(y_train))
+    # KD-drzewo dla małej liczby wymiarów, ball tree dla większej
+    algorithm = "kd_tree" if X_train.shape[1] <= 15 else "ball_tree"
+    index = NearestNeighbors(n_neighbors=k, algorithm=algorithm, n_jobs=n_jobs).fit(X_train)
+    return {"index": index, "y_train": y_train, "mean": mean, "std": std, "k": k}
+
+def predict_knn_numeric(model, features, max_memory_mb=256):
+    """Średnia celu z k najbliższych sąsiadów dla wierszy features, zapytania fragmentami w limicie pamięci."""
+    # Pamięć na wiersz zapytania: cechy + indeksy i odległości sąsiadów
+    bytes_per_row = 8 * (features.shape[1] + 2 * model["k"])
+    chunk_rows = max(1_000, int(max_memory_mb * 1024 ** 2 / bytes_per_row))
+    predicted = np.empty(len(features))
+    for start in range(0, len(features), chunk_rows):
+        X_pred = (features[start:start + chunk_rows] - model["mean"]) / model["std"]
+        neighbours = model["index"].kneighbors(X_pred, return_distance=False)
+        predicted[start:start + len(X_pred)] = model["y_train"][neighbours].mean(axis=1)
+    return predicted
+
+@instrumented()
+def fillna_knn_numeric(df, target_col, n_neighbors=5, decimals=None, max_memory_mb=256, n_jobs=-1):
+    """
+    Uzupełnia braki w kolumnie numerycznej średnią z n_neighbors najbliższych sąsiadów
+    (odległość po ustandaryzowanych pozostałych kolumnach numerycznych).
+    Indeks (KD-drzewo lub ball tree) budowany jest na kompletnych wierszach, a sąsiedzi wyszukiwani
+    fragmentami mieszczącymi się w max_memory_mb, w n_jobs wątkach - bez pełnej macierzy odległości.
+    Pomija wiersze z brakami w cechach predykcyjnych.
+    """
+    if target_col not in df.columns or not pd.api.types.is_numeric_dtype(df[target_col]):
+        return df[target_col]
+    num_cols = df.select_dtypes(include=[np.number]).columns.drop(target_col, errors='ignore')
+    if len(num_cols) == 0:
+        return df[target_col]
+    features = df[num_cols].to_numpy(dtype=float)
+    target = df[target_col].to_numpy(dtype=float)
+    pred_positions = np.flatnonzero(~np.isnan(features).any(axis=1) & np.isnan(target))
+    if len(pred_positions) == 0:
+        return df[target_col]
+    model = fit_knn_numeric(features, target, n_neighbors, n_jobs)
+    if model is None:
+        return df[target_col]
+    predicted = predict_knn_numeric(model, features[pred_positions], max_memory_mb)
+    decimals = _resolve_decimals(df[target_col], decimals)
     filled = df[target_col].copy()
-    mask = df[target_col].isnull()
-    filled[mask] = np.round(imputed_df.loc[mask, target_col], decimals)
+    filled.iloc[pred_positions] = np.round(predicted, decimals)
     return filled
 
+@instrumented()
 def fillna_unknown(series):
     """Uzupełnia braki tekstowe wartością 'Unknown'."""
-    return series.fillna('Unknown')
+    return _allow_values(series, ['Unknown']).fillna('Unknown')
 
+@instrumented()
 def fillna_mode(series):
     """Uzupełnia braki najczęściej występującą wartością tekstową."""
-    if series.dropna().empty:
+    mode_val = column_mode(series)
+    if mode_val is None:
         return series
-    mode_val = series.mode().iloc[0]
     return series.fillna(mode_val)
 
-def fillna_knn_categorical(df, target_col, n_neighbors=5):
+def _categorical_training_data(df, target_col, encoding):
+    """
+    Przygotowuje dane dla klasyfikatorów kategorycznych z zakodowanej macierzy.
+    Pomija wiersze z brakami w cechach predykcyjnych. Zwraca None, gdy nie ma czego uzupełniać.
+    """
+    if encoding is None:
+        encoding = CategoricalEncoding()
+    matrix, columns = encoding.get(df)
+    if target_col not in columns:
+        return None
+    j = columns.index(target_col)
+    features = [k for k in range(len(columns)) if k != j]
+    if not features:
+        return None
+    y = matrix[:, j]
+    target_known = ~np.isnan(y)
+    # Liczba braków w cechach = braki w całym wierszu minus brak w kolumnie docelowej
+    features_complete = np.isnan(matrix).sum(axis=1) == (~target_known)
+    train_rows = target_known & features_complete
+    pred_rows = ~target_known & features_complete
+    if not train_rows.any() or not pred_rows.any():
+        return None
+    X_train = matrix[np.ix_(train_rows, features)]
+    y_train = y[train_rows]
+    X_pred = matrix[np.ix_(pred_rows, features)]
+    return encoding, X_train, y_train, X_pred, np.flatnonzero(pred_rows)
+
+@instrumented()
+def fillna_knn_categorical(df, target_col, n_neighbors=5, encoding=None):
     """
     Uzupełnia braki w kolumnie kategorycznej target_col za pomocą KNN (na podstawie pozostałych cech).
     Pomija wiersze z brakami w cechach predykcyjnych.
     """
     if target_col not in df.columns:
         return df[target_col]
-    cat_cols = df.select_dtypes(include=["object", "category"]).columns
-    encoders = {}
-    temp = df[cat_cols].copy()
-    for col in cat_cols:
-        enc = LabelEncoder()
-        notnull_mask = temp[col].notnull()
-        temp.loc[notnull_mask, col] = enc.fit_transform(temp.loc[notnull_mask, col].astype(str))
-        temp.loc[~notnull_mask, col] = np.nan
-        encoders[col] = enc
-    mask = df[target_col].notnull()
-    # Użyj tylko wierszy bez braków w cechach predykcyjnych
-    X_train = temp[mask].drop(columns=[target_col])
-    y_train = temp[mask][target_col].astype(float)
-    valid_train = X_train.notnull().all(axis=1)
-    X_train = X_train[valid_train]
-    y_train = y_train[valid_train]
-    X_pred = temp[~mask].drop(columns=[target_col])
-    valid_pred = X_pred.notnull().all(axis=1)
-    X_pred = X_pred[valid_pred]
-    if X_pred.empty or X_train.empty:
+    data = _categorical_training_data(df, target_col, encoding)
+    if data is None:
         return df[target_col]
+    encoding, X_train, y_train, X_pred, pred_positions = data
     knn = KNeighborsClassifier(n_neighbors=n_neighbors)
     knn.fit(X_train, y_train)
-    y_pred = knn.predict(X_pred)
-    enc = encoders[target_col]
-    y_pred = y_pred.astype(int)
-    filled = df[target_col].copy()
+    y_pred = knn.predict(X_pred).astype(int)
+    predicted = encoding.decode(target_col, y_pred)
+    filled = _allow_values(df[target_col].copy(), predicted)
     # Uzupełnij tylko te wiersze, które mają komplet cech predykcyjnych
-    idx_pred = X_pred.index
-    filled.loc[idx_pred] = enc.inverse_transform(y_pred)
+    filled.iloc[pred_positions] = predicted
     return filled
 
-def fillna_logreg_categorical(df, target_col):
+@instrumented()
+def fillna_logreg_categorical(df, target_col, encoding=None):
     """
     Uzupełnia braki w kolumnie kategorycznej target_col za pomocą regresji logistycznej (klasyfikacji).
     """
     if target_col not in df.columns:
         return df[target_col]
-    cat_cols = df.select_dtypes(include=["object", "category"]).columns
-    # Użyj osobnego LabelEncoder dla każdej kolumny
-    encoders = {}
-    temp = df[cat_cols].copy()
-    for col in cat_cols:
-        enc = LabelEncoder()
-        notnull_mask = temp[col].notnull()
-        temp.loc[notnull_mask, col] = enc.fit_transform(temp.loc[notnull_mask, col].astype(str))
-        temp.loc[~notnull_mask, col] = np.nan
-        encoders[col] = enc
-    mask = df[target_col].notnull()
-    X_train = temp[mask].drop(columns=[target_col])
-    y_train = temp[mask][target_col].astype(float)
-    valid_train = X_train.notnull().all(axis=1)
-    X_train = X_train[valid_train]
-    y_train = y_train[valid_train]
-    X_pred = temp[~mask].drop(columns=[target_col])
-    valid_pred = X_pred.notnull().all(axis=1)
-    X_pred = X_pred[valid_pred]
-    if X_pred.empty or X_train.empty:
+    data = _categorical_training_data(df, target_col, encoding)
+    if data is None:
         return df[target_col]
+    encoding, X_train, y_train, X_pred, pred_positions = data
     clf = LogisticRegression(max_iter=200)
     clf.fit(X_train, y_train)
-    y_pred = clf.predict(X_pred)
-    enc = encoders[target_col]
-    y_pred = y_pred.astype(int)
-    filled = df[target_col].copy()
-    idx_pred = X_pred.index
-    filled.loc[idx_pred] = enc.inverse_transform(y_pred)
+    y_pred = clf.predict(X_pred).astype(int)
+    predicted = encoding.decode(target_col, y_pred)
+    filled = _allow_values(df[target_col].copy(), predicted)
+    filled.iloc[pred_positions] = predicted
     return filled
 
+@instrumented()
 def fillna_group_mode(df, target_col, group_cols):
     """Uzupełnia braki w kolumnie kategorycznej modą obliczoną w grupach (jednej lub wielu kolumn)."""
     if target_col not in df.columns:
@@ -212,25 +508,22 @@ def fillna_group_mode(df, target_col, group_cols):
     group_cols = [c for c in group_cols if c in df.columns and c != target_col]
     if not group_cols:
         return df[target_col]
-    base = df[df[target_col].notna()]
-    if base.empty:
-        return df[target_col]
+    target = df[target_col]
+    if target.notna().sum() == 0:
+        return target
+    codes = _group_codes(df, group_cols)
+    base_mask = (codes >= 0) & target.notna().to_numpy()
 
-    # Wylicz modę dla każdej grupy; jeśli wiele mod, wybierz pierwszą z mode()
-    grouped_mode = base.groupby(group_cols)[target_col].agg(lambda s: s.mode().iloc[0] if not s.mode().empty else pd.NA)
+    # Moda dla każdej grupy; przy remisie najmniejsza wartość (jak pierwsza z mode())
+    grouped_mode = _group_mode(codes[base_mask], target[base_mask])
 
-    filled = df[target_col].copy()
-    mask = filled.isna()
-    if len(group_cols) == 1:
-        key_series = df[group_cols[0]]
-        filled.loc[mask] = key_series[mask].map(grouped_mode)
-    else:
-        key_series = df[group_cols].apply(lambda row: tuple(row.values), axis=1)
-        filled.loc[mask] = key_series[mask].map(grouped_mode)
+    filled = target.copy()
+    mask = filled.isna().to_numpy() & (codes >= 0)
+    filled.loc[mask] = grouped_mode.reindex(codes[mask]).to_numpy()
 
     # Fallback: global moda
     if filled.isna().any():
-        global_mode = df[target_col].mode()
-        if not global_mode.empty:
-            filled = filled.fillna(global_mode.iloc[0])
+        global_mode = column_mode(target)
+        if global_mode is not None:
+            filled = filled.fillna(global_mode)
     return filled
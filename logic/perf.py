@@ -0,0 +1,172 @@
+"""
+Pomiary wydajności operacji: czas zegarowy i procesora, szczytowy przyrost pamięci (tracemalloc),
+liczba wierszy i kolumn oraz nazwa metody.
+
+Pomiary są zapisywane tylko wtedy, gdy ustawiono dziennik (set_log) - bez niego dekorator
+instrumented nie robi nic poza wywołaniem funkcji. Funkcja instrumentowana wywołana wewnątrz innej
+(np. fillna_mice -> fillna_mice_columns) nie zapisuje osobnego pomiaru, żeby czas nie liczył się dwa razy. Dziennik to plik JSONL (jeden pomiar na wiersz)
+z rotacją po przekroczeniu rozmiaru; ostatnie pomiary są też trzymane w pamięci dla panelu wydajności.
+"""
+import collections
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import logging
+import logging.handlers
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+DEFAULT_LOG_PATH = os.path.join(os.path.expanduser("~"), ".cache", "uzupelnianie-brakow", "perf.jsonl")
+
+_log = None
+# Czy trwa pomiar funkcji instrumentowanej (w tym wątku / kontekście skopiowanym do wątku pomocniczego)
+_inside = contextvars.ContextVar("perf_inside", default=False)
+# Pamięć śledzi tylko jeden pomiar naraz (tracemalloc jest globalny dla procesu)
+_memory_lock = threading.Lock()
+
+
+class PerfLog:
+    """Dziennik pomiarów: plik JSONL z rotacją (max_bytes, backup_count) i bufor ostatnich pomiarów."""
+
+    def __init__(self, path=DEFAULT_LOG_PATH, max_bytes=5 * 1024 ** 2, backup_count=3, track_memory=True, keep=500):
+        self.path = path
+        self.track_memory = track_memory
+        self.records = collections.deque(maxlen=keep)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._logger = logging.getLogger(f"{__name__}.{id(self)}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(self._handler)
+
+    def write(self, record):
+        with self._lock:
+            self.records.append(record)
+        self._logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+    def recent(self, n=None):
+        """Ostatnie pomiary (od najstarszego)."""
+        with self._lock:
+            records = list(self.records)
+        return records if n is None else records[-n:]
+
+    def close(self):
+        self._logger.removeHandler(self._handler)
+        self._handler.close()
+
+
+def set_log(log):
+    """Ustawia dziennik pomiarów (None wyłącza pomiary)."""
+    global _log
+    _log = log
+
+
+def get_log():
+    return _log
+
+
+def _shape(args, kwargs):
+    """Wiersze i kolumny pierwszej ramki danych lub serii wśród argumentów."""
+    for value in list(args) + list(kwargs.values()):
+        if isinstance(value, pd.DataFrame):
+            return value.shape
+        if isinstance(value, pd.Series):
+            return len(value), 1
+    return None, None
+
+
+@contextmanager
+def measure(name, rows=None, cols=None):
+    """
+    Mierzy blok kodu i zapisuje pomiar w dzienniku. Zwraca słownik pomiaru - można w nim
+    uzupełnić rows/cols lub dodać własne pola przed końcem bloku.
+    """
+    log = _log
+    record = {"name": name, "rows": rows, "cols": cols}
+    if log is None:
+        yield record
+        return
+    # Pamięć mierzona tylko, gdy nikt inny nie używa tracemalloc (np. benchmark) ani inny pomiar
+    track = log.track_memory and not tracemalloc.is_tracing() and _memory_lock.acquire(blocking=False)
+    if track:
+        tracemalloc.start()
+    record["status"] = "ok"
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    except BaseException as e:
+        record["status"] = type(e).__name__
+        raise
+    finally:
+        record["wall_s"] = round(time.perf_counter() - wall, 6)
+        record["cpu_s"] = round(time.process_time() - cpu, 6)
+        record["peak_mb"] = None
+        if track:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            _memory_lock.release()
+            record["peak_mb"] = round(peak / 1024 ** 2, 3)
+        record["thread"] = threading.current_thread().name
+        record["time"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        log.write(record)
+
+
+def instrumented(name=None):
+    """
+    Dekorator: mierzy każde wywołanie funkcji (wiersze i kolumny z pierwszej ramki danych lub serii).
+    Wywołania zagnieżdżone w innej funkcji instrumentowanej nie są mierzone osobno.
+    """
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _log is None or _inside.get():
+                return func(*args, **kwargs)
+            rows, cols = _shape(args, kwargs)
+            token = _inside.set(True)
+            try:
+                with measure(label, rows, cols):
+                    return func(*args, **kwargs)
+            finally:
+                _inside.reset(token)
+        return wrapper
+    return decorator
+
+
+def profile_call(func, *args, sort="cumulative", limit=40, **kwargs):
+    """
+    Wykonuje func pod cProfile. Zwraca (wynik, raport tekstowy, obiekt pstats.Stats).
+    Profilowany jest tylko bieżący wątek.
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats(sort).print_stats(limit)
+    return result, stream.getvalue(), stats
+
+
+def summarize(records):
+    """Zestawienie pomiarów według nazwy: liczba, łączny i średni czas, czas procesora, największa pamięć."""
+    if not records:
+        return pd.DataFrame(columns=["name", "count", "wall_s", "mean_wall_s", "cpu_s", "max_peak_mb"])
+    frame = pd.DataFrame(records)
+    summary = frame.groupby("name").agg(
+        count=("wall_s", "size"),
+        wall_s=("wall_s", "sum"),
+        mean_wall_s=("wall_s", "mean"),
+        cpu_s=("cpu_s", "sum"),
+        max_peak_mb=("peak_mb", "max"),
+    )
+    return summary.sort_values("wall_s", ascending=False).reset_index()
@@ -0,0 +1,221 @@
+"""
+Plan uzupełnienia całego zbioru danych: propozycja metody dla każdej kolumny z brakami
+oraz harmonogram wykonania według zależności między kolumnami.
+
+Krok czyta własną kolumnę (statystyki proste), kolumny grupujące (statystyki w grupach)
+albo pozostałe kolumny (regresja, MICE, KNN, klasyfikator). Wynik harmonogramu jest taki sam jak
+przy wykonaniu kroków po kolei w kolejności planu: krok zależy od wcześniejszego kroku, jeśli czyta
+jego kolumnę albo wcześniejszy krok czyta kolumnę, którą ten krok zmienia. Kroki jednego poziomu
+harmonogramu są od siebie niezależne i wykonywane równolegle w puli wątków.
+
+Kolumny uzupełniane metodą regression_patterns tworzą jeden krok wielokolumnowy (klucz columns):
+każdy taki krok czyta wszystkie kolumny liczbowe, więc osobno tworzyłyby ciąg poziomów z pełnym
+dopasowaniem w każdym, a razem wymagają jednego wywołania fillna_regression_columns.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from logic.batch import METHODS, ImputationContext
+from logic.methods import fillna_regression_columns, is_text_dtype
+
+# Metody do wyboru w planie według rodzaju kolumny
+NUMERIC_METHODS = ["mean", "median", "group_mean", "regression", "regression_patterns", "mice", "knn"]
+TEXT_METHODS = ["mode", "unknown", "group_mode", "knn_cat", "logreg_cat"]
+GROUP_METHODS = {"group_mean", "group_mode"}
+# Metody czytające pozostałe kolumny liczbowe / tekstowe
+NUMERIC_MODEL_METHODS = {"regression", "regression_patterns", "mice", "knn"}
+TEXT_MODEL_METHODS = {"knn_cat", "logreg_cat"}
+# Metoda wykonywana jednym krokiem dla wielu kolumn
+MULTI_COLUMN_METHOD = "regression_patterns"
+TEXT_DTYPES = ["object", "string", "category"]
+
+
+def column_kind(series):
+    """'numeric', 'text' albo None (kolumna, dla której planista nie ma metod)."""
+    if pd.api.types.is_float_dtype(series.dtype):
+        return "numeric"
+    if is_text_dtype(series.dtype):
+        return "text"
+    return None
+
+
+def methods_for(series):
+    """Metody dostępne w planie dla kolumny."""
+    return {"numeric": NUMERIC_METHODS, "text": TEXT_METHODS}.get(column_kind(series), [])
+
+
+def propose_method(df, column, missing_fraction):
+    """
+    Metoda proponowana dla kolumny na podstawie typu i odsetka braków:
+    przy niewielu brakach statystyka prosta, przy średnim odsetku model na pozostałych kolumnach,
+    przy większości braków znów statystyka prosta (model nie miałby na czym się uczyć).
+    """
+    kind = column_kind(df[column])
+    if kind == "numeric":
+        others = len(df.select_dtypes(include=[np.number]).columns.drop(column))
+        if missing_fraction <= 0.05 or missing_fraction > 0.6 or others == 0:
+            return "median" if missing_fraction > 0.6 else "mean"
+        return "regression_patterns"
+    if kind == "text":
+        if missing_fraction > 0.5:
+            return "unknown"
+        # Klasyfikator KNN uczy się tylko na pozostałych kolumnach tekstowych
+        others = len(df.select_dtypes(include=TEXT_DTYPES).columns.drop(column))
+        if missing_fraction <= 0.05 or others == 0:
+            return "mode"
+        return "knn_cat"
+    return None
+
+
+def step_columns(step):
+    """Kolumny zmieniane przez krok (kolumny części kroku wielokolumnowego albo jedna kolumna)."""
+    return [part["column"] for part in step.get("parts") or [step]]
+
+
+def merge_steps(plan):
+    """
+    Łączy wszystkie kroki regression_patterns w jeden krok wielokolumnowy w miejscu pierwszego z nich
+    (parts - lista kroków jednokolumnowych). Krok wielokolumnowy, któremu zmieniono metodę,
+    jest rozdzielany z powrotem na kroki jednokolumnowe z tą metodą.
+    """
+    merged, parts = [], []
+    for step in plan:
+        singles = [{**part, "method": step["method"], "params": step["params"]} for part in step["parts"]] if step.get("parts") else [step]
+        for single in singles:
+            if single["method"] != MULTI_COLUMN_METHOD:
+                merged.append(single)
+                continue
+            if not parts:
+                merged.append(None)  # miejsce kroku wielokolumnowego
+            parts.append(single)
+    if parts:
+        step = parts[0] if len(parts) == 1 else {
+            "column": parts[0]["column"],
+            "kind": "numeric",
+            "missing": sum(part["missing"] for part in parts),
+            "missing_fraction": float(np.mean([part["missing_fraction"] for part in parts])),
+            "method": MULTI_COLUMN_METHOD,
+            "params": {},
+            "parts": parts,
+        }
+        merged[merged.index(None)] = step
+    return merged
+
+
+def propose_plan(df):
+    """
+    Lista kroków (słowniki: column, kind, missing, missing_fraction, method, params) dla kolumn z brakami.
+    Kolumny bez obsługiwanego typu dostają method=None (pomijane przy wykonaniu).
+    Kolumny z metodą regression_patterns tworzą jeden krok wielokolumnowy (merge_steps).
+    """
+    counts = df.isna().sum()
+    plan = []
+    for column in df.columns[counts.to_numpy() > 0]:
+        fraction = counts[column] / len(df)
+        plan.append({
+            "column": column,
+            "kind": column_kind(df[column]),
+            "missing": int(counts[column]),
+            "missing_fraction": float(fraction),
+            "method": propose_method(df, column, fraction),
+            "params": {},
+        })
+    return merge_steps(plan)
+
+
+def reads(df, step):
+    """Zbiór kolumn, które krok czyta."""
+    column, method, params = step["column"], step["method"], step.get("params") or {}
+    if method in GROUP_METHODS:
+        return {column, *params.get("group_cols", [])}
+    if method in NUMERIC_MODEL_METHODS:
+        return set(df.select_dtypes(include=[np.number]).columns)
+    if method in TEXT_MODEL_METHODS:
+        return set(df.select_dtypes(include=TEXT_DTYPES).columns)
+    return {column}
+
+
+def schedule(df, plan):
+    """
+    Poziomy harmonogramu: lista list numerów kroków planu. Kroki z method=None są pomijane.
+    Każdy krok trafia na poziom o jeden wyższy niż najpóźniejszy krok, od którego zależy.
+    """
+    steps = [i for i, step in enumerate(plan) if step.get("method")]
+    read_sets = {i: reads(df, plan[i]) for i in steps}
+    write_sets = {i: set(step_columns(plan[i])) for i in steps}
+    level = {}
+    for pos, i in enumerate(steps):
+        depends = [
+            level[j] for j in steps[:pos]
+            if write_sets[j] & read_sets[i] or write_sets[i] & read_sets[j] or write_sets[i] & write_sets[j]
+        ]
+        level[i] = max(depends, default=-1) + 1
+    levels = [[] for _ in range(max(level.values(), default=-1) + 1)]
+    for i in steps:
+        levels[level[i]].append(i)
+    return levels
+
+
+def order_plan(plan):
+    """
+    Kolejność wykonania: najpierw statystyki proste i w grupach, potem metody modelowe.
+    Modele uczą się wtedy na kolumnach już uzupełnionych, a kroki proste trafiają na pierwszy poziom.
+    Kroki regression_patterns są przy tym łączone w jeden krok (merge_steps).
+    """
+    model = NUMERIC_MODEL_METHODS | TEXT_MODEL_METHODS
+    return sorted(merge_steps(plan), key=lambda step: step.get("method") in model)
+
+
+def run_plan(df, plan, max_workers=4, job=None, ctx=None):
+    """
+    Wykonuje plan według harmonogramu. Kroki jednego poziomu liczone są równolegle na tej samej ramce,
+    a ich wyniki wstawiane po zakończeniu poziomu. df nie jest zmieniane.
+    Zwraca (słownik kolumna -> uzupełniona seria, raport: lista słowników column, method, level, filled, seconds).
+    W raporcie krok wielokolumnowy ma w column nazwy kolumn po przecinku; filled=0 oznacza krok, który nic nie uzupełnił.
+    """
+    ctx = ctx or ImputationContext()
+    work = df.copy(deep=False)
+    levels = schedule(df, plan)
+    total = sum(len(lvl) for lvl in levels)
+    filled, report, done = {}, [], 0
+
+    def compute(step):
+        start = time.perf_counter()
+        columns = step_columns(step)
+        if step["method"] == MULTI_COLUMN_METHOD:
+            frame = fillna_regression_columns(work, columns, {c: ctx.decimals(work, c) for c in columns})
+            values = {c: frame[c] for c in columns}
+        else:
+            values = {step["column"]: METHODS[step["method"]](work, step["column"], ctx, **(step.get("params") or {}))}
+        return values, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for number, level in enumerate(levels):
+            if job is not None:
+                job.check_cancelled()
+            # Liczba miejsc po przecinku liczona przed startem wątków (pamięć podręczna kontekstu nie jest współdzielona bezpiecznie)
+            for i in level:
+                for column in step_columns(plan[i]):
+                    ctx.decimals(work, column)
+            futures = [(i, pool.submit(compute, plan[i])) for i in level]
+            for i, future in futures:
+                step = plan[i]
+                values, seconds = future.result()
+                label = ", ".join(map(str, values))
+                report.append({
+                    "column": label, "method": step["method"], "level": number,
+                    "filled": sum(int(work[c].isna().sum() - pd.Series(v).isna().sum()) for c, v in values.items()),
+                    "seconds": round(seconds, 4),
+                })
+                filled.update(values)
+                done += 1
+                if job is not None:
+                    job.report(done / total, f"{label}: {step['method']}")
+            for i in level:
+                for column in step_columns(plan[i]):
+                    work[column] = filled[column]
+                    ctx.column_changed(column)
+    return filled, report
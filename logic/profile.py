@@ -0,0 +1,85 @@
+import threading
+
+import numpy as np
+
+from logic.cleaning import clean_column
+from logic.methods import _detect_decimal_places
+from logic.visualizations import value_counts_data
+
+
+class ColumnProfile:
+    """
+    Profil jednej kolumny: typ, braki, liczności do histogramu i liczba miejsc po przecinku.
+    Każda wartość jest liczona dopiero przy pierwszym użyciu i zapamiętywana.
+    """
+
+    def __init__(self, series):
+        self.series = series
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, name, compute):
+        if name not in self._values:
+            value = compute()
+            with self._lock:
+                self._values.setdefault(name, value)
+        return self._values[name]
+
+    @property
+    def null_mask(self):
+        """Maska braków w kolumnie (bez czyszczenia tekstu)."""
+        return self._cached("null_mask", lambda: self.series.isna().to_numpy())
+
+    @property
+    def null_count(self):
+        return self._cached("null_count", lambda: int(self.null_mask.sum()))
+
+    @property
+    def cleaned(self):
+        """Kolumna po clean_column() - z pustymi i błędnymi wartościami zamienionymi na braki."""
+        return self._cached("cleaned", lambda: clean_column(self.series))
+
+    @property
+    def cleaned_null_positions(self):
+        return self._cached("cleaned_null_positions", lambda: np.flatnonzero(self.cleaned.isna().to_numpy()))
+
+    @property
+    def data_type(self):
+        """'float', jeśli wszystkie niepuste wartości dają się zrzutować na float, w przeciwnym razie 'object'."""
+        def infer():
+            try:
+                self.cleaned.dropna().astype(float)
+                return "float"
+            except Exception:
+                return "object"
+        return self._cached("data_type", infer)
+
+    @property
+    def value_counts(self):
+        """Wynik value_counts_data() dla kolumny: (liczności, etykiety, czy_numeryczne)."""
+        return self._cached("value_counts", lambda: value_counts_data(self.cleaned, clean=False))
+
+    @property
+    def decimals(self):
+        return self._cached("decimals", lambda: _detect_decimal_places(self.series))
+
+
+class ProfileStore:
+    """Pamięć podręczna profili kolumn, ważna do czasu zmiany kolumny (uzupełnienie braków, usunięcie wierszy)."""
+
+    def __init__(self):
+        self._profiles = {}
+
+    def get(self, df, column):
+        profile = self._profiles.get(column)
+        if profile is None:
+            profile = self._profiles.setdefault(column, ColumnProfile(df[column]))
+        return profile
+
+    def invalidate(self, columns=None):
+        """Usuwa profile podanych kolumn (lub wszystkie, gdy columns=None)."""
+        if columns is None:
+            self._profiles.clear()
+            return
+        for column in columns:
+            self._profiles.pop(column, None)
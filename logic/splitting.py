@@ -0,0 +1,135 @@
+"""
+Podział danych na próbki treningową, walidacyjną i testową na tablicach pozycji wierszy.
+
+Zamiast tasować kopię całej ramki danych losowana jest permutacja numerów wierszy,
+a każda próbka jest zapisywana bezpośrednio z oryginalnej ramki.
+"""
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from logic.exporter import save_dataframe
+from logic.file_loader import file_format
+from logic.perf import instrumented
+
+SPLIT_MODES = ("random", "stratified", "group")
+
+
+def permutation(n, random_state=42):
+    """Permutacja numerów wierszy - ta sama kolejność co df.sample(frac=1, random_state=random_state)."""
+    return np.random.RandomState(random_state).permutation(n)
+
+
+def _cut_points(n, fractions):
+    """Granice próbek jak w dotychczasowym podziale: części zaokrąglane w dół, reszta trafia do ostatniej."""
+    train_end = int(n * fractions[0])
+    val_end = train_end + int(n * fractions[1])
+    return train_end, val_end
+
+
+def _parts_from_labels(perm, part_of_row):
+    """Dzieli permutację na próbki według numeru próbki przypisanego wierszom (kolejność losowa zostaje)."""
+    part = part_of_row[perm]
+    return [perm[part == k] for k in range(3)]
+
+
+def random_split(n, fractions, random_state=42):
+    """Zwykły podział losowy - te same próbki co tasowanie ramki i cięcie w kolejności."""
+    perm = permutation(n, random_state)
+    train_end, val_end = _cut_points(n, fractions)
+    return [perm[:train_end], perm[train_end:val_end], perm[val_end:]]
+
+
+def stratified_split(labels, fractions, random_state=42):
+    """Podział warstwowy: w każdej próbce proporcje wartości kolumny labels są takie jak w całych danych."""
+    codes, _ = pd.factorize(pd.Series(labels), use_na_sentinel=False)
+    n = len(codes)
+    perm = permutation(n, random_state)
+    # Wiersze posortowane według klasy, w obrębie klasy w losowej kolejności
+    order = perm[np.argsort(codes[perm], kind="stable")]
+    sizes = np.bincount(codes)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    rank = np.arange(n) - np.repeat(starts, sizes)
+    train_end = (sizes * fractions[0]).astype(np.int64)
+    val_end = train_end + (sizes * fractions[1]).astype(np.int64)
+    class_of = codes[order]
+    part_sorted = np.where(rank < train_end[class_of], 0, np.where(rank < val_end[class_of], 1, 2))
+    part_of_row = np.empty(n, dtype=np.int64)
+    part_of_row[order] = part_sorted
+    return _parts_from_labels(perm, part_of_row)
+
+
+def group_split(groups, fractions, random_state=42):
+    """Podział z grupami: wiersze o tej samej wartości klucza trafiają zawsze do tej samej próbki."""
+    codes, uniques = pd.factorize(pd.Series(groups), use_na_sentinel=False)
+    n = len(codes)
+    sizes = np.bincount(codes, minlength=len(uniques))
+    group_order = permutation(len(uniques), random_state)
+    # Grupy w losowej kolejności są dokładane do próbek, dopóki nie osiągną docelowej liczby wierszy
+    train_end, val_end = _cut_points(n, fractions)
+    filled_before = np.cumsum(sizes[group_order]) - sizes[group_order]
+    part_of_group = np.empty(len(uniques), dtype=np.int64)
+    part_of_group[group_order] = np.where(filled_before < train_end, 0, np.where(filled_before < val_end, 1, 2))
+    return _parts_from_labels(permutation(n, random_state), part_of_group[codes])
+
+
+def split_positions(df, fractions, mode="random", column=None, random_state=42):
+    """Zwraca trzy tablice pozycji wierszy (trening, walidacja, test) dla wybranego trybu podziału."""
+    if mode == "random":
+        return random_split(len(df), fractions, random_state)
+    if column is None:
+        raise ValueError("Podział warstwowy i grupowy wymaga wskazania kolumny.")
+    if mode == "stratified":
+        return stratified_split(df[column].to_numpy(), fractions, random_state)
+    if mode == "group":
+        return group_split(df[column].to_numpy(), fractions, random_state)
+    raise ValueError(f"Nieznany tryb podziału: {mode}")
+
+
+def write_partition(df, positions, path, chunk_rows=200_000):
+    """Zapisuje wiersze o podanych pozycjach; CSV fragmentami, żeby nie kopiować całej próbki naraz."""
+    if file_format(path) != "csv" or len(positions) <= chunk_rows:
+        save_dataframe(df.take(positions), path)
+        return
+    for start in range(0, len(positions), chunk_rows):
+        block = df.take(positions[start:start + chunk_rows])
+        block.to_csv(path, index=False, mode="w" if start == 0 else "a", header=start == 0)
+
+
+def duplicate_paths(paths):
+    """Ścieżki wskazujące ten sam plik (po os.path.realpath) - równoległy zapis przeplatałby ich wiersze."""
+    seen, duplicates = {}, []
+    for path in paths:
+        real = os.path.realpath(path)
+        if real in seen and seen[real] not in duplicates:
+            duplicates.append(seen[real])
+        seen.setdefault(real, path)
+    return duplicates
+
+
+@instrumented()
+def write_partitions(df, parts, paths, job=None, max_workers=3):
+    """
+    Zapisuje próbki równolegle (każda do swojego pliku). job - opcjonalny Job do raportowania postępu.
+    Dwie próbki do tego samego pliku to błąd (ValueError).
+    """
+    duplicates = duplicate_paths(paths)
+    if duplicates:
+        raise ValueError(f"Kilka próbek zapisywanych do tego samego pliku: {', '.join(duplicates)}")
+    if job is not None:
+        job.check_cancelled()
+    done = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Kontekst skopiowany do wątków - zapisy próbek należą do pomiaru write_partitions
+        futures = [
+            pool.submit(contextvars.copy_context().run, write_partition, df, positions, path)
+            for positions, path in zip(parts, paths)
+        ]
+        for future, path in zip(futures, paths):
+            future.result()
+            done += 1
+            if job is not None:
+                job.report(done / len(paths), f"zapisano {os.path.basename(path)}")
@@ -0,0 +1,395 @@
+"""
+Strumieniowe uzupełnianie braków w plikach CSV większych niż pamięć RAM.
+
+Plik czytany jest fragmentami (logic.file_loader.iter_csv_chunks). W przebiegu statystycznym
+zbierane są sumy, liczności, liczności wartości i agregaty w grupach, a w przebiegu zapisu
+każdy fragment jest uzupełniany i dopisywany do pliku wynikowego. Wyniki są takie same jak
+dla fillna_mean, fillna_median, fillna_value, fillna_mode, fillna_group_mean i fillna_group_mode
+wywołanych na całej tabeli.
+"""
+import numpy as np
+import pandas as pd
+
+from logic.file_loader import csv_read_options, detect_csv_separator, iter_csv_chunks
+from logic.methods import _decimal_places
+
+_ALL_COLUMNS = object()
+NUMERIC_METHODS = {"mean", "median", "value", "group_mean"}
+STREAMABLE_METHODS = NUMERIC_METHODS | {"mode", "unknown", "group_mode", "remove_rows"}
+
+
+def _mode_from_counts(counts):
+    """Najczęstsza wartość z liczności; przy remisie najmniejsza wartość (jak Series.mode())."""
+    if counts is None or counts.empty:
+        return None
+    top = counts.index[counts.to_numpy() == counts.max()]
+    _, uniques = pd.factorize(top, sort=True)
+    return uniques[0]
+
+
+def _add_counts(total, part):
+    return part if total is None else total.add(part, fill_value=0)
+
+
+def _group_index(frame, group_cols):
+    """Indeks (lub MultiIndex) z wartości kolumn grupujących - bez budowania krotek wiersz po wierszu."""
+    if len(group_cols) == 1:
+        return pd.Index(frame[group_cols[0]])
+    return pd.MultiIndex.from_frame(frame[group_cols])
+
+
+class _Fill:
+    """Krok planu w trybie strumieniowym: update() zbiera statystyki, apply() uzupełnia fragment."""
+
+    def __init__(self, column):
+        self.column = column
+
+    @property
+    def reads(self):
+        return {self.column}
+
+    @property
+    def writes(self):
+        return self.column
+
+    def update(self, chunk):
+        pass
+
+    def finalize(self):
+        pass
+
+    def apply(self, chunk):
+        return chunk
+
+
+class _NumericFill(_Fill):
+    """Wspólna część metod numerycznych: liczba miejsc po przecinku jak w _detect_decimal_places."""
+
+    def __init__(self, column):
+        super().__init__(column)
+        self.numeric = True
+        self.count = 0
+        self.total = 0.0
+        self.decimal_sum = 0
+
+    def update(self, chunk):
+        series = chunk[self.column]
+        if not pd.api.types.is_numeric_dtype(series):
+            self.numeric = False
+            return
+        values = series.dropna().to_numpy(dtype=float)
+        self.count += values.size
+        self.total += values.sum()
+        self.decimal_sum += int(_decimal_places(values).sum())
+
+    @property
+    def decimals(self):
+        if self.count == 0:
+            return 4
+        return max(0, int(round(self.decimal_sum / self.count)))
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+    def _fill_and_round(self, chunk, value):
+        if self.numeric:
+            chunk[self.column] = chunk[self.column].fillna(value).round(self.decimals)
+        return chunk
+
+
+class _MeanFill(_NumericFill):
+    def finalize(self):
+        self.value = round(self.mean, self.decimals)
+
+    def apply(self, chunk):
+        return self._fill_and_round(chunk, self.value)
+
+
+class _MedianFill(_NumericFill):
+    # Mediana wymaga wszystkich wartości - w pamięci trzymana jest tylko ta jedna kolumna
+    def __init__(self, column):
+        super().__init__(column)
+        self.parts = []
+
+    def update(self, chunk):
+        super().update(chunk)
+        if self.numeric:
+            self.parts.append(chunk[self.column].dropna().to_numpy(dtype=float))
+
+    def finalize(self):
+        values = np.concatenate(self.parts) if self.parts else np.array([])
+        self.parts = []
+        median = np.median(values) if values.size else np.nan
+        self.value = round(median, self.decimals)
+
+    def apply(self, chunk):
+        return self._fill_and_round(chunk, self.value)
+
+
+class _ValueFill(_NumericFill):
+    def __init__(self, column, value=0):
+        super().__init__(column)
+        self.raw_value = value
+
+    def finalize(self):
+        try:
+            self.value = round(float(self.raw_value), self.decimals)
+        except Exception:
+            self.value = 0
+
+    def apply(self, chunk):
+        if not self.numeric:
+            chunk[self.column] = chunk[self.column].fillna(self.raw_value)
+            return chunk
+        return self._fill_and_round(chunk, self.value)
+
+
+class _UnknownFill(_Fill):
+    def apply(self, chunk):
+        chunk[self.column] = chunk[self.column].fillna('Unknown')
+        return chunk
+
+
+class _ModeFill(_Fill):
+    def __init__(self, column):
+        super().__init__(column)
+        self.counts = None
+
+    def update(self, chunk):
+        self.counts = _add_counts(self.counts, chunk[self.column].value_counts())
+
+    def finalize(self):
+        self.value = _mode_from_counts(self.counts)
+
+    def apply(self, chunk):
+        if self.value is not None:
+            chunk[self.column] = chunk[self.column].fillna(self.value)
+        return chunk
+
+
+class _GroupFill(_Fill):
+    def __init__(self, column, group_cols, columns):
+        super().__init__(column)
+        if isinstance(group_cols, str):
+            group_cols = [group_cols]
+        self.group_cols = [c for c in group_cols if c in columns and c != column]
+
+    @property
+    def reads(self):
+        return {self.column, *self.group_cols}
+
+    def _keys_complete(self, chunk):
+        return chunk[self.group_cols].notna().all(axis=1).to_numpy()
+
+    def _lookup(self, chunk, mask, table):
+        return table.reindex(_group_index(chunk.loc[mask], self.group_cols)).to_numpy()
+
+
+class _GroupMeanFill(_GroupFill, _NumericFill):
+    def __init__(self, column, group_cols, columns):
+        _NumericFill.__init__(self, column)
+        _GroupFill.__init__(self, column, group_cols, columns)
+        self.sums = None
+
+    def update(self, chunk):
+        _NumericFill.update(self, chunk)
+        if not self.numeric or not self.group_cols:
+            return
+        base = chunk[chunk[self.column].notna().to_numpy() & self._keys_complete(chunk)]
+        part = base.groupby(self.group_cols, observed=True)[self.column].agg(["sum", "count"])
+        self.sums = _add_counts(self.sums, part)
+
+    def finalize(self):
+        if self.sums is None:
+            self.means = pd.Series(dtype=float)
+        else:
+            self.means = (self.sums["sum"] / self.sums["count"]).round(self.decimals)
+        self.overall = round(self.mean, self.decimals)
+
+    def apply(self, chunk):
+        if not self.numeric or not self.group_cols or self.count == 0:
+            return chunk
+        filled = chunk[self.column].copy()
+        mask = filled.isna().to_numpy() & self._keys_complete(chunk)
+        if mask.any():
+            filled.loc[mask] = self._lookup(chunk, mask, self.means)
+        chunk[self.column] = filled.fillna(self.overall).round(self.decimals)
+        return chunk
+
+
+class _GroupModeFill(_GroupFill):
+    def __init__(self, column, group_cols, columns):
+        super().__init__(column, group_cols, columns)
+        self.pair_counts = None
+        self.counts = None
+
+    def update(self, chunk):
+        if not self.group_cols:
+            return
+        self.counts = _add_counts(self.counts, chunk[self.column].value_counts())
+        base = chunk[chunk[self.column].notna().to_numpy() & self._keys_complete(chunk)]
+        part = base.groupby(self.group_cols + [self.column], observed=True).size()
+        self.pair_counts = _add_counts(self.pair_counts, part)
+
+    def finalize(self):
+        self.global_mode = _mode_from_counts(self.counts)
+        self.modes = pd.Series(dtype=object)
+        if self.pair_counts is None or self.pair_counts.empty:
+            return
+        pairs = self.pair_counts.rename("_count").reset_index()
+        groups = pairs.groupby(self.group_cols, sort=False, observed=True).ngroup().to_numpy()
+        value_rank, _ = pd.factorize(pairs[self.column], sort=True)
+        # Kolejność: grupa, liczność malejąco, wartość rosnąco - pierwsza pozycja w grupie to moda
+        order = np.lexsort((value_rank, -pairs["_count"].to_numpy(), groups))
+        sorted_groups = groups[order]
+        first = np.ones(order.size, dtype=bool)
+        first[1:] = sorted_groups[1:] != sorted_groups[:-1]
+        best = pairs.iloc[order[first]]
+        self.modes = pd.Series(best[self.column].to_numpy(), index=_group_index(best, self.group_cols))
+
+    def apply(self, chunk):
+        if not self.group_cols or self.counts is None or self.counts.empty:
+            return chunk
+        filled = chunk[self.column].copy()
+        mask = filled.isna().to_numpy() & self._keys_complete(chunk)
+        if mask.any():
+            filled.loc[mask] = self._lookup(chunk, mask, self.modes)
+        if self.global_mode is not None:
+            filled = filled.fillna(self.global_mode)
+        chunk[self.column] = filled
+        return chunk
+
+
+class _RemoveRows(_Fill):
+    @property
+    def writes(self):
+        return _ALL_COLUMNS
+
+    def apply(self, chunk):
+        return chunk.dropna(subset=[self.column]).copy()
+
+
+def _make_fill(column, method, params, columns):
+    if column not in columns:
+        raise KeyError(f"Brak kolumny '{column}' w danych.")
+    if method == "mean":
+        return _MeanFill(column)
+    if method == "median":
+        return _MedianFill(column)
+    if method == "value":
+        return _ValueFill(column, **params)
+    if method == "unknown":
+        return _UnknownFill(column)
+    if method == "mode":
+        return _ModeFill(column)
+    if method == "group_mean":
+        return _GroupMeanFill(column, params["group_cols"], columns)
+    if method == "group_mode":
+        return _GroupModeFill(column, params["group_cols"], columns)
+    if method == "remove_rows":
+        return _RemoveRows(column)
+    raise ValueError(f"Metoda '{method}' wymaga całej tabeli w pamięci i nie działa w trybie strumieniowym.")
+
+
+def _next_batch(pending):
+    """
+    Najdłuższy początek listy kroków, których statystyki można zebrać w jednym przebiegu:
+    żaden krok nie czyta kolumny zmienianej przez wcześniejszy krok z tej samej partii.
+    """
+    batch, written = [], set()
+    for fill in pending:
+        if _ALL_COLUMNS in written or fill.reads & written:
+            break
+        batch.append(fill)
+        written.add(fill.writes)
+    return batch
+
+
+def _read_columns(input_path):
+    return list(pd.read_csv(input_path, nrows=0, **csv_read_options(detect_csv_separator(input_path))).columns)
+
+
+def _integer_columns_with_missing(chunk):
+    integer = [col for col in chunk.columns if pd.api.types.is_integer_dtype(chunk[col])]
+    return [col for col in integer if chunk[col].hasnans]
+
+
+def _as_float(chunk, columns):
+    columns = [col for col in columns if not pd.api.types.is_float_dtype(chunk[col])]
+    if columns:
+        chunk = chunk.astype({col: "float64" for col in columns})
+    return chunk
+
+
+def stream_impute(input_path, steps, output_path, memory_budget_mb=256, sample_rows=10_000):
+    """
+    Wykonuje plan (lista kroków z logic.batch.normalize_plan) na pliku CSV fragment po fragmencie
+    i zapisuje wynik do CSV. Zwraca podsumowanie (wiersze, braki przed i po, liczba przebiegów).
+    """
+    if not str(output_path).endswith(".csv"):
+        raise ValueError("Tryb strumieniowy zapisuje wyniki tylko do plików CSV.")
+    columns = _read_columns(input_path)
+    fills = [_make_fill(column, method, params, columns) for column, method, params in steps]
+    float_columns = {column for column, method, _ in steps if method in NUMERIC_METHODS}
+
+    def chunks():
+        return iter_csv_chunks(input_path, memory_budget_mb, sample_rows, float_columns)
+
+    # Przebiegi statystyczne: w każdym fragmencie najpierw kroki już policzone, potem zbieranie statystyk.
+    # Pierwszy przebieg zbiera też kolumny całkowite z brakami - zapisywane są jako float64,
+    # tak jak po wczytaniu całego pliku przez load_file.
+    resolved, pending, passes, int_missing = [], fills, 0, set()
+    while pending or passes == 0:
+        batch = _next_batch(pending)
+        pending = pending[len(batch):]
+        for chunk in chunks():
+            if passes == 0:
+                int_missing.update(_integer_columns_with_missing(chunk))
+            chunk = _as_float(chunk, int_missing)
+            for fill in resolved:
+                chunk = fill.apply(chunk)
+            for fill in batch:
+                fill.update(chunk)
+        for fill in batch:
+            fill.finalize()
+        resolved.extend(batch)
+        passes += 1
+
+    summary = {"rows": 0, "rows_removed": 0, "missing_before": 0, "missing_after": 0}
+    header = True
+    for chunk in chunks():
+        rows_in = len(chunk)
+        summary["rows"] += rows_in
+        summary["missing_before"] += int(chunk.isna().sum().sum())
+        chunk = _as_float(chunk, int_missing)
+        for fill in resolved:
+            chunk = fill.apply(chunk)
+        summary["rows_removed"] += rows_in - len(chunk)
+        summary["missing_after"] += int(chunk.isna().sum().sum())
+        chunk.to_csv(output_path, index=False, mode="w" if header else "a", header=header)
+        header = False
+    summary["passes"] = passes + 1
+    return summary
+
+
+def scan_csv(input_path, memory_budget_mb=256, sample_rows=10_000, mode_columns=()):
+    """
+    Profil pliku CSV bez wczytywania go w całości: liczba wierszy, braki w kolumnach,
+    średnie kolumn numerycznych i liczności wartości dla kolumn z mode_columns.
+    """
+    rows, missing, sums, counts, value_counts = 0, None, None, None, {}
+    for chunk in iter_csv_chunks(input_path, memory_budget_mb, sample_rows):
+        rows += len(chunk)
+        missing = _add_counts(missing, chunk.isna().sum())
+        numeric = chunk.select_dtypes(include="number")
+        sums = _add_counts(sums, numeric.sum())
+        counts = _add_counts(counts, numeric.count())
+        for col in mode_columns:
+            value_counts[col] = _add_counts(value_counts.get(col), chunk[col].value_counts())
+    return {
+        "rows": rows,
+        "missing": missing.astype(int) if missing is not None else pd.Series(dtype=int),
+        "mean": (sums / counts) if sums is not None else pd.Series(dtype=float),
+        "value_counts": value_counts,
+    }
@@ -3,38 +3,84 @@ import seaborn as sns
 import pandas as pd
 import tkinter.messagebox as msg
 import numpy as np
+from logic.cleaning import clean_column
+from logic.perf import instrumented
 
-def show_missing_heatmap(df):
+@instrumented()
+def missing_heatmap_data(df, max_bins=500):
+    """
+    Przygotowuje dane mapy ciepła braków (bez rysowania - można wywołać poza wątkiem GUI).
+    Wiersze są łączone w co najwyżej max_bins bloków, a komórka to udział braków w bloku,
+    więc rozmiar rysunku nie zależy od liczby wierszy. Liczby i procenty braków są dokładne.
+    """
+    n_rows = len(df)
+    n_bins = max(1, min(n_rows, max_bins))
+    edges = np.linspace(0, n_rows, n_bins + 1).astype(np.int64)
+    starts = edges[:-1]
+    sizes = np.maximum(np.diff(edges), 1)
+    matrix = np.zeros((n_bins, len(df.columns)), dtype=np.float32)
+    missing_count = np.zeros(len(df.columns), dtype=np.int64)
+    # Kolumna po kolumnie, żeby nie budować całej macierzy df.isnull() naraz
+    for j, col in enumerate(df.columns):
+        mask = df[col].isna().to_numpy()
+        missing_count[j] = mask.sum()
+        if n_rows:
+            matrix[:, j] = np.add.reduceat(mask, starts, dtype=np.int64) / sizes
+    return {
+        "matrix": matrix,
+        "columns": list(df.columns),
+        "rows": n_rows,
+        "rows_per_bin": n_rows / n_bins,
+        # Procent i liczba braków dla każdej kolumny
+        "percent_missing": pd.Series(missing_count / max(n_rows, 1) * 100, index=df.columns),
+        "missing_count": pd.Series(missing_count, index=df.columns),
+    }
+
+def plot_missing_heatmap(data):
+    """Rysuje mapę ciepła braków z danych z missing_heatmap_data() jako obraz (udział braków w blokach wierszy)."""
     plt.figure(figsize=(12, 6))
-    # Oblicz procent braków dla każdej kolumny
-    percent_missing = df.isnull().mean() * 100
-    # Oblicz liczbę braków dla każdej kolumny
-    missing_count = df.isnull().sum()
+    percent_missing = data["percent_missing"]
+    missing_count = data["missing_count"]
+    columns = data["columns"]
+
+    ax = plt.gca()
+    image = ax.imshow(data["matrix"], aspect="auto", cmap="YlOrRd", vmin=0, vmax=1, interpolation="nearest")
+    plt.colorbar(image, ax=ax, fraction=0.03, pad=0.01, label="Udział braków w bloku wierszy")
+    ax.set_yticks([])
+    if data["rows_per_bin"] > 1:
+        ax.set_ylabel(f"Wiersze (bloki po ok. {data['rows_per_bin']:.0f})")
+    else:
+        ax.set_ylabel("Wiersze")
 
-    sns.heatmap(df.isnull(), cbar=False, cmap="YlOrRd", yticklabels=False)
-    
     plt.title("Mapa ciepła braków danych")
     # Domyślne etykiety kolumn
-    plt.xticks(ticks=range(len(df.columns)), labels=df.columns, rotation=45, ha='right', fontsize=10)
+    plt.xticks(ticks=range(len(columns)), labels=columns, rotation=45, ha='right', fontsize=10)
+    ax.tick_params(axis='x', pad=16)
     # Dodaj informację o procentach i liczbie braków pod każdą kolumną
-    ax = plt.gca()
-    ylim = ax.get_ylim()
-    for i, col in enumerate(df.columns):
-        percent = percent_missing[i]
-        count = missing_count[i]
+    for i, col in enumerate(columns):
+        percent = percent_missing.iloc[i]
+        count = missing_count.iloc[i]
         percent_str = f"{percent:.0f}%" if percent >= 1 else ("<1%" if percent > 0 else "0%")
         label = f"{percent_str} - {count}"
-        ax.text(i, ylim[0] - 0.5, label, ha='center', va='top', color='black', fontsize=10, fontweight='bold', rotation=0)
+        ax.text(i, -0.01, label, transform=ax.get_xaxis_transform(), ha='center', va='top', color='black', fontsize=10, fontweight='bold', rotation=0)
     plt.tight_layout()
     plt.show()
 
-def show_value_counts(series):
-    series = series.astype(str).str.strip()
-    series = series.replace(
-        to_replace=[r'^\s*$', 'nan', 'NaN', 'null', 'None', '<NA>'],
-        value=pd.NA,
-        regex=True
-    )
+def show_missing_heatmap(df):
+    plot_missing_heatmap(missing_heatmap_data(df))
+
+@instrumented()
+def value_counts_data(series, clean=True):
+    """
+    Przygotowuje liczności wartości (lub przedziałów dla danych liczbowych) do histogramu.
+    Zwraca (liczności, etykiety, czy_numeryczne); bez rysowania - można wywołać poza wątkiem GUI.
+    clean=False pomija czyszczenie, gdy kolumna przeszła już przez clean_column().
+    """
+    if clean:
+        series = clean_column(series)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Bez nieużywanych kategorii (inaczej pojawiłyby się słupki o zerowej liczności)
+        series = series.astype(object)
 
     null_count = series.isna().sum()
     cleaned = series.dropna()
@@ -69,14 +115,16 @@ def show_value_counts(series):
                 labels.append("Brak danych")
 
         except Exception as e:
-            msg.showerror("Błąd", f"Nie udało się stworzyć przedziałów:\n{e}")
-            return
+            raise ValueError(f"Nie udało się stworzyć przedziałów:\n{e}") from e
     else:
         counts = cleaned.value_counts()
         if null_count > 0:
             counts = pd.concat([counts, pd.Series({'Brak danych': null_count})])
         labels = counts.index.astype(str)
+    return counts, labels, is_numeric
 
+def plot_value_counts(counts, labels, is_numeric):
+    """Rysuje histogram z danych z value_counts_data()."""
     if is_numeric:
         # Dla typów numerycznych pionowe słupki
         plt.figure(figsize=(max(10, len(counts) * 0.5), 5))
@@ -98,3 +146,11 @@ def show_value_counts(series):
             ax.text(v + max(counts.values)*0.01, i, str(v), ha='left', va='center', fontsize=10, fontweight='bold')
     plt.tight_layout()
     plt.show()
+
+def show_value_counts(series):
+    try:
+        data = value_counts_data(series)
+    except ValueError as e:
+        msg.showerror("Błąd", str(e))
+        return
+    plot_value_counts(*data)
@@ -0,0 +1,146 @@
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+
+import numpy as np
+import pandas as pd
+
+
+class VirtualColumnView(ttk.Frame):
+    """
+    Widok jednej kolumny, który renderuje tylko widoczne wiersze i dociąga kolejne przy przewijaniu,
+    zamiast wstawiać do pola tekstowego całą kolumnę. Pozycje braków są liczone raz, przy ustawieniu danych.
+    """
+
+    def __init__(self, master, font=("Consolas", 11)):
+        super().__init__(master, style="TFrame")
+        self.font = tkfont.Font(font=font)
+        text_options = dict(font=font, bg="#f8fafd", fg="#222", relief=tk.FLAT, borderwidth=2, highlightbackground="#4078c0", highlightcolor="#4078c0")
+
+        self.header = tk.Text(self, wrap=tk.WORD, height=5, **text_options)
+        self.header.pack(side="top", fill="x")
+
+        toolbar = ttk.Frame(self, style="TFrame")
+        toolbar.pack(side="top", fill="x", pady=4)
+        self.next_missing_button = ttk.Button(toolbar, text="Następny brak ▼", style="TButton", command=self.jump_to_next_missing)
+        self.next_missing_button.pack(side="left")
+        self.position_label = ttk.Label(toolbar, text="", style="TLabel")
+        self.position_label.pack(side="left", padx=8)
+
+        body = ttk.Frame(self, style="TFrame")
+        body.pack(side="top", fill="both", expand=True)
+        self.scrollbar = ttk.Scrollbar(body, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.body = tk.Text(body, wrap=tk.NONE, cursor="arrow", **text_options)
+        self.body.pack(side="left", fill="both", expand=True)
+        self.body.tag_configure("missing", background="#fde2e2")
+        self.body.tag_configure("current", background="#ffd27f")
+
+        self.body.bind("<Configure>", lambda e: self._render())
+        self.body.bind("<MouseWheel>", self._on_mousewheel)
+        self.body.bind("<Button-4>", lambda e: self.scroll_by(-3))
+        self.body.bind("<Button-5>", lambda e: self.scroll_by(3))
+        self.body.bind("<Up>", lambda e: self.scroll_by(-1))
+        self.body.bind("<Down>", lambda e: self.scroll_by(1))
+        self.body.bind("<Prior>", lambda e: self.scroll_by(-self.visible_rows))
+        self.body.bind("<Next>", lambda e: self.scroll_by(self.visible_rows))
+        self.body.bind("<Home>", lambda e: self.scroll_to(0))
+        self.body.bind("<End>", lambda e: self.scroll_to(self.row_count))
+
+        self.series = None
+        self.offset = 0
+        self.null_positions = np.array([], dtype=np.int64)
+        self.current_row = None
+
+    @property
+    def row_count(self):
+        return 0 if self.series is None else len(self.series)
+
+    @property
+    def visible_rows(self):
+        height = self.body.winfo_height()
+        if height <= 1:
+            height = int(self.body.cget("height")) * self.font.metrics("linespace")
+        return max(1, height // self.font.metrics("linespace"))
+
+    def set_data(self, series, header_lines, null_positions=None):
+        """Ustawia kolumnę do wyświetlenia. null_positions to opcjonalnie gotowy indeks pozycji braków."""
+        self.series = series
+        if null_positions is None:
+            null_positions = np.flatnonzero(series.isna().to_numpy())
+        self.null_positions = null_positions
+        self.offset = 0
+        self.current_row = None
+        self._set_header("\n".join(header_lines))
+        self.next_missing_button.config(state="normal" if len(self.null_positions) else "disabled")
+        self.position_label.config(text="")
+        self._render()
+
+    def show_message(self, text):
+        self.series = None
+        self.null_positions = np.array([], dtype=np.int64)
+        self._set_header(text)
+        self.position_label.config(text="")
+        self._render()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.offset + rows)
+        return "break"
+
+    def scroll_to(self, row):
+        max_offset = max(0, self.row_count - self.visible_rows)
+        self.offset = int(min(max(0, row), max_offset))
+        self._render()
+        return "break"
+
+    def jump_to_next_missing(self):
+        """Przechodzi do następnego brakującego wiersza (po ostatnim wskazanym lub po pierwszym widocznym)."""
+        if not len(self.null_positions):
+            return
+        start = self.current_row + 1 if self.current_row is not None else self.offset
+        i = int(np.searchsorted(self.null_positions, start))
+        if i >= len(self.null_positions):
+            i = 0  # zawijanie na początek kolumny
+        self.current_row = int(self.null_positions[i])
+        self.position_label.config(text=f"Brak {i + 1} z {len(self.null_positions)} (wiersz {self.current_row + 1})")
+        self.scroll_to(self.current_row - self.visible_rows // 3)
+
+    def _set_header(self, text):
+        self.header.config(state="normal")
+        self.header.delete("1.0", tk.END)
+        self.header.insert(tk.END, text)
+        self.header.config(state="disabled")
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self.scroll_to(int(float(args[0]) * self.row_count))
+        elif action == "scroll":
+            amount, unit = int(args[0]), args[1]
+            self.scroll_by(amount * (self.visible_rows if unit == "pages" else 1))
+
+    def _on_mousewheel(self, event):
+        return self.scroll_by(-3 if event.delta > 0 else 3)
+
+    def _render(self):
+        self.body.config(state="normal")
+        self.body.delete("1.0", tk.END)
+        n = self.row_count
+        if n == 0:
+            self.scrollbar.set(0, 1)
+            self.body.config(state="disabled")
+            return
+        start = self.offset
+        stop = min(n, start + self.visible_rows)
+        width = len(str(n))
+        window = self.series.iloc[start:stop]
+        lines, tags = [], []
+        for row, value in zip(range(start, stop), window.tolist()):
+            missing = pd.isna(value)
+            lines.append(f"{row + 1:>{width}}  {'NaN' if missing else value}")
+            tags.append("current" if row == self.current_row else ("missing" if missing else None))
+        self.body.insert(tk.END, "\n".join(lines))
+        for i, tag in enumerate(tags):
+            if tag:
+                self.body.tag_add(tag, f"{i + 1}.0", f"{i + 1}.end")
+        self.body.config(state="disabled")
+        self.scrollbar.set(start / n, stop / n)
@@ -0,0 +1,141 @@
+import collections
+import queue
+import threading
+
+
+class JobCancelled(Exception):
+    """Zgłaszany przez Job.check_cancelled(), gdy użytkownik anulował zadanie."""
+
+
+class Job:
+    """Pojedyncze zadanie w tle. Funkcja zadania dostaje obiekt Job, żeby raportować postęp i sprawdzać anulowanie."""
+
+    def __init__(self, name, func, on_success=None, on_error=None):
+        self.name = name
+        self.func = func
+        self.on_success = on_success
+        self.on_error = on_error
+        self.progress = None  # None = postęp nieokreślony, inaczej ułamek 0..1
+        self.message = ""
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def report(self, progress=None, message=None):
+        """Wywoływane z wątku roboczego; interfejs odczytuje te wartości przy najbliższym odświeżeniu."""
+        self.progress = progress
+        if message is not None:
+            self.message = message
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+
+class JobQueue:
+    """
+    Kolejka zadań wykonywanych po jednym w wątku roboczym.
+    Wyniki wracają do wątku Tk przez root.after(); kolejne zadanie startuje dopiero po obsłużeniu
+    wyniku poprzedniego, więc zadania zawsze widzą self.df po wszystkich wcześniejszych zmianach.
+    Anulowanie jest kooperacyjne: zadania oczekujące są pomijane, a wynik trwającego jest odrzucany.
+    """
+
+    def __init__(self, root, on_change=None, poll_ms=100):
+        self.root = root
+        self.on_change = on_change
+        self.poll_ms = poll_ms
+        self.current = None
+        self._pending = collections.deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._results = queue.Queue()
+        self._committed = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="job-worker", daemon=True)
+        self._worker.start()
+        self.root.after(self.poll_ms, self._poll)
+
+    @property
+    def pending(self):
+        with self._lock:
+            return list(self._pending)
+
+    @property
+    def busy(self):
+        return self.current is not None or bool(self.pending)
+
+    def submit(self, name, func, on_success=None, on_error=None):
+        """Dodaje zadanie do kolejki. func(job) działa w tle, on_success(wynik) i on_error(wyjątek) w wątku Tk."""
+        job = Job(name, func, on_success, on_error)
+        with self._lock:
+            self._pending.append(job)
+        self._wakeup.set()
+        self._notify()
+        return job
+
+    def cancel_current(self):
+        job = self.current
+        if job is not None:
+            job.cancel()
+            self._notify()
+
+    def clear_pending(self):
+        with self._lock:
+            jobs = list(self._pending)
+            self._pending.clear()
+        for job in jobs:
+            job.cancel()
+        self._notify()
+
+    def _next_job(self):
+        while True:
+            with self._lock:
+                if self._pending:
+                    return self._pending.popleft()
+                self._wakeup.clear()
+            self._wakeup.wait()
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job.cancelled:
+                continue
+            self.current = job
+            try:
+                result, error = job.func(job), None
+            except Exception as e:
+                result, error = None, e
+            self._committed.clear()
+            self._results.put((job, result, error))
+            # Czekaj, aż wątek Tk zastosuje wynik, zanim ruszy następne zadanie
+            self._committed.wait()
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    job, result, error = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    if job.cancelled or isinstance(error, JobCancelled):
+                        pass
+                    elif error is not None:
+                        if job.on_error is not None:
+                            job.on_error(error)
+                    elif job.on_success is not None:
+                        job.on_success(result)
+                finally:
+                    self.current = None
+                    self._committed.set()
+            self._notify()
+        finally:
+            self.root.after(self.poll_ms, self._poll)
+
+    def _notify(self):
+        if self.on_change is not None:
+            self.on_change(self.current, self.pending)
@@ -1,11 +1,22 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from logic.file_loader import load_file
-from logic.cleaning import clean_column, remove_rows_with_missing
-from logic.visualizations import show_missing_heatmap, show_value_counts
-from logic.methods import fillna_mean, fillna_median, fillna_group_mean, fillna_group_mode
-from logic.exporter import export_dataframe
+from logic.file_loader import load_file, memory_usage_mb, optimize_dtypes, OPEN_FILE_TYPES
+from logic.cleaning import remove_rows_with_missing
+from logic.visualizations import missing_heatmap_data, plot_missing_heatmap, plot_value_counts
+from logic.methods import fillna_mean, fillna_median, fillna_group_mean, fillna_group_mode, is_text_dtype
+from logic.profile import ProfileStore
+from logic.exporter import save_dataframe, SAVE_FILE_TYPES
+from logic.encoding import CategoricalEncoding
+from logic.cache import FileCache
+from logic.splitting import duplicate_paths, split_positions, write_partitions
+from logic.mcar import little_mcar_test, describe_mcar_result
+from logic.history import History, CellChanges, ColumnChange, RowRemoval
+from logic.perf import PerfLog, get_log, set_log, profile_call, summarize
+from logic.planner import propose_plan, methods_for, order_plan, schedule, run_plan, merge_steps, step_columns, GROUP_METHODS
+from ui.jobs import JobQueue
+from ui.column_view import VirtualColumnView
 import pandas as pd
+import time
 
 class ExcelViewerApp:
     def __init__(self, root):
@@ -13,6 +24,18 @@ class ExcelViewerApp:
         self.root.title("Uzupełnianie braków w danych")
         self.root.geometry("1000x700")
         self.df = None
+        self.profiles = ProfileStore()
+        self.encoding = CategoricalEncoding()
+        # Kopie wczytanych plików CSV/Excel - ponowne otwarcie bez parsowania
+        self.file_cache = FileCache()
+        # Historia zmian (cofnij / ponów) - tylko zmienione komórki i usunięte wiersze
+        self.history = History()
+        # Dziennik wydajności operacji (JSONL z rotacją); bez zapisu, jeśli katalogu nie da się utworzyć
+        try:
+            set_log(PerfLog())
+        except OSError:
+            set_log(None)
+        self._profile_next = False
 
         self.style = ttk.Style()
         self.style.theme_use('clam')
@@ -42,6 +65,20 @@ class ExcelViewerApp:
         self.close_button = tk.Button(self.header_frame, text="✖", bg="#4078c0", fg="#fff", font=("Helvetica", 12, "bold"), borderwidth=0, command=self.root.destroy, activebackground="#305080", activeforeground="#fff")
         self.close_button.place(relx=1.0, x=-10, y=10, anchor="ne")
 
+        # Pasek stanu zadań w tle (na dole okna)
+        self.status_frame = ttk.Frame(self.main_frame, style="TFrame")
+        self.status_frame.pack(side="bottom", fill="x", padx=8, pady=4)
+        self.status_label = ttk.Label(self.status_frame, text="Gotowe", style="TLabel")
+        self.status_label.pack(side="left", padx=8)
+        self.progress_bar = ttk.Progressbar(self.status_frame, mode="indeterminate", length=200)
+        self.progress_bar.pack(side="left", padx=8)
+        self.cancel_job_button = ttk.Button(self.status_frame, text="Anuluj", command=lambda: self.jobs.cancel_current(), state="disabled")
+        self.cancel_job_button.pack(side="left", padx=4)
+        self.clear_jobs_button = ttk.Button(self.status_frame, text="Wyczyść kolejkę", command=lambda: self.jobs.clear_pending(), state="disabled")
+        self.clear_jobs_button.pack(side="left", padx=4)
+        self._df_version = 0
+        self.jobs = JobQueue(self.root, on_change=self._update_job_status)
+
         # Strona startowa
         self.start_frame = ttk.Frame(self.main_frame, padding=32, style="TFrame")
         self.start_frame.pack(fill="both", expand=True)
@@ -49,19 +86,32 @@ class ExcelViewerApp:
         self.welcome_label.pack(pady=40)
         self.start_load_button = ttk.Button(self.start_frame, text="Wczytaj dane", style="TButton", command=self.load_file)
         self.start_load_button.pack(pady=20)
+        # Tryb oszczędzania pamięci: zwarte typy kolumn przy wczytywaniu
+        self.optimize_memory_var = tk.BooleanVar(value=False)
+        self.start_optimize_check = ttk.Checkbutton(self.start_frame, text="Oszczędzaj pamięć (zwarte typy kolumn)", variable=self.optimize_memory_var)
+        self.start_optimize_check.pack()
 
     # Główny widok (ukryty na starcie)
         self.top_frame = ttk.Frame(self.main_frame, style="TFrame")
         self.visual_frame = ttk.Frame(self.main_frame, style="TFrame")
-        self.text_area = tk.Text(self.main_frame, wrap=tk.WORD, font=("Consolas", 11), width=100, height=30, bg="#f8fafd", fg="#222", relief=tk.FLAT, borderwidth=2, highlightbackground="#4078c0", highlightcolor="#4078c0")
+        self.column_view = VirtualColumnView(self.main_frame)
 
     # Pozostałe elementy głównego widoku
         self.load_button = ttk.Button(self.top_frame, text="Wczytaj plik", style="TButton", command=self.load_file)
+        self.optimize_check = ttk.Checkbutton(self.top_frame, text="Oszczędzaj pamięć", variable=self.optimize_memory_var)
         self.column_label = ttk.Label(self.top_frame, text="Wybierz kolumnę:", style="TLabel")
         self.column_combobox = ttk.Combobox(self.top_frame, state="readonly", width=60, style="TCombobox")
         self.column_combobox.bind("<<ComboboxSelected>>", self.display_column)
         self.fillna_button = ttk.Button(self.top_frame, text="Uzupełnij dane", style="TButton", command=self.open_fillna_dialog)
+        self.plan_button = ttk.Button(self.top_frame, text="Uzupełnij cały zbiór", style="TButton", command=self.open_plan_dialog)
+        self.undo_button = ttk.Button(self.top_frame, text="Cofnij", style="TButton", command=self.undo, state="disabled")
+        self.redo_button = ttk.Button(self.top_frame, text="Ponów", style="TButton", command=self.redo, state="disabled")
+        self.root.bind("<Control-z>", self.undo)
+        self.root.bind("<Control-y>", self.redo)
+        self.root.bind("<Control-Z>", self.redo)
         self.heatmap_button = ttk.Button(self.visual_frame, text="Pokaż mapę ciepła braków", style="TButton", command=self.show_missing_heatmap)
+        self.mcar_button = ttk.Button(self.visual_frame, text="Test MCAR Little'a", style="TButton", command=self.show_mcar_test)
+        self.perf_button = ttk.Button(self.visual_frame, text="Wydajność", style="TButton", command=self.show_perf_panel)
         self.barplot_button = ttk.Button(self.visual_frame, text="Pokaż histogram wartości", style="TButton", command=self.show_value_counts)
         # Przycisk Zapisz z menu rozwijanym (tworzony tylko raz)
         self.save_menu_button = ttk.Menubutton(self.visual_frame, text="Zapisz ▼", style="TButton")
@@ -76,21 +126,27 @@ class ExcelViewerApp:
         # Ukryj widoki, jeśli były już pokazane
         self.top_frame.pack_forget()
         self.visual_frame.pack_forget()
-        self.text_area.pack_forget()
+        self.column_view.pack_forget()
     # Tylko pakowanie przycisku (nie tworzymy go ponownie)
         self.save_menu_button.pack(side="right", padx=8, pady=4)
         self.top_frame.pack(side="top", fill="x", pady=16)
         self.load_button.config(text="Wczytaj inny plik")
         self.load_button.pack(side="left", padx=8, pady=4)
+        self.optimize_check.pack(side="left", padx=4)
         self.column_label.pack(side="left", padx=8)
         self.column_combobox.pack(side="left", padx=8)
         self.fillna_button.pack(side="left", padx=8, pady=4)
+        self.plan_button.pack(side="left", padx=8, pady=4)
+        self.undo_button.pack(side="left", padx=4, pady=4)
+        self.redo_button.pack(side="left", padx=4, pady=4)
 
         self.visual_frame.pack(side="top", fill="x", pady=8)
         self.heatmap_button.pack(side="left", padx=8, pady=4)
+        self.mcar_button.pack(side="left", padx=8, pady=4)
+        self.perf_button.pack(side="left", padx=8, pady=4)
         self.barplot_button.pack(side="left", padx=8, pady=4)
         self.save_menu_button.pack(side="right", padx=8, pady=4)
-        self.text_area.pack(fill="both", expand=True, pady=16, padx=8)
+        self.column_view.pack(fill="both", expand=True, pady=16, padx=8)
         # Po wczytaniu pliku automatycznie wyświetl dane z pierwszej kolumny
 
         if self.df is not None and len(self.df.columns) > 0:
@@ -130,6 +186,14 @@ class ExcelViewerApp:
         test_entry = tk.Entry(frame, width=5)
         test_entry.grid(row=0, column=5, padx=5)
         test_entry.insert(0, "15")
+        # Sposób podziału: losowy, warstwowy (proporcje kolumny) lub grupowy (wiersze z tym samym kluczem razem)
+        mode_frame = tk.Frame(split_dialog, bg="#fff")
+        mode_frame.pack(pady=5, padx=10, fill="x")
+        mode_var = tk.StringVar(value="random")
+        for text, value in (("Losowy", "random"), ("Warstwowy wg kolumny", "stratified"), ("Grupowy wg kolumny", "group")):
+            tk.Radiobutton(mode_frame, text=text, variable=mode_var, value=value, bg="#fff", anchor="w").pack(side="left", padx=5)
+        split_column = ttk.Combobox(split_dialog, state="readonly", values=list(self.df.columns), width=40)
+        split_column.pack(pady=5)
         def do_split_and_export():
             try:
                 train_pct = float(train_entry.get())
@@ -139,66 +203,90 @@ class ExcelViewerApp:
                 if abs(total - 100) > 0.1:
                     messagebox.showerror("Błąd podziału", "Suma procentów musi wynosić 100%.")
                     return
-                # Podział danych
-                df_shuffled = self.df.sample(frac=1, random_state=42).reset_index(drop=True)
-                n = len(df_shuffled)
-                train_end = int(n * train_pct / 100)
-                val_end = train_end + int(n * val_pct / 100)
-                df_train = df_shuffled.iloc[:train_end]
-                df_val = df_shuffled.iloc[train_end:val_end]
-                df_test = df_shuffled.iloc[val_end:]
+                mode = mode_var.get()
+                column = split_column.get() or None
+                if mode != "random" and column is None:
+                    messagebox.showerror("Błąd podziału", "Wybierz kolumnę do podziału warstwowego lub grupowego.")
+                    return
                 # Zapytaj o ścieżki zapisu
-                train_path = filedialog.asksaveasfilename(defaultextension=".csv", title="Zapisz dane treningowe", initialfile="Dane treningowe.csv", filetypes=[("CSV files", "*.csv")])
+                train_path = filedialog.asksaveasfilename(defaultextension=".csv", title="Zapisz dane treningowe", initialfile="Dane treningowe.csv", filetypes=SAVE_FILE_TYPES)
                 if not train_path:
                     return
-                val_path = filedialog.asksaveasfilename(defaultextension=".csv", title="Zapisz dane walidacyjne", initialfile="Dane walidacyjne.csv", filetypes=[("CSV files", "*.csv")])
+                val_path = filedialog.asksaveasfilename(defaultextension=".csv", title="Zapisz dane walidacyjne", initialfile="Dane walidacyjne.csv", filetypes=SAVE_FILE_TYPES)
                 if not val_path:
                     return
-                test_path = filedialog.asksaveasfilename(defaultextension=".csv", title="Zapisz dane testowe", initialfile="Dane testowe.csv", filetypes=[("CSV files", "*.csv")])
+                test_path = filedialog.asksaveasfilename(defaultextension=".csv", title="Zapisz dane testowe", initialfile="Dane testowe.csv", filetypes=SAVE_FILE_TYPES)
                 if not test_path:
                     return
-                # Eksport plików
-                df_train.to_csv(train_path, index=False)
-                df_val.to_csv(val_path, index=False)
-                df_test.to_csv(test_path, index=False)
-                messagebox.showinfo("Sukces", f"Dane zostały podzielone i wyeksportowane jako:\n'{train_path}', '{val_path}', '{test_path}'")
-                split_dialog.destroy()
+                duplicates = duplicate_paths((train_path, val_path, test_path))
+                if duplicates:
+                    messagebox.showerror("Błąd podziału", f"Każda próbka musi mieć osobny plik. Wybrano kilka razy: {', '.join(duplicates)}")
+                    return
             except Exception as e:
                 messagebox.showerror("Błąd", f"Wystąpił błąd podczas podziału danych:\n{e}")
+                return
+
+            def split_and_export(job):
+                # Podział na pozycjach wierszy - bez tasowania kopii całej ramki
+                fractions = (train_pct / 100, val_pct / 100, test_pct / 100)
+                parts = split_positions(self.df, fractions, mode, column)
+                # Eksport plików (równolegle, każda próbka prosto z self.df)
+                write_partitions(self.df, parts, (train_path, val_path, test_path), job)
+
+            split_dialog.destroy()
+            self.run_job(
+                "Podział i eksport danych", split_and_export,
+                lambda _: messagebox.showinfo("Sukces", f"Dane zostały podzielone i wyeksportowane jako:\n'{train_path}', '{val_path}', '{test_path}'"),
+                "Wystąpił błąd podczas podziału danych",
+            )
         ttk.Button(split_dialog, text="Podziel i eksportuj", command=do_split_and_export).pack(pady=10)
         ttk.Button(split_dialog, text="Anuluj", command=split_dialog.destroy).pack(pady=5)
 
     def load_file(self):
-        file_types = [("CSV files", "*.csv"), ("Excel files", "*.xlsx;*.xls")]
-        file_path = filedialog.askopenfilename(filetypes=file_types)
+        file_path = filedialog.askopenfilename(filetypes=OPEN_FILE_TYPES)
         if not file_path:
             return
-        self.loaded_file_path = file_path  # zapisz ścieżkę do pliku
-        try:
-            self.df = load_file(file_path)
-            if self.df is None or len(self.df.columns) == 0:
+
+        optimize = self.optimize_memory_var.get()
+
+        def load(job):
+            df = load_file(file_path, cache=self.file_cache)
+            if not optimize:
+                return df, None
+            before = memory_usage_mb(df)
+            df = optimize_dtypes(df)
+            return df, (before, memory_usage_mb(df))
+
+        def loaded(result):
+            df, memory = result
+            if df is None or len(df.columns) == 0:
                 messagebox.showerror("Błąd", "Plik nie zawiera danych lub nagłówków.")
                 return
-            col_with_types = [f"{col} ({self.df[col].dtype})" for col in self.df.columns]
+            self.loaded_file_path = file_path  # zapisz ścieżkę do pliku
+            self.df = df
+            self._df_version += 1
+            self.profiles.invalidate()
+            self.encoding.invalidate()
+            self.history.clear()
+            self._update_history_buttons()
             self.show_main_view()
-        except Exception as e:
-            messagebox.showerror("Błąd", f"Nie udało się wczytać pliku:\n{e}")
+            if memory is not None:
+                messagebox.showinfo("Pamięć", f"Zajętość pamięci danych: {memory[0]:.1f} MB → {memory[1]:.1f} MB")
+
+        self.run_job(f"Wczytywanie: {file_path}", load, loaded, "Nie udało się wczytać pliku")
 
     def save_as_dialog(self):
         if self.df is None:
             messagebox.showwarning("Brak danych", "Najpierw wczytaj plik.")
             return
-        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv"), ("Excel files", "*.xlsx;*.xls")], title="Zapisz jako")
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=SAVE_FILE_TYPES, title="Zapisz jako")
         if not file_path:
             return
-        try:
-            if file_path.endswith(".csv"):
-                self.df.to_csv(file_path, index=False)
-            else:
-                self.df.to_excel(file_path, index=False)
-            messagebox.showinfo("Sukces", f"Dane zostały zapisane do pliku: {file_path}")
-        except Exception as e:
-            messagebox.showerror("Błąd", f"Nie udało się zapisać danych:\n{e}")
+        self.run_job(
+            f"Zapis: {file_path}", lambda job: save_dataframe(self.df, file_path),
+            lambda _: messagebox.showinfo("Sukces", f"Dane zostały zapisane do pliku: {file_path}"),
+            "Nie udało się zapisać danych",
+        )
 
     def display_column(self, event=None):
         selected_item = self.column_combobox.get()
@@ -206,37 +294,43 @@ class ExcelViewerApp:
             return
 
         column_name = selected_item.split(" (")[0]
-        self.text_area.delete("1.0", tk.END)
 
         try:
-            column_data = self.df[column_name].copy()
-            column_data = clean_column(column_data)
-
-            # Sprawdź, czy dane da się zrzutować na float
-            converted_data = column_data.dropna()
-            try:
-                converted_data = converted_data.astype(float)
-                data_type = "float"
-            except:
-                data_type = "object"
+            # Profil (wyczyszczona kolumna, typ, braki) jest liczony raz i pamiętany do zmiany kolumny
+            profile = self.profiles.get(self.df, column_name)
+            column_data = profile.cleaned
+            data_type = profile.data_type
+            null_positions = profile.cleaned_null_positions
 
             total = len(column_data)
-            missing = column_data.isna().sum()
+            missing = len(null_positions)
             percent_missing = (missing / total) * 100
 
-            self.text_area.insert(tk.END, f"📊 Profil kolumny '{column_name}':\n")
-            self.text_area.insert(tk.END, f"- Typ danych: {data_type}\n")
-            self.text_area.insert(tk.END, f"- Liczba rekordów: {total}\n")
-            self.text_area.insert(tk.END, f"- Liczba braków: {missing} ({percent_missing:.2f}%)\n\n")
-            self.text_area.insert(tk.END, column_data.to_string(index=False))
+            # Wyświetlane są tylko widoczne wiersze - bez budowania tekstu całej kolumny
+            self.column_view.set_data(column_data, [
+                f"📊 Profil kolumny '{column_name}':",
+                f"- Typ danych: {data_type}",
+                f"- Liczba rekordów: {total}",
+                f"- Liczba braków: {missing} ({percent_missing:.2f}%)",
+            ], null_positions=null_positions)
         except Exception as e:
-            self.text_area.insert(tk.END, f"Błąd odczytu danych:\n{e}")
+            self.column_view.show_message(f"Błąd odczytu danych:\n{e}")
 
     def show_missing_heatmap(self):
         if self.df is None:
             messagebox.showwarning("Brak danych", "Najpierw wczytaj plik.")
             return
-        show_missing_heatmap(self.df)
+        self.run_job("Przygotowanie mapy ciepła", lambda job: missing_heatmap_data(self.df), plot_missing_heatmap, "Nie udało się przygotować mapy ciepła")
+
+    def show_mcar_test(self):
+        if self.df is None:
+            messagebox.showwarning("Brak danych", "Najpierw wczytaj plik.")
+            return
+        self.run_job(
+            "Test MCAR Little'a", lambda job: little_mcar_test(self.df),
+            lambda result: messagebox.showinfo("Test MCAR Little'a", describe_mcar_result(result)),
+            "Nie udało się wykonać testu MCAR",
+        )
 
     def show_value_counts(self):
         selected_item = self.column_combobox.get()
@@ -244,7 +338,66 @@ class ExcelViewerApp:
             messagebox.showwarning("Brak kolumny", "Wybierz kolumnę.")
             return
         column_name = selected_item.split(" (")[0]
-        show_value_counts(self.df[column_name])
+        self.run_job(
+            f"Przygotowanie histogramu: {column_name}", lambda job: self.profiles.get(self.df, column_name).value_counts,
+            lambda data: plot_value_counts(*data), "Nie udało się przygotować histogramu",
+        )
+
+    def show_perf_panel(self):
+        """Okno z ostatnimi pomiarami operacji, zestawieniem według metod i profilowaniem następnej operacji."""
+        log = get_log()
+        panel = tk.Toplevel(self.root)
+        panel.title("Wydajność")
+        panel.geometry("900x520")
+        if log is None:
+            ttk.Label(panel, text="Dziennik wydajności jest wyłączony.").pack(padx=10, pady=10)
+            return
+        ttk.Label(panel, text=f"Dziennik: {log.path}").pack(anchor="w", padx=10, pady=(8, 0))
+        columns = ("name", "wall_s", "cpu_s", "peak_mb", "rows", "cols", "time")
+        headings = ("Operacja", "Czas [s]", "CPU [s]", "Pamięć [MB]", "Wiersze", "Kolumny", "Godzina")
+        summary_columns = ("name", "count", "wall_s", "mean_wall_s", "cpu_s", "max_peak_mb")
+        summary_headings = ("Operacja", "Liczba", "Łącznie [s]", "Średnio [s]", "CPU [s]", "Maks. pamięć [MB]")
+        trees = []
+        for cols, heads, height in ((columns, headings, 12), (summary_columns, summary_headings, 6)):
+            tree = ttk.Treeview(panel, columns=cols, show="headings", height=height)
+            for col, head in zip(cols, heads):
+                tree.heading(col, text=head)
+                tree.column(col, width=220 if col == "name" else 90, anchor="w" if col == "name" else "e")
+            tree.pack(fill="both", expand=True, padx=10, pady=6)
+            trees.append(tree)
+        recent_tree, summary_tree = trees
+
+        def fmt(value):
+            return "" if value is None or value != value else (f"{value:.3f}" if isinstance(value, float) else value)
+
+        def refresh():
+            records = log.recent()
+            for tree in trees:
+                tree.delete(*tree.get_children())
+            for record in reversed(records):
+                recent_tree.insert("", tk.END, values=[fmt(record.get(c)) for c in columns])
+            for row in summarize(records).itertuples(index=False):
+                summary_tree.insert("", tk.END, values=[fmt(getattr(row, c)) for c in summary_columns])
+
+        profile_var = tk.BooleanVar(value=self._profile_next)
+
+        def toggle_profile():
+            self._profile_next = profile_var.get()
+
+        btn_frame = ttk.Frame(panel)
+        btn_frame.pack(pady=6)
+        ttk.Checkbutton(btn_frame, text="Profiluj następną operację (cProfile)", variable=profile_var, command=toggle_profile).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Odśwież", command=refresh).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Zamknij", command=panel.destroy).pack(side="left", padx=5)
+        refresh()
+
+    def _show_profile_report(self, name, report):
+        window = tk.Toplevel(self.root)
+        window.title(f"Profil: {name}")
+        text = tk.Text(window, wrap="none", width=120, height=40, font=("Courier", 9))
+        text.insert("1.0", report)
+        text.config(state="disabled")
+        text.pack(fill="both", expand=True)
 
     def open_fillna_dialog(self):
         selected_item = self.column_combobox.get()
@@ -253,7 +406,7 @@ class ExcelViewerApp:
             return
         column_name = selected_item.split(" (")[0]
         dtype = self.df[column_name].dtype
-        missing_count = self.df[column_name].isna().sum()
+        missing_count = self.profiles.get(self.df, column_name).null_count
         if missing_count == 0:
             messagebox.showinfo("Brak brakujących danych", f"Kolumna '{column_name}' nie zawiera brakujących danych do uzupełnienia.")
             return
@@ -261,9 +414,9 @@ class ExcelViewerApp:
         dialog.configure(bg="#fff")
         dialog.title(f"Uzupełnianie braków: {column_name}")
         tk.Label(dialog, text="Wybierz sposób uzupełnienia braków:", bg="#fff").pack(pady=10)
-        method_var = tk.StringVar(value="mean" if dtype == "float64" else "value")
+        method_var = tk.StringVar(value="mean" if pd.api.types.is_float_dtype(dtype) else "value")
         radio_methods = []
-        if dtype == "float64":
+        if pd.api.types.is_float_dtype(dtype):
             radio_methods = [
                 ("Uzupełnij średnią", "mean"),
                 ("Uzupełnij średnią z grupy", "group_mean"),
@@ -271,8 +424,11 @@ class ExcelViewerApp:
                 ("Uzupełnij wartością domyślną", "value"),
                 ("Uzupełnij metodą regresji", "regression"),
                 ("Uzupełnij metodą MICE", "mice"),
+                ("Uzupełnij metodą MICE wiele kolumn naraz", "mice_all"),
+                ("Uzupełnij regresją wiele kolumn naraz", "regression_all"),
+                ("Uzupełnij metodą KNN (liczbowe)", "knn"),
             ]
-        elif dtype == "object":
+        elif is_text_dtype(dtype):
             radio_methods = [
                 ("Uzupełnij wartością domyślną", "value"),
                 ("Uzupełnij najczęstszą wartością", "mode"),
@@ -291,11 +447,12 @@ class ExcelViewerApp:
 
     def apply_fillna(self, dialog, column_name, method):
         dtype = self.df[column_name].dtype
+        decimals = lambda: self.profiles.get(self.df, column_name).decimals
         if method == "mean":
-            self.df[column_name] = fillna_mean(self.df[column_name])
+            compute = lambda job: fillna_mean(self.df[column_name], decimals=decimals())
             info = f"metodą: {method}."
         elif method == "median":
-            self.df[column_name] = fillna_median(self.df[column_name])
+            compute = lambda job: fillna_median(self.df[column_name], decimals=decimals())
             info = f"metodą: {method}."
         elif method == "group_mean":
             self.ask_fillna_group_mean(dialog, column_name)
@@ -305,48 +462,181 @@ class ExcelViewerApp:
             return
         elif method == "regression":
             from logic.methods import fillna_regression
-            self.df[column_name] = fillna_regression(self.df, column_name)
+            compute = lambda job: fillna_regression(self.df, column_name, decimals=decimals())
             info = f"metodą: {method}."
         elif method == "mice":
             from logic.methods import fillna_mice
-            self.df[column_name] = fillna_mice(self.df, column_name)
+            compute = lambda job: fillna_mice(self.df, column_name, decimals=decimals())
             info = f"metodą: {method}."
-        elif method == "unknown" and dtype == "object":
+        elif method == "knn":
+            from logic.methods import fillna_knn_numeric
+            compute = lambda job: fillna_knn_numeric(self.df, column_name, decimals=decimals())
+            info = "metodą KNN (średnia z 5 najbliższych sąsiadów)."
+        elif method in ("mice_all", "regression_all"):
+            self.ask_fillna_many_columns(dialog, column_name, method)
+            return
+        elif method == "unknown" and is_text_dtype(dtype):
             from logic.methods import fillna_unknown
-            self.df[column_name] = fillna_unknown(self.df[column_name])
+            compute = lambda job: fillna_unknown(self.df[column_name])
             info = "wartością: 'Unknown'."
-        elif method == "mode" and dtype == "object":
-            from logic.methods import fillna_mode
-            mode_val = self.df[column_name].mode().iloc[0] if not self.df[column_name].mode().empty else ''
-            self.df[column_name] = fillna_mode(self.df[column_name])
-            info = f"najczęstszą wartością: '{mode_val}'."
-        elif method == "group_mode" and dtype == "object":
+        elif method == "mode" and is_text_dtype(dtype):
+            from logic.methods import fillna_mode, column_mode
+            found = {}
+            def compute(job):
+                found["mode"] = column_mode(self.df[column_name])
+                return fillna_mode(self.df[column_name])
+            info = lambda: f"najczęstszą wartością: '{'' if found['mode'] is None else found['mode']}'."
+        elif method == "group_mode" and is_text_dtype(dtype):
             self.ask_fillna_group_mode(dialog, column_name)
             return
-        elif method == "knn_cat" and dtype == "object":
+        elif method == "knn_cat" and is_text_dtype(dtype):
             from logic.methods import fillna_knn_categorical
-            self.df[column_name] = fillna_knn_categorical(self.df, column_name)
+            compute = lambda job: fillna_knn_categorical(self.df, column_name, encoding=self.encoding)
             info = "KNN dla danych kategorycznych."
-        elif method == "logreg_cat" and dtype == "object":
+        elif method == "logreg_cat" and is_text_dtype(dtype):
             from logic.methods import fillna_logreg_categorical
-            self.df[column_name] = fillna_logreg_categorical(self.df, column_name)
+            compute = lambda job: fillna_logreg_categorical(self.df, column_name, encoding=self.encoding)
             info = "regresją logistyczną/klasyfikatorem."
         elif method == "remove_rows":
             # Usuń wiersze z brakami w wybranej kolumnie
-            self.df = remove_rows_with_missing(self.df, columns=[column_name])
-            info = "usunięciem wierszy z brakami."
+            dialog.destroy()
+            def compute_removal(job):
+                keep_mask = self.df[column_name].notna().to_numpy()
+                return keep_mask, remove_rows_with_missing(self.df, columns=[column_name])
+            def removed(result):
+                self._apply_row_removal(*result)
+                messagebox.showinfo("Informacja", f"Braki w kolumnie '{column_name}' zostały uzupełnione usunięciem wierszy z brakami.")
+                self.display_column()
+            self.run_job(f"Usuwanie wierszy: {column_name}", compute_removal, removed, "Nie udało się usunąć wierszy")
+            return
         else:
             messagebox.showinfo("Informacja", f"Wybrano nieobsługiwaną metodę: {method}.")
             dialog.destroy()
             return
-        messagebox.showinfo("Informacja", f"Braki w kolumnie '{column_name}' zostały uzupełnione {info}")
         dialog.destroy()
+        self._fill_column_async(column_name, compute, info)
+
+    def run_job(self, name, func, on_success, error_text="Wystąpił błąd"):
+        """
+        Uruchamia func(job) w wątku roboczym, a on_success(wynik) w wątku Tk.
+        Wynik jest odrzucany, jeśli w międzyczasie zmieniono self.df.
+        """
+        version = {}
+
+        def work(job):
+            version["start"] = self._df_version
+            if self._profile_next:
+                # Jednorazowe profilowanie (cProfile) zadania zaznaczonego w panelu wydajności
+                self._profile_next = False
+                result, version["profile"], _ = profile_call(func, job)
+                return result
+            return func(job)
+
+        def done(result):
+            if "profile" in version:
+                self._show_profile_report(name, version["profile"])
+            if version.get("start") != self._df_version:
+                messagebox.showwarning("Zadanie nieaktualne", f"Dane zmieniły się w trakcie zadania '{name}' - wynik pominięto.")
+                return
+            on_success(result)
+
+        return self.jobs.submit(name, work, done, lambda e: messagebox.showerror("Błąd", f"{error_text}:\n{e}"))
+
+    def _fill_column_async(self, column_name, compute, info):
+        """Liczy nową kolumnę w tle i po zakończeniu podmienia ją w self.df. info może być tekstem lub funkcją."""
+        def filled(values):
+            self._set_column(column_name, values)
+            text = info() if callable(info) else info
+            messagebox.showinfo("Informacja", f"Braki w kolumnie '{column_name}' zostały uzupełnione {text}")
+            self.display_column()
+        self.run_job(f"Uzupełnianie: {column_name}", compute, filled, "Nie udało się uzupełnić braków")
+
+    def _update_job_status(self, current, pending):
+        """Odświeża pasek stanu zadań (wywoływane w wątku Tk)."""
+        if current is None:
+            self.status_label.config(text="Gotowe" if not pending else f"W kolejce: {len(pending)}")
+            self.progress_bar.stop()
+            self.progress_bar.config(mode="determinate", value=0)
+        else:
+            text = f"{current.name}" + (f" - {current.message}" if current.message else "")
+            if current.cancelled:
+                text += " (anulowanie...)"
+            if pending:
+                text += f" | w kolejce: {len(pending)}"
+            self.status_label.config(text=text)
+            if current.progress is None:
+                if str(self.progress_bar.cget("mode")) != "indeterminate":
+                    self.progress_bar.config(mode="indeterminate")
+                    self.progress_bar.start(15)
+            else:
+                self.progress_bar.stop()
+                self.progress_bar.config(mode="determinate", value=current.progress * 100)
+        self.cancel_job_button.config(state="normal" if current is not None else "disabled")
+        self.clear_jobs_button.config(state="normal" if pending else "disabled")
+        self._update_history_buttons()
+
+    def _set_column(self, column_name, values, record=True):
+        """
+        Podmienia kolumnę w self.df i unieważnia dane podręczne tej kolumny.
+        Zwraca zmianę komórek; przy record=True zapisuje ją też w historii jako osobny krok.
+        """
+        change = ColumnChange.between(column_name, self.df[column_name], values)
+        self.df[column_name] = values
+        self._df_version += 1
+        self.profiles.invalidate([column_name])
+        self.encoding.invalidate([column_name])
+        if record:
+            self._record(CellChanges([change], f"uzupełnienie kolumny '{column_name}'"))
+        return change
+
+    def _apply_row_removal(self, keep_mask, df):
+        """Podmienia self.df po usunięciu wierszy, aktualizuje dane podręczne i zapisuje krok w historii."""
+        step = RowRemoval.between(self.df, keep_mask, f"usunięcie {int((~keep_mask).sum())} wierszy")
+        self.df = df
+        self._df_version += 1
+        self.profiles.invalidate()
+        self.encoding.drop_rows(keep_mask, self.df)
+        self._record(step)
+
+    def _record(self, step):
+        if not self.history.record(step):
+            messagebox.showwarning("Historia", f"Zmiana ({step.label}) jest zbyt duża, by ją zapamiętać - nie będzie można jej cofnąć.")
+        self._update_history_buttons()
+
+    def _update_history_buttons(self):
+        # Cofanie zmienia self.df w miejscu - niedostępne, dopóki zadanie w tle może czytać dane
+        busy = self.jobs.busy
+        self.undo_button.config(state="normal" if self.history.can_undo() and not busy else "disabled")
+        self.redo_button.config(state="normal" if self.history.can_redo() and not busy else "disabled")
+
+    def undo(self, event=None):
+        self._step_history(self.history.undo, "Cofnięto")
+
+    def redo(self, event=None):
+        self._step_history(self.history.redo, "Ponowiono")
+
+    def _step_history(self, move, verb):
+        """Cofa lub ponawia krok historii i unieważnia dane podręczne zmienionych kolumn."""
+        if self.df is None:
+            return
+        if self.jobs.busy:
+            self.status_label.config(text="Cofanie i ponawianie są niedostępne w trakcie zadań w tle.")
+            return
+        self.df, step = move(self.df)
+        if step is None:
+            return
+        self._df_version += 1
+        # Cofnięcie usunięcia wierszy zmienia wszystkie kolumny (columns=None)
+        self.profiles.invalidate(step.columns)
+        self.encoding.invalidate(step.columns)
+        self._update_history_buttons()
+        self.status_label.config(text=f"{verb}: {step.label}")
         self.display_column()
 
     def ask_fillna_value(self, dialog, column_name):
         dialog.withdraw()
         dtype = self.df[column_name].dtype
-        if dtype == "object":
+        if is_text_dtype(dtype):
             answer = messagebox.askquestion("Wartość domyślna", "Czy uzupełnić wartością domyślną ('Unknown')?")
             if answer == 'yes':
                 value = 'Unknown'
@@ -365,10 +655,132 @@ class ExcelViewerApp:
                     dialog.deiconify()
                     return
         from logic.methods import fillna_value
-        self.df[column_name] = fillna_value(self.df[column_name], value)
-        messagebox.showinfo("Informacja", f"Braki w kolumnie '{column_name}' zostały uzupełnione wartością: {value}.")
+        def compute(job):
+            decimals = self.profiles.get(self.df, column_name).decimals if not is_text_dtype(dtype) else None
+            return fillna_value(self.df[column_name], value, decimals=decimals)
         dialog.destroy()
-        self.display_column()
+        self._fill_column_async(column_name, compute, f"wartością: {value}.")
+
+    def open_plan_dialog(self):
+        """Plan uzupełnienia wszystkich kolumn z brakami: proponowane metody z możliwością zmiany, wykonanie w tle."""
+        if self.df is None:
+            messagebox.showwarning("Brak danych", "Najpierw wczytaj plik.")
+            return
+        plan = propose_plan(self.df)
+        if not plan:
+            messagebox.showinfo("Informacja", "Brak kolumn z brakami.")
+            return
+        skip = "(pomiń)"
+        plan_dialog = tk.Toplevel(self.root)
+        plan_dialog.title("Uzupełnij cały zbiór")
+        plan_dialog.geometry("760x480")
+        columns = ("column", "missing", "percent", "method", "params")
+        headings = ("Kolumna", "Braki", "% braków", "Metoda", "Parametry")
+        tree = ttk.Treeview(plan_dialog, columns=columns, show="headings", height=14)
+        for col, head in zip(columns, headings):
+            tree.heading(col, text=head)
+            tree.column(col, width=200 if col in ("column", "params") else 110, anchor="w")
+        tree.pack(fill="both", expand=True, padx=10, pady=6)
+
+        def refresh():
+            tree.delete(*tree.get_children())
+            for i, step in enumerate(plan):
+                params = ", ".join(step["params"].get("group_cols", []))
+                # Krok wielokolumnowy (regression_patterns) to jeden wiersz z listą kolumn
+                names = ", ".join(map(str, step_columns(step)))
+                values = (names, step["missing"], f"{step['missing_fraction'] * 100:.1f}", step["method"] or skip, params)
+                tree.insert("", tk.END, iid=str(i), values=values)
+
+        edit_frame = ttk.Frame(plan_dialog)
+        edit_frame.pack(fill="x", padx=10, pady=4)
+        ttk.Label(edit_frame, text="Metoda:").pack(side="left")
+        method_combo = ttk.Combobox(edit_frame, state="readonly", width=22)
+        method_combo.pack(side="left", padx=5)
+        ttk.Label(edit_frame, text="Kolumny grupujące (po przecinku):").pack(side="left", padx=(10, 0))
+        group_entry = ttk.Entry(edit_frame, width=28)
+        group_entry.pack(side="left", padx=5)
+
+        def selected():
+            return [int(iid) for iid in tree.selection()]
+
+        def on_select(event=None):
+            rows = selected()
+            if not rows:
+                return
+            # Wspólne metody zaznaczonych kolumn (różne typy kolumn mają różne metody)
+            columns = [c for i in rows for c in step_columns(plan[i])]
+            options = [m for m in methods_for(self.df[columns[0]]) if all(m in methods_for(self.df[c]) for c in columns)]
+            method_combo["values"] = options + [skip]
+            method_combo.set(plan[rows[0]]["method"] or skip)
+            group_entry.delete(0, tk.END)
+            group_entry.insert(0, ", ".join(plan[rows[0]]["params"].get("group_cols", [])))
+
+        def set_method():
+            method = method_combo.get()
+            if not selected() or not method:
+                return
+            params = {}
+            if method in GROUP_METHODS:
+                group_cols = [c.strip() for c in group_entry.get().split(",") if c.strip()]
+                unknown = [c for c in group_cols if c not in self.df.columns]
+                if not group_cols or unknown:
+                    messagebox.showwarning("Kolumny grupujące", "Podaj istniejące kolumny grupujące" + (f" (nieznane: {', '.join(unknown)})." if unknown else "."))
+                    return
+                params = {"group_cols": group_cols}
+            for i in selected():
+                plan[i]["method"] = None if method == skip else method
+                plan[i]["params"] = params
+            # Połącz / rozdziel kroki regression_patterns po zmianie metod
+            plan[:] = merge_steps(plan)
+            refresh()
+
+        tree.bind("<<TreeviewSelect>>", on_select)
+        ttk.Button(edit_frame, text="Ustaw", command=set_method).pack(side="left", padx=5)
+
+        def run():
+            ordered = order_plan(plan)
+            levels = schedule(self.df, ordered)
+            if not levels:
+                messagebox.showwarning("Brak kroków", "Wszystkie kolumny są pominięte.")
+                return
+            plan_dialog.destroy()
+            start = {}
+
+            def compute(job):
+                start["time"] = time.perf_counter()
+                return run_plan(self.df, ordered, job=job)
+
+            def done(result):
+                filled, report = result
+                elapsed = time.perf_counter() - start["time"]
+                changes = [self._set_column(col, values, record=False) for col, values in filled.items()]
+                self._record(CellChanges(changes, f"uzupełnienie całego zbioru ({len(changes)} kolumn)"))
+                serial = sum(r["seconds"] for r in report)
+                lines = [
+                    f"{r['column']}: {r['method']} (poziom {r['level'] + 1}, {r['filled']} braków, {r['seconds']:.2f} s)"
+                    + (" - NIC NIE UZUPEŁNIONO" if r["filled"] == 0 else "")
+                    for r in report
+                ]
+                empty = [r["column"] for r in report if r["filled"] == 0]
+                warning = (
+                    f"\n\nUwaga: kroki bez efektu ({', '.join(empty)}) - metoda nie miała na czym się uczyć "
+                    "(np. brak innych kolumn tekstowych lub kompletnych wierszy). Wybierz dla nich inną metodę."
+                    if empty else ""
+                )
+                (messagebox.showwarning if empty else messagebox.showinfo)(
+                    "Informacja",
+                    f"Uzupełniono {len(filled)} kolumn w {len(levels)} etapach.\n"
+                    f"Czas: {elapsed:.2f} s (suma czasów kroków: {serial:.2f} s).\n\n" + "\n".join(lines) + warning,
+                )
+                self.display_column()
+
+            self.run_job("Uzupełnianie całego zbioru", compute, done, "Nie udało się wykonać planu")
+
+        btn_frame = ttk.Frame(plan_dialog)
+        btn_frame.pack(pady=8)
+        ttk.Button(btn_frame, text="Uruchom", command=run).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Anuluj", command=plan_dialog.destroy).pack(side="left", padx=5)
+        refresh()
 
     def ask_fillna_group_mean(self, dialog, column_name):
         dialog.withdraw()
@@ -392,12 +804,11 @@ class ExcelViewerApp:
                 messagebox.showwarning("Brak wyboru", "Wybierz co najmniej jedną kolumnę do grupowania.")
                 return
             chosen = [group_cols[i] for i in selections]
-            self.df[column_name] = fillna_group_mean(self.df, column_name, chosen)
+            compute = lambda job: fillna_group_mean(self.df, column_name, chosen, decimals=self.profiles.get(self.df, column_name).decimals)
             msg = "', '".join(chosen)
-            messagebox.showinfo("Informacja", f"Braki w kolumnie '{column_name}' zostały uzupełnione średnią w grupach kolumn: '{msg}'.")
             group_dialog.destroy()
             dialog.destroy()
-            self.display_column()
+            self._fill_column_async(column_name, compute, f"średnią w grupach kolumn: '{msg}'.")
 
         btn_frame = ttk.Frame(group_dialog)
         btn_frame.pack(pady=8)
@@ -426,30 +837,91 @@ class ExcelViewerApp:
                 messagebox.showwarning("Brak wyboru", "Wybierz co najmniej jedną kolumnę do grupowania.")
                 return
             chosen = [group_cols[i] for i in selections]
-            self.df[column_name] = fillna_group_mode(self.df, column_name, chosen)
+            compute = lambda job: fillna_group_mode(self.df, column_name, chosen)
             msg = "', '".join(chosen)
-            messagebox.showinfo("Informacja", f"Braki w kolumnie '{column_name}' zostały uzupełnione najczęstszą wartością w grupach kolumn: '{msg}'.")
             group_dialog.destroy()
             dialog.destroy()
-            self.display_column()
+            self._fill_column_async(column_name, compute, f"najczęstszą wartością w grupach kolumn: '{msg}'.")
 
         btn_frame = ttk.Frame(group_dialog)
         btn_frame.pack(pady=8)
         ttk.Button(btn_frame, text="Zastosuj", command=apply_group_mode).pack(side="left", padx=5)
         ttk.Button(btn_frame, text="Anuluj", command=lambda: (group_dialog.destroy(), dialog.deiconify())).pack(side="left", padx=5)
 
+    def ask_fillna_many_columns(self, dialog, column_name, method="mice_all"):
+        from logic.methods import fillna_mice_columns, fillna_regression_columns
+        # Metoda -> (tytuł okna, funkcja uzupełniająca wiele kolumn, opis w komunikacie)
+        title, fill_columns, label = {
+            "mice_all": ("MICE dla wielu kolumn", fillna_mice_columns, "metodą MICE (jedno dopasowanie)"),
+            "regression_all": (
+                "Regresja dla wielu kolumn", fillna_regression_columns,
+                "regresją liniową (jedna kowariancja, model na wzorzec braków)",
+            ),
+        }[method]
+        dialog.withdraw()
+        num_cols = [c for c in self.df.select_dtypes(include="number").columns if self.df[c].isna().any()]
+        if not num_cols:
+            messagebox.showwarning("Brak kolumn", "Brak kolumn liczbowych z brakami.")
+            dialog.deiconify()
+            return
+        mice_dialog = tk.Toplevel(self.root)
+        mice_dialog.title(title)
+        mice_dialog.configure(bg="#fff")
+        tk.Label(mice_dialog, text="Wybierz kolumny do uzupełnienia (Ctrl/Shift dla wielu):", bg="#fff").pack(padx=10, pady=6)
+        listbox = tk.Listbox(mice_dialog, selectmode=tk.MULTIPLE, exportselection=False, height=min(10, len(num_cols)), width=40)
+        for col in num_cols:
+            listbox.insert(tk.END, col)
+        listbox.select_set(0, tk.END)
+        listbox.pack(padx=10, pady=6, fill="both", expand=True)
+
+        def apply_mice_columns():
+            selections = listbox.curselection()
+            if not selections:
+                messagebox.showwarning("Brak wyboru", "Wybierz co najmniej jedną kolumnę.")
+                return
+            chosen = [num_cols[i] for i in selections]
+
+            def compute(job):
+                decimals = {col: self.profiles.get(self.df, col).decimals for col in chosen}
+                start = time.perf_counter()
+                filled = fill_columns(self.df, chosen, decimals)
+                return filled, time.perf_counter() - start
+
+            def filled_all(result):
+                filled, elapsed = result
+                changes = [self._set_column(col, filled[col], record=False) for col in filled.columns]
+                self._record(CellChanges(changes, f"uzupełnienie {len(changes)} kolumn"))
+                # Szacunek, nie pomiar: kolumna po kolumnie każde wywołanie to osobne, podobnie kosztowne dopasowanie
+                serial = elapsed * len(chosen)
+                msg = "', '".join(chosen)
+                messagebox.showinfo(
+                    "Informacja",
+                    f"Braki w kolumnach '{msg}' zostały uzupełnione {label}.\n"
+                    f"Zmierzony czas: {elapsed:.2f} s.\n"
+                    f"Szacowany czas kolumna po kolumnie ({len(chosen)} osobnych dopasowań): ok. {serial:.2f} s "
+                    f"(szacowana oszczędność ok. {serial - elapsed:.2f} s).",
+                )
+                self.display_column()
+
+            mice_dialog.destroy()
+            dialog.destroy()
+            self.run_job(title, compute, filled_all, "Nie udało się uzupełnić braków")
+
+        btn_frame = ttk.Frame(mice_dialog)
+        btn_frame.pack(pady=8)
+        ttk.Button(btn_frame, text="Zastosuj", command=apply_mice_columns).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Anuluj", command=lambda: (mice_dialog.destroy(), dialog.deiconify())).pack(side="left", padx=5)
+
     def save_data(self):
         if self.df is None or not hasattr(self, 'loaded_file_path') or not self.loaded_file_path:
             messagebox.showwarning("Brak pliku", "Najpierw wczytaj plik.")
             return
-        try:
-            if self.loaded_file_path.endswith(".csv"):
-                self.df.to_csv(self.loaded_file_path, index=False)
-            else:
-                self.df.to_excel(self.loaded_file_path, index=False)
-            messagebox.showinfo("Sukces", "Dane zostały zapisane do oryginalnego pliku.")
-        except Exception as e:
-            messagebox.showerror("Błąd", f"Nie udało się zapisać danych:\n{e}")
+        file_path = self.loaded_file_path
+        self.run_job(
+            f"Zapis: {file_path}", lambda job: save_dataframe(self.df, file_path),
+            lambda _: messagebox.showinfo("Sukces", "Dane zostały zapisane do oryginalnego pliku."),
+            "Nie udało się zapisać danych",
+        )
 
 def main():
     root = tk.Tk()